@@ -1,7 +1,10 @@
+import json
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
 from common.logger import get_logger
 from common.config import get_config
+from common.utils import hash_text
+from agents.error_handling.human_intervention import get_intervention_handler
 
 logger = get_logger(__name__)
 config = get_config()
@@ -34,6 +37,74 @@ class BaseAgent(ABC):
         """
         pass
     
+    def run(self, input_data: Dict[str, Any], result_cache=None) -> Dict[str, Any]:
+        """执行处理，命中结果缓存时跳过本阶段
+        
+        处理成功和失败都记入人工干预处理器的错误率窗口，窗口按代理类型统计，
+        同类型的各个实例共用一个窗口，使错误率按真实请求数计算。
+        
+        Args:
+            input_data: 输入数据
+            result_cache: 结果缓存（ResultCache），为None时直接处理
+            
+        Returns:
+            处理结果
+        """
+        if result_cache is not None and not self.use_result_cache(input_data):
+            result_cache = None
+        
+        cache_key = None
+        if result_cache is not None:
+            cache_key = result_cache.make_key(self.agent_type, self.get_cache_key(input_data))
+            cached = result_cache.get(self.agent_type, cache_key)
+            if cached is not None:
+                logger.info(f"代理{self.agent_id}命中结果缓存，跳过处理")
+                # 元数据属于本次请求，不使用缓存中的旧值
+                if "metadata" in cached:
+                    cached["metadata"] = {**cached["metadata"], **input_data.get("metadata", {})}
+                return cached
+        
+        try:
+            result = self.process(input_data)
+        except Exception as e:
+            # process 未自行处理的异常同样计入错误率
+            self._record_failure(e)
+            raise
+        if not result.get("error"):
+            get_intervention_handler().record_success(self.agent_type)
+            if result_cache is not None:
+                result_cache.set(self.agent_type, cache_key, result)
+        return result
+    
+    def use_result_cache(self, input_data: Dict[str, Any]) -> bool:
+        """本次输入是否使用结果缓存
+        
+        处理过程有缓存之外的副作用（如推进增量审查记录）的代理可覆盖此方法，
+        命中缓存时跳过 process 会导致这些副作用丢失。
+        
+        Args:
+            input_data: 输入数据
+            
+        Returns:
+            是否使用结果缓存
+        """
+        return True
+    
+    def get_cache_key(self, input_data: Dict[str, Any]) -> str:
+        """计算输入内容的缓存哈希
+        
+        默认对去除元数据后的输入做规范化JSON哈希，上游结果相同即可命中。
+        
+        Args:
+            input_data: 输入数据
+            
+        Returns:
+            内容哈希
+        """
+        content = json.dumps(_strip_metadata(input_data), ensure_ascii=False,
+                             sort_keys=True, default=str)
+        return hash_text(content)
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """验证输入数据
         
@@ -56,6 +127,7 @@ class BaseAgent(ABC):
         """
         self.error_count += 1
         logger.error(f"代理{self.agent_id}处理失败: {str(error)}")
+        self._record_failure(error)
         
         # 检查是否需要重试
         if self.error_count < self.max_retries:
@@ -74,6 +146,20 @@ class BaseAgent(ABC):
             "retry_count": self.error_count
         }
     
+    def _record_failure(self, error: Exception):
+        """把失败计入错误率窗口，超过阈值时创建人工干预并暂停该类型代理
+        
+        Args:
+            error: 错误对象
+        """
+        handler = get_intervention_handler()
+        try:
+            if handler.check_intervention_needed(self.agent_type, error) \
+                    and not handler.is_agent_paused(self.agent_type):
+                handler.handle_intervention(self.agent_type, error)
+        except Exception as e:
+            logger.error(f"记录代理{self.agent_id}的错误统计失败: {str(e)}")
+    
     def update_state(self, new_state: str):
         """更新代理状态
         
@@ -101,3 +187,18 @@ class BaseAgent(ABC):
             "state": self.state,
             "error_count": self.error_count
         }
+
+def _strip_metadata(data: Any) -> Any:
+    """递归移除数据中的元数据字段
+    
+    Args:
+        data: 输入数据
+        
+    Returns:
+        不含 metadata 字段的数据
+    """
+    if isinstance(data, dict):
+        return {k: _strip_metadata(v) for k, v in data.items() if k != "metadata"}
+    if isinstance(data, list):
+        return [_strip_metadata(item) for item in data]
+    return data
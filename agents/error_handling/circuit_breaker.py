@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict
+from common.logger import get_logger
+from common.config import get_error_handling_config
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"依赖{name}已熔断，{retry_after:.1f}秒后重新探测")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """下游依赖的熔断器
+
+    在滑动时间窗口内统计调用结果，失败率达到阈值后打开熔断，期间请求
+    直接失败而不再访问依赖；打开一段时间后进入半开状态，放行少量探测
+    请求，探测成功则关闭熔断，失败则重新打开。
+    """
+
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5, minimum_calls: int = 10,
+                 window_seconds: float = 60, open_seconds: float = 30, half_open_max_calls: int = 1):
+        """初始化熔断器
+
+        Args:
+            name: 依赖名称，例如 model:deepseek_api、rabbitmq、chroma
+            failure_rate_threshold: 触发熔断的失败率
+            minimum_calls: 窗口内至少有多少次调用才计算失败率
+            window_seconds: 失败率统计窗口（秒）
+            open_seconds: 熔断打开后多久进入半开状态（秒）
+            half_open_max_calls: 半开状态下同时放行的探测请求数
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._outcomes = deque()  # (时间, 是否成功)
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "rejected": 0,
+            "opened": 0
+        }
+
+    @property
+    def state(self) -> str:
+        """当前状态，打开时间已到时视为半开"""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        """打开时间已到时转入半开状态，调用方需持有锁"""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+            logger.info(f"依赖{self.name}熔断进入半开状态，开始探测")
+
+    def _prune(self, now: float):
+        """移除窗口外的调用记录，调用方需持有锁"""
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            _, success = self._outcomes.popleft()
+            if not success:
+                self._failures -= 1
+
+    def _open(self):
+        """打开熔断，调用方需持有锁"""
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._failures = 0
+        self._stats["opened"] += 1
+
+    def allow_request(self) -> bool:
+        """判断是否放行本次请求
+
+        Returns:
+            是否放行，放行的半开探测请求必须随后调用 record_success 或 record_failure
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def release(self):
+        """放弃已放行的请求且不计入结果，例如调用被取消"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def retry_after(self) -> float:
+        """距离下一次探测的秒数
+
+        Returns:
+            秒数，未熔断时为0
+        """
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        """记录一次成功调用"""
+        with self._lock:
+            self._stats["successes"] += 1
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+                logger.info(f"依赖{self.name}探测成功，熔断关闭")
+                return
+            now = time.monotonic()
+            self._outcomes.append((now, True))
+            self._prune(now)
+
+    def record_failure(self):
+        """记录一次失败调用"""
+        with self._lock:
+            self._stats["failures"] += 1
+            if self._state == HALF_OPEN:
+                self._open()
+                logger.warning(f"依赖{self.name}探测失败，熔断重新打开{self.open_seconds}秒")
+                return
+            if self._state == OPEN:
+                return
+
+            now = time.monotonic()
+            self._outcomes.append((now, False))
+            self._failures += 1
+            self._prune(now)
+
+            calls = len(self._outcomes)
+            if calls >= self.minimum_calls and self._failures / calls >= self.failure_rate_threshold:
+                failure_rate = self._failures / calls
+                self._open()
+                logger.error(f"依赖{self.name}失败率{failure_rate:.2f}达到阈值"
+                             f"{self.failure_rate_threshold}，熔断打开{self.open_seconds}秒")
+
+    def call(self, func: Callable, *args, **kwargs) -> Any:
+        """在熔断器保护下执行函数
+
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数执行结果
+
+        Raises:
+            CircuitOpenError: 熔断打开时直接拒绝
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self):
+        """强制关闭熔断并清空窗口"""
+        with self._lock:
+            self._state = CLOSED
+            self._outcomes.clear()
+            self._failures = 0
+            self._half_open_calls = 0
+        logger.info(f"依赖{self.name}熔断已重置")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取熔断器统计
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            self._refresh_state()
+            self._prune(time.monotonic())
+            calls = len(self._outcomes)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "window_calls": calls,
+                "window_failure_rate": self._failures / calls if calls else 0.0,
+                **self._stats
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """获取依赖的熔断器，同一进程内所有代理共享
+
+    参数读取 error_handling.circuit_breaker，dependencies 下可按依赖名称
+    覆盖默认值。
+
+    Args:
+        name: 依赖名称
+
+    Returns:
+        熔断器
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker_config = get_error_handling_config().get("circuit_breaker", {})
+            settings = {k: v for k, v in breaker_config.items() if k != "dependencies"}
+            settings.update(breaker_config.get("dependencies", {}).get(name, {}))
+            breaker = CircuitBreaker(name, **settings)
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """获取进程内全部熔断器的统计
+
+    Returns:
+        依赖名称到统计信息的映射
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.get_stats() for breaker in breakers}
@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from common.logger import get_logger
+from common.utils import format_timestamp
+
+logger = get_logger(__name__)
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+class DeadLetterDigest:
+    """死信通知汇总器
+
+    死信处理路径只把消息ID、大小、代理和错误类型放入内存队列后立即返回，
+    后台线程按时间窗口把死信按 (代理, 错误类型) 分组，每个窗口只发送
+    一份汇总通知，通知 I/O 不再阻塞死信处理。
+    """
+
+    def __init__(self, notifier: Callable[[Dict[str, Any]], Any], window_seconds: float = 60,
+                 max_ids_per_group: int = 20, max_pending: int = 10000):
+        """初始化汇总器
+
+        Args:
+            notifier: 接收汇总内容并发送通知的函数
+            window_seconds: 汇总窗口（秒）
+            max_ids_per_group: 每组在通知中列出的消息ID上限
+            max_pending: 等待汇总的死信上限，超出后只计数不保留明细
+        """
+        self.notifier = notifier
+        self.window_seconds = window_seconds
+        self.max_ids_per_group = max_ids_per_group
+
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_pending)
+        self._dropped = 0
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"received": 0, "digests_sent": 0, "notify_failures": 0}
+
+    def add(self, message_id: str, size: int, agent_id: str, error_type: str):
+        """登记一条死信，不阻塞调用方
+
+        Args:
+            message_id: 消息ID
+            size: 消息大小（字节）
+            agent_id: 产生死信的代理
+            error_type: 错误类型
+        """
+        self._ensure_worker()
+        with self._lock:
+            self._stats["received"] += 1
+        try:
+            self._queue.put_nowait({
+                "message_id": message_id,
+                "size": size,
+                "agent_id": agent_id,
+                "error_type": error_type,
+                "time": time.time()
+            })
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+
+    def _ensure_worker(self):
+        """按需启动汇总线程"""
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._stop_event.clear()
+                    self._worker = threading.Thread(target=self._run, name="dead-letter-digest", daemon=True)
+                    self._worker.start()
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        """取出当前队列中的全部死信
+
+        Returns:
+            死信列表
+        """
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _build_digest(self, items: List[Dict[str, Any]], dropped: int) -> Dict[str, Any]:
+        """按代理和错误类型分组生成汇总
+
+        Args:
+            items: 窗口内的死信
+            dropped: 因队列已满未保留明细的死信数
+
+        Returns:
+            汇总内容
+        """
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for item in items:
+            key = (item["agent_id"], item["error_type"])
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = {
+                    "agent_id": item["agent_id"],
+                    "error_type": item["error_type"],
+                    "count": 0,
+                    "total_size": 0,
+                    "first_seen": item["time"],
+                    "last_seen": item["time"],
+                    "message_ids": []
+                }
+            group["count"] += 1
+            group["total_size"] += item["size"]
+            group["first_seen"] = min(group["first_seen"], item["time"])
+            group["last_seen"] = max(group["last_seen"], item["time"])
+            if len(group["message_ids"]) < self.max_ids_per_group:
+                group["message_ids"].append(item["message_id"])
+
+        for group in groups.values():
+            group["first_seen"] = format_timestamp(group["first_seen"])
+            group["last_seen"] = format_timestamp(group["last_seen"])
+
+        return {
+            "timestamp": format_timestamp(),
+            "window_seconds": self.window_seconds,
+            "total": len(items) + dropped,
+            "dropped_details": dropped,
+            "groups": sorted(groups.values(), key=lambda g: g["count"], reverse=True)
+        }
+
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """立即汇总并发送当前窗口内的死信
+
+        Returns:
+            发送的汇总内容，没有死信时返回None
+        """
+        items = self._drain()
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+        if not items and not dropped:
+            return None
+
+        digest = self._build_digest(items, dropped)
+        try:
+            self.notifier(digest)
+            with self._lock:
+                self._stats["digests_sent"] += 1
+            logger.info(f"已发送死信汇总通知: 共{digest['total']}条，{len(digest['groups'])}组")
+        except Exception as e:
+            with self._lock:
+                self._stats["notify_failures"] += 1
+            logger.error(f"发送死信汇总通知失败: {str(e)}")
+        return digest
+
+    def _run(self):
+        """汇总线程：每个窗口结束时发送一次汇总"""
+        while not self._stop_event.wait(self.window_seconds):
+            self.flush()
+        self.flush()
+
+    def stop(self):
+        """停止汇总线程并发送剩余的汇总"""
+        self._stop_event.set()
+        if self._worker is not None:
+            self._worker.join(timeout=self.window_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取汇总统计
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            return {**self._stats, "pending": self._queue.qsize(), "dropped_details": self._dropped}
+
+
+def get_dead_letter_digest(notifier: Callable[[Dict[str, Any]], Any], window_seconds: float = 60,
+                           max_ids_per_group: int = 20) -> DeadLetterDigest:
+    """获取进程内共享的死信通知汇总器
+
+    进程内的全部死信处理器共用一个汇总线程和一个窗口，同一窗口的死信只
+    发送一份汇总通知。参数只在首次创建时生效。
+
+    Args:
+        notifier: 接收汇总内容并发送通知的函数
+        window_seconds: 汇总窗口（秒）
+        max_ids_per_group: 每组在通知中列出的消息ID上限
+
+    Returns:
+        死信通知汇总器
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = DeadLetterDigest(notifier, window_seconds=window_seconds,
+                                         max_ids_per_group=max_ids_per_group)
+        return _instance
@@ -1,7 +1,10 @@
+import json
 from typing import Dict, Any, Optional
 from common.logger import get_logger
-from common.config import get_config
+from common.config import get_config, get_error_handling_config
+from common.utils import hash_text
 from message_broker.core.queue_manager import QueueManager
+from agents.error_handling.dead_letter_digest import get_dead_letter_digest
 
 logger = get_logger(__name__)
 config = get_config()
@@ -12,40 +15,21 @@ class DeadLetterHandler:
     def __init__(self):
         """初始化死信处理器"""
         self.queue_manager = QueueManager()
-        self.dead_letter_config = config.get("error_handling.dead_letter", {})
+        error_handling_config = get_error_handling_config()
+        self.dead_letter_config = error_handling_config.get("dead_letter", {})
+        self.intervention_config = error_handling_config.get("human_intervention", {})
+        digest_config = self.dead_letter_config.get("digest", {})
+        # 进程内的死信处理器共用一个汇总器，同一窗口只发送一份汇总通知
+        self.digest = get_dead_letter_digest(
+            self._notify_human_intervention,
+            window_seconds=digest_config.get("window", 60),
+            max_ids_per_group=digest_config.get("max_ids_per_group", 20)
+        )
         self.setup_dead_letter_queue()
     
     def setup_dead_letter_queue(self):
         """设置死信队列"""
-        try:
-            # 创建死信交换机
-            self.queue_manager.declare_exchange(
-                self.dead_letter_config.get("exchange", "dead_letter_exchange"),
-                "direct",
-                durable=True
-            )
-            
-            # 创建死信队列
-            self.queue_manager.declare_queue(
-                self.dead_letter_config.get("queue", "dead_letter_queue"),
-                durable=True,
-                arguments={
-                    "x-message-ttl": self.dead_letter_config.get("ttl", 86400) * 1000,  # 转换为毫秒
-                    "x-dead-letter-exchange": "",  # 空字符串表示默认交换机
-                    "x-dead-letter-routing-key": "retry_queue"  # 重试队列
-                }
-            )
-            
-            # 绑定队列和交换机
-            self.queue_manager.bind_queue(
-                self.dead_letter_config.get("queue", "dead_letter_queue"),
-                self.dead_letter_config.get("exchange", "dead_letter_exchange"),
-                self.dead_letter_config.get("routing_key", "dead_letter")
-            )
-            
-            logger.info("死信队列设置成功")
-        except Exception as e:
-            logger.error(f"设置死信队列失败: {str(e)}")
+        setup_dead_letter_queue(self.queue_manager)
     
     def handle_dead_letter(self, message: Dict[str, Any]) -> bool:
         """处理死信消息
@@ -57,8 +41,13 @@ class DeadLetterHandler:
             是否成功处理
         """
         try:
-            # 记录死信消息
-            logger.error(f"接收到死信消息: {message}")
+            # 只记录消息ID和大小，合同正文不进入日志
+            payload = json.dumps(message, ensure_ascii=False, default=str)
+            size = len(payload.encode("utf-8"))
+            metadata = message.get("metadata", {}) if isinstance(message.get("metadata"), dict) else {}
+            message_id = (message.get("message_id") or metadata.get("task_id")
+                          or metadata.get("contract_id") or hash_text(payload)[:16])
+            logger.error(f"接收到死信消息: id={message_id}, 大小{size}字节")
             
             # 发送到死信队列
             self.queue_manager.publish_message(
@@ -67,49 +56,54 @@ class DeadLetterHandler:
                 message
             )
             
-            # 触发人工干预通知
-            self._notify_human_intervention(message)
+            # 交给汇总线程按窗口合并通知，不在此处等待通知 I/O
+            error = message.get("error")
+            self.digest.add(
+                message_id,
+                size,
+                message.get("agent_id") or metadata.get("agent_id", "unknown"),
+                message.get("error_type") or (error.get("type") if isinstance(error, dict) else None) or "unknown"
+            )
             
             return True
         except Exception as e:
             logger.error(f"处理死信消息失败: {str(e)}")
             return False
     
-    def _notify_human_intervention(self, message: Dict[str, Any]):
-        """通知人工干预
+    def _notify_human_intervention(self, digest: Dict[str, Any]):
+        """通知人工干预，由汇总线程每个窗口调用一次
         
         Args:
-            message: 死信消息
+            digest: 死信汇总
         """
-        # 获取人工干预配置
-        intervention_config = config.get("error_handling.human_intervention", {})
-        
-        if intervention_config.get("enabled", True):
+        if self.intervention_config.get("enabled", True):
+            notification = self.intervention_config.get("notification", {})
+            
             # 发送邮件通知
-            if intervention_config.get("notification.email", True):
-                self._send_email_notification(message)
+            if notification.get("email", True):
+                self._send_email_notification(digest)
             
             # 发送Slack通知
-            if intervention_config.get("notification.slack", False):
-                self._send_slack_notification(message)
+            if notification.get("slack", False):
+                self._send_slack_notification(digest)
     
-    def _send_email_notification(self, message: Dict[str, Any]):
+    def _send_email_notification(self, digest: Dict[str, Any]):
         """发送邮件通知
         
         Args:
-            message: 死信消息
+            digest: 死信汇总
         """
         # TODO: 实现邮件通知
-        logger.info(f"发送邮件通知: {message}")
+        logger.info(f"发送死信汇总邮件通知: 共{digest['total']}条，{len(digest['groups'])}组")
     
-    def _send_slack_notification(self, message: Dict[str, Any]):
+    def _send_slack_notification(self, digest: Dict[str, Any]):
         """发送Slack通知
         
         Args:
-            message: 死信消息
+            digest: 死信汇总
         """
         # TODO: 实现Slack通知
-        logger.info(f"发送Slack通知: {message}")
+        logger.info(f"发送死信汇总Slack通知: 共{digest['total']}条，{len(digest['groups'])}组")
     
     def retry_message(self, message: Dict[str, Any]) -> bool:
         """重试死信消息
@@ -136,8 +130,57 @@ class DeadLetterHandler:
                 message.get("body", {})
             )
             
-            logger.info(f"成功重试消息: {message}")
+            logger.info(f"成功重试消息: {original_exchange}/{original_routing_key}")
             return True
         except Exception as e:
             logger.error(f"重试消息失败: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+def setup_dead_letter_queue(queue_manager: QueueManager = None) -> bool:
+    """声明死信交换机和死信队列并绑定
+
+    阶段队列通过 x-dead-letter-exchange 把拒绝的消息转入死信交换机，
+    发布任务前需先声明，否则死信会被服务器丢弃。QueueManager 会跳过
+    已声明过的拓扑，重复调用没有额外开销。
+
+    Args:
+        queue_manager: 队列管理器，默认使用共享会话
+
+    Returns:
+        是否设置成功
+    """
+    queue_manager = queue_manager or QueueManager()
+    dead_letter_config = get_error_handling_config().get("dead_letter", {})
+    try:
+        # 创建死信交换机
+        declared = queue_manager.declare_exchange(
+            dead_letter_config.get("exchange", "dead_letter_exchange"),
+            "direct",
+            durable=True
+        )
+        
+        # 创建死信队列
+        declared = declared and queue_manager.declare_queue(
+            dead_letter_config.get("queue", "dead_letter_queue"),
+            durable=True,
+            arguments={
+                "x-message-ttl": dead_letter_config.get("ttl", 86400) * 1000,  # 转换为毫秒
+                "x-dead-letter-exchange": "",  # 空字符串表示默认交换机
+                "x-dead-letter-routing-key": "retry_queue"  # 重试队列
+            }
+        )
+        
+        # 绑定队列和交换机
+        declared = declared and queue_manager.bind_queue(
+            dead_letter_config.get("queue", "dead_letter_queue"),
+            dead_letter_config.get("exchange", "dead_letter_exchange"),
+            dead_letter_config.get("routing_key", "dead_letter")
+        )
+        
+        if declared:
+            logger.info("死信队列设置成功")
+        return declared
+    except Exception as e:
+        logger.error(f"设置死信队列失败: {str(e)}")
+        return False
@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from common.logger import get_logger
+from common.config import get_error_handling_config
+from message_broker.core.priority import get_bulk_priority
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float, capacity: int = None):
+        """初始化限速器
+
+        Args:
+            rate: 每秒补充的令牌数，0表示不限速
+            capacity: 桶容量，即允许的突发数量，默认等于每秒速率
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1):
+        """获取令牌，令牌不足时等待
+
+        Args:
+            tokens: 需要的令牌数
+        """
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class DeadLetterReplayer:
+    """死信批量重放工具
+
+    按批从死信队列拉取消息，按原始路由键、错误类型和时间范围过滤，经
+    令牌桶限速后在开启发布确认的通道上重新发布到原始交换机，确认成功后
+    才确认死信。未命中过滤条件的消息在本轮结束后统一放回队列，不会在
+    同一轮中被重复拉取。
+    """
+
+    def __init__(self, connection=None, queue_name: str = None, batch_size: int = None,
+                 rate_limit: float = None, priority: int = None):
+        """初始化重放工具
+
+        Args:
+            connection: RabbitMQConnection 实例，默认新建
+            queue_name: 死信队列名称
+            batch_size: 每批拉取的消息数
+            rate_limit: 每秒最多重新发布的消息数，0表示不限速
+            priority: 重新发布的消息优先级，默认使用 message.bulk_priority，
+                使批量重放排在新提交的加急合同之后
+        """
+        dead_letter_config = get_error_handling_config().get("dead_letter", {})
+        replay_config = dead_letter_config.get("replay", {})
+        if connection is None:
+            from message_broker.core.connection import RabbitMQConnection
+            connection = RabbitMQConnection()
+        self.connection = connection
+        self.queue_name = queue_name or dead_letter_config.get("queue", "dead_letter_queue")
+        self.batch_size = batch_size or replay_config.get("batch_size", 100)
+        self.rate_limit = rate_limit if rate_limit is not None else replay_config.get("rate_limit", 50)
+        self.progress_interval = replay_config.get("progress_interval", 5)
+        self.priority = get_bulk_priority() if priority is None else priority
+
+    @staticmethod
+    def _parse(body: bytes, properties) -> Optional[Dict[str, Any]]:
+        """解析死信，得到原始路由、错误类型、死信时间和要重新发布的内容
+
+        兼容 DeadLetterHandler 发布的包装消息（original_exchange、
+        original_routing_key、body）和由 RabbitMQ 死信机制转入的原始消息
+        （x-death 头）。
+
+        Args:
+            body: 消息体
+            properties: 消息属性
+
+        Returns:
+            解析结果，无法确定原始路由时返回None
+        """
+        headers = dict(getattr(properties, "headers", None) or {})
+        try:
+            message = json.loads(body)
+        except (ValueError, TypeError):
+            message = None
+
+        if isinstance(message, dict) and message.get("original_routing_key"):
+            payload = message.get("body", {})
+            error = message.get("error")
+            return {
+                "exchange": message.get("original_exchange", ""),
+                "routing_key": message["original_routing_key"],
+                "error_type": message.get("error_type")
+                or (error.get("type") if isinstance(error, dict) else None),
+                "timestamp": message.get("timestamp"),
+                "body": json.dumps(payload, ensure_ascii=False) if not isinstance(payload, str) else payload,
+                "headers": {}
+            }
+
+        deaths = headers.get("x-death") or []
+        if not deaths:
+            return None
+        death = deaths[0]
+        routing_keys = death.get("routing-keys") or []
+        death_time = death.get("time")
+        headers.pop("x-death", None)
+        return {
+            "exchange": death.get("exchange", ""),
+            "routing_key": routing_keys[0] if routing_keys else "",
+            "error_type": headers.get("x-error-type") or death.get("reason"),
+            "timestamp": death_time.timestamp() if isinstance(death_time, datetime) else death_time,
+            "body": body,
+            "headers": headers
+        }
+
+    @staticmethod
+    def _to_timestamp(value: Any) -> Optional[float]:
+        """将时间值统一转换为时间戳
+
+        Args:
+            value: 时间戳、datetime 或 "%Y-%m-%d %H:%M:%S" 字符串
+
+        Returns:
+            时间戳，无法解析时返回None
+        """
+        if value is None:
+            return None
+        if isinstance(value, datetime):
+            return value.timestamp()
+        if isinstance(value, (int, float)):
+            return float(value)
+        try:
+            return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            return None
+
+    def _matches(self, dead_letter: Dict[str, Any], routing_key: str, error_type: str,
+                 since: float, until: float) -> bool:
+        """判断死信是否满足过滤条件
+
+        Args:
+            dead_letter: 解析后的死信
+            routing_key: 原始路由键
+            error_type: 错误类型
+            since: 起始时间戳
+            until: 截止时间戳
+
+        Returns:
+            是否满足
+        """
+        if routing_key and dead_letter["routing_key"] != routing_key:
+            return False
+        if error_type and dead_letter["error_type"] != error_type:
+            return False
+        if since is not None or until is not None:
+            timestamp = self._to_timestamp(dead_letter["timestamp"])
+            if timestamp is None:
+                return False
+            if since is not None and timestamp < since:
+                return False
+            if until is not None and timestamp > until:
+                return False
+        return True
+
+    def replay(self, routing_key: str = None, error_type: str = None, since: Any = None,
+               until: Any = None, max_messages: int = None, dry_run: bool = False,
+               progress_callback: Callable[[Dict[str, Any]], Any] = None) -> Dict[str, Any]:
+        """重放死信
+
+        Args:
+            routing_key: 只重放原始路由键相同的消息
+            error_type: 只重放错误类型相同的消息
+            since: 只重放此时间之后进入死信的消息
+            until: 只重放此时间之前进入死信的消息
+            max_messages: 最多重放的消息数
+            dry_run: 只统计命中过滤条件的消息，不重新发布
+            progress_callback: 每批处理后接收进度统计的函数
+
+        Returns:
+            重放统计，包含扫描数、命中数、重放数、跳过数、失败数、耗时和吞吐量
+        """
+        import pika
+        from pika.exceptions import NackError, UnroutableError
+
+        if not self.connection.channel and not self.connection.connect():
+            return {"error": True, "message": "无法连接RabbitMQ"}
+
+        channel = self.connection.channel
+        if not dry_run:
+            channel.confirm_delivery()
+
+        since, until = self._to_timestamp(since), self._to_timestamp(until)
+        bucket = TokenBucket(self.rate_limit)
+        held: List[int] = []  # 本轮不重放、结束后放回队列的投递标签
+        stats = {"scanned": 0, "matched": 0, "replayed": 0, "skipped": 0, "failed": 0,
+                 "elapsed_seconds": 0.0, "throughput": 0.0}
+        started = time.monotonic()
+        last_report = started
+
+        try:
+            exhausted = False
+            while not exhausted:
+                if max_messages is not None and stats["matched"] >= max_messages:
+                    break
+
+                for _ in range(self.batch_size):
+                    method, properties, body = channel.basic_get(self.queue_name, auto_ack=False)
+                    if method is None:
+                        exhausted = True
+                        break
+                    stats["scanned"] += 1
+
+                    dead_letter = self._parse(body, properties)
+                    matched = (dead_letter is not None
+                               and self._matches(dead_letter, routing_key, error_type, since, until)
+                               and (max_messages is None or stats["matched"] < max_messages))
+                    if not matched or dry_run:
+                        stats["matched" if matched else "skipped"] += 1
+                        held.append(method.delivery_tag)
+                        continue
+                    stats["matched"] += 1
+
+                    bucket.acquire()
+                    try:
+                        channel.basic_publish(
+                            exchange=dead_letter["exchange"],
+                            routing_key=dead_letter["routing_key"],
+                            body=dead_letter["body"],
+                            properties=pika.BasicProperties(
+                                delivery_mode=2,
+                                content_type=getattr(properties, "content_type", None) or "application/json",
+                                priority=self.priority,
+                                headers={**dead_letter["headers"], "x-replayed-at": int(time.time())}
+                            ),
+                            mandatory=True
+                        )
+                        channel.basic_ack(method.delivery_tag)
+                        stats["replayed"] += 1
+                    except (NackError, UnroutableError) as e:
+                        logger.error(f"死信重新发布未被确认，保留在死信队列: {str(e)}")
+                        stats["failed"] += 1
+                        held.append(method.delivery_tag)
+
+                now = time.monotonic()
+                stats["elapsed_seconds"] = now - started
+                stats["throughput"] = stats["replayed"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+                if progress_callback:
+                    progress_callback(dict(stats))
+                if now - last_report >= self.progress_interval or exhausted:
+                    last_report = now
+                    logger.info(
+                        f"死信重放进度: 扫描{stats['scanned']}条，命中{stats['matched']}条，重放{stats['replayed']}条，"
+                        f"跳过{stats['skipped']}条，失败{stats['failed']}条，"
+                        f"{stats['throughput']:.1f}条/秒"
+                    )
+        finally:
+            # 放回本轮未重放的消息
+            for delivery_tag in held:
+                try:
+                    channel.basic_nack(delivery_tag, requeue=True)
+                except Exception as e:
+                    logger.error(f"放回死信失败: {str(e)}")
+
+        stats["elapsed_seconds"] = time.monotonic() - started
+        stats["throughput"] = stats["replayed"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] else 0.0
+        logger.info(f"死信重放完成: {stats}")
+        return stats
@@ -0,0 +1,125 @@
+import re
+import threading
+from typing import Any, Dict, Optional
+from common.logger import get_logger
+from common.config import Config, get_error_handling_config
+
+logger = get_logger(__name__)
+
+_CAMEL_BOUNDARY_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def to_snake_case(name: str) -> str:
+    """将异常类名转换为配置中的蛇形键，例如 ConnectionError -> connection_error
+
+    Args:
+        name: 类名
+
+    Returns:
+        蛇形命名
+    """
+    return _CAMEL_BOUNDARY_PATTERN.sub("_", name).lower()
+
+
+class ErrorPolicyTable:
+    """错误类型策略表
+
+    error_handling.error_types 只在配置版本变化时编译一次，异常按类的 MRO
+    逐级匹配（ConnectionRefusedError 会命中 connection_error），匹配结果按
+    异常类型缓存，之后每次查询只是一次字典访问。策略的 exceptions 字段可
+    列出额外的异常类名，用于不继承标准异常的第三方异常。
+    """
+
+    def __init__(self, error_types: Dict[str, Dict[str, Any]] = None):
+        """初始化策略表
+
+        Args:
+            error_types: 错误类型到处理策略的映射，默认读取错误处理配置，
+                并在配置重新加载后自动重建
+        """
+        self._static_error_types = error_types
+        self._lock = threading.Lock()
+        self._version = None
+        self._rules: Dict[str, Dict[str, Any]] = {}
+        self._memo: Dict[type, Dict[str, Any]] = {}
+        self._compile()
+
+    def _compile(self):
+        """编译策略表，以类名和蛇形键两种形式索引"""
+        error_types = self._static_error_types
+        if error_types is None:
+            error_types = get_error_handling_config().get("error_types", {}) or {}
+
+        rules = {}
+        for key, rule in error_types.items():
+            rule = dict(rule or {}, error_type=key)
+            rules[key] = rule
+            for class_name in rule.get("exceptions", []):
+                rules[class_name] = rule
+
+        with self._lock:
+            self._rules = rules
+            self._memo = {}
+            self._version = Config.version
+        logger.info(f"错误类型策略表已编译，共{len(error_types)}种错误类型")
+
+    def lookup(self, error: Any) -> Dict[str, Any]:
+        """查找异常对应的处理策略
+
+        Args:
+            error: 异常对象或异常类
+
+        Returns:
+            处理策略，没有匹配项时返回空字典
+        """
+        if self._static_error_types is None and self._version != Config.version:
+            self._compile()
+
+        error_class = error if isinstance(error, type) else type(error)
+        rule = self._memo.get(error_class)
+        if rule is None:
+            rule = self._resolve(error_class)
+            self._memo[error_class] = rule
+        return rule
+
+    def _resolve(self, error_class: type) -> Dict[str, Any]:
+        """按 MRO 查找第一个有策略的类
+
+        Args:
+            error_class: 异常类
+
+        Returns:
+            处理策略，没有匹配项时返回空字典
+        """
+        for cls in error_class.__mro__:
+            rule = self._rules.get(cls.__name__) or self._rules.get(to_snake_case(cls.__name__))
+            if rule is not None:
+                return rule
+        return {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取策略表统计
+
+        Returns:
+            统计信息
+        """
+        return {
+            "config_version": self._version,
+            "rules": len(self._rules),
+            "memoized_types": len(self._memo)
+        }
+
+
+_policy_table: Optional[ErrorPolicyTable] = None
+
+
+def get_error_policy_table() -> ErrorPolicyTable:
+    """获取进程内共享的错误类型策略表
+
+    Returns:
+        策略表
+    """
+    global _policy_table
+    if _policy_table is None:
+        _policy_table = ErrorPolicyTable()
+    return _policy_table
@@ -1,21 +1,177 @@
-from typing import Dict, Any, Optional
-from datetime import datetime
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional
 from common.logger import get_logger
-from common.config import get_config
-from common.utils import format_timestamp
+from common.config import get_config, get_error_handling_config, get_pipeline_config
+from common.utils import format_timestamp, generate_uuid
+from data_storage.intervention.intervention_store import InterventionStore, get_intervention_store
+from message_broker.core.consumer_registry import ConsumerRegistry, get_consumer_registry
+from message_broker.core.queue_manager import QueueManager
 
 logger = get_logger(__name__)
 config = get_config()
 
+_instance = None
+_instance_lock = threading.Lock()
+
+
+class ErrorRateWindow:
+    """固定内存的滑动窗口错误统计
+
+    窗口划分为若干时间桶，每个桶记录成功和失败次数并维护窗口合计，
+    每次记录或查询只清理已过期的桶，均摊 O(1)，内存与运行时长无关。
+    最近的错误只保留固定条数用于干预记录。
+    """
+    
+    def __init__(self, window_seconds: float = 300, buckets: int = 60, recent_errors: int = 10):
+        """初始化统计窗口
+        
+        Args:
+            window_seconds: 窗口长度（秒）
+            buckets: 时间桶数量
+            recent_errors: 保留的最近错误条数
+        """
+        self.window_seconds = window_seconds
+        self.buckets = max(1, buckets)
+        self.bucket_seconds = window_seconds / self.buckets
+        self._successes = [0] * self.buckets
+        self._failures = [0] * self.buckets
+        self._total_successes = 0
+        self._total_failures = 0
+        self._current_epoch = None
+        self._recent_errors = deque(maxlen=recent_errors)
+        self._last_error_time = None
+        self._lock = threading.Lock()
+    
+    def _advance(self, now: float) -> int:
+        """清空自上次记录以来过期的时间桶，调用方需持有锁
+        
+        Args:
+            now: 当前时间
+            
+        Returns:
+            当前时间桶下标
+        """
+        epoch = int(now // self.bucket_seconds)
+        if self._current_epoch is None:
+            self._current_epoch = epoch
+        elif epoch > self._current_epoch:
+            for expired in range(self._current_epoch + 1, min(epoch, self._current_epoch + self.buckets) + 1):
+                index = expired % self.buckets
+                self._total_successes -= self._successes[index]
+                self._total_failures -= self._failures[index]
+                self._successes[index] = 0
+                self._failures[index] = 0
+            self._current_epoch = epoch
+        return self._current_epoch % self.buckets
+    
+    def record_success(self):
+        """记录一次成功请求"""
+        with self._lock:
+            index = self._advance(time.time())
+            self._successes[index] += 1
+            self._total_successes += 1
+    
+    def record_failure(self, error: Exception):
+        """记录一次失败请求
+        
+        Args:
+            error: 错误对象
+        """
+        now = time.time()
+        with self._lock:
+            index = self._advance(now)
+            self._failures[index] += 1
+            self._total_failures += 1
+            self._last_error_time = now
+            self._recent_errors.append({
+                "time": format_timestamp(now),
+                "error": str(error)
+            })
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """获取窗口内的统计
+        
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            self._advance(time.time())
+            total = self._total_successes + self._total_failures
+            return {
+                "window_seconds": self.window_seconds,
+                "error_count": self._total_failures,
+                "success_count": self._total_successes,
+                "total_requests": total,
+                "error_rate": self._total_failures / total if total else 0.0,
+                "last_error_time": format_timestamp(self._last_error_time) if self._last_error_time else None,
+                "errors": list(self._recent_errors)
+            }
+
 class HumanInterventionHandler:
     """人工干预处理器，处理需要人工介入的情况"""
     
-    def __init__(self):
-        """初始化人工干预处理器"""
-        self.intervention_config = config.get("error_handling.human_intervention", {})
-        self.error_threshold = self.intervention_config.get("threshold.error_count", 3)
-        self.error_rate_threshold = self.intervention_config.get("threshold.error_rate", 0.1)
-        self.error_stats = {}
+    def __init__(self, store: InterventionStore = None,
+                 backlog_handler: Callable[[str, Dict[str, Any]], bool] = None,
+                 consumer_registry: ConsumerRegistry = None):
+        """初始化人工干预处理器
+        
+        Args:
+            store: 干预记录存储，默认使用进程内共享的存储
+            backlog_handler: 干预解决后接收代理ID和单条积压任务的函数，返回是否已
+                成功转交，默认按代理的路由重新发布到消息队列
+            consumer_registry: 消费者注册表，用于暂停和恢复代理的消息消费
+        """
+        self.store = store or get_intervention_store()
+        self.consumer_registry = consumer_registry or get_consumer_registry()
+        self.backlog_handler = backlog_handler or self._republish_task
+        error_handling_config = get_error_handling_config()
+        self.intervention_config = error_handling_config.get("human_intervention", {})
+        threshold = self.intervention_config.get("threshold", {})
+        self.error_threshold = threshold.get("error_count", 3)
+        self.error_rate_threshold = threshold.get("error_rate", 0.1)
+        self.min_requests = threshold.get("min_requests", 10)
+        self.window_seconds = error_handling_config.get("monitoring", {}).get("error_rate_window", 300)
+        self.error_stats: Dict[str, ErrorRateWindow] = {}
+        self._stats_lock = threading.Lock()
+    
+    def _get_window(self, agent_id: str) -> ErrorRateWindow:
+        """获取代理的统计窗口
+        
+        代理按类型统计（BaseAgent 传入 agent_type），窗口数量不随代理池
+        扩缩容的实例数增长，且与消费者注册表中暂停使用的代理ID一致。
+        
+        Args:
+            agent_id: 代理ID，通常为代理类型
+            
+        Returns:
+            统计窗口
+        """
+        window = self.error_stats.get(agent_id)
+        if window is None:
+            with self._stats_lock:
+                window = self.error_stats.setdefault(agent_id, ErrorRateWindow(self.window_seconds))
+        return window
+    
+    def record_success(self, agent_id: str):
+        """记录代理的一次成功处理，用于计算真实错误率
+        
+        Args:
+            agent_id: 代理ID
+        """
+        self._get_window(agent_id).record_success()
+    
+    def get_error_stats(self, agent_id: str) -> Dict[str, Any]:
+        """获取代理在统计窗口内的错误统计
+        
+        Args:
+            agent_id: 代理ID
+            
+        Returns:
+            统计信息
+        """
+        return self._get_window(agent_id).snapshot()
     
     def check_intervention_needed(self, agent_id: str, error: Exception) -> bool:
         """检查是否需要人工干预
@@ -28,31 +184,18 @@ class HumanInterventionHandler:
             是否需要人工干预
         """
         # 更新错误统计
-        if agent_id not in self.error_stats:
-            self.error_stats[agent_id] = {
-                "error_count": 0,
-                "total_requests": 0,
-                "last_error_time": None,
-                "errors": []
-            }
-        
-        stats = self.error_stats[agent_id]
-        stats["error_count"] += 1
-        stats["total_requests"] += 1
-        stats["last_error_time"] = datetime.now()
-        stats["errors"].append({
-            "time": datetime.now(),
-            "error": str(error)
-        })
+        window = self._get_window(agent_id)
+        window.record_failure(error)
+        stats = window.snapshot()
         
-        # 检查错误次数
+        # 检查窗口内错误次数
         if stats["error_count"] >= self.error_threshold:
             logger.warning(f"代理{agent_id}错误次数超过阈值{self.error_threshold}，需要人工干预")
             return True
         
-        # 检查错误率
-        error_rate = stats["error_count"] / stats["total_requests"]
-        if error_rate >= self.error_rate_threshold:
+        # 检查窗口内错误率，请求数过少时不计算
+        error_rate = stats["error_rate"]
+        if stats["total_requests"] >= self.min_requests and error_rate >= self.error_rate_threshold:
             logger.warning(f"代理{agent_id}错误率{error_rate}超过阈值{self.error_rate_threshold}，需要人工干预")
             return True
         
@@ -69,14 +212,15 @@ class HumanInterventionHandler:
             处理结果
         """
         try:
-            # 生成干预记录
+            # 生成并保存干预记录
             intervention_record = self._create_intervention_record(agent_id, error)
+            self.store.save(intervention_record)
             
             # 发送通知
             self._send_notifications(intervention_record)
             
             # 暂停代理
-            self._pause_agent(agent_id)
+            self._pause_agent(agent_id, intervention_record["intervention_id"])
             
             logger.info(f"已为代理{agent_id}创建人工干预记录")
             return intervention_record
@@ -97,15 +241,15 @@ class HumanInterventionHandler:
         Returns:
             干预记录
         """
-        stats = self.error_stats.get(agent_id, {})
+        stats = self.get_error_stats(agent_id)
         return {
             "intervention_id": generate_uuid(),
             "agent_id": agent_id,
             "timestamp": format_timestamp(),
-            "error_count": stats.get("error_count", 0),
-            "error_rate": stats.get("error_count", 0) / stats.get("total_requests", 1),
+            "error_count": stats["error_count"],
+            "error_rate": stats["error_rate"],
             "last_error": str(error),
-            "error_history": stats.get("errors", []),
+            "error_history": stats["errors"],
             "status": "pending",
             "resolution": None,
             "resolved_by": None,
@@ -118,10 +262,11 @@ class HumanInterventionHandler:
         Args:
             intervention_record: 干预记录
         """
-        if self.intervention_config.get("notification.email", True):
+        notification = self.intervention_config.get("notification", {})
+        if notification.get("email", True):
             self._send_email_notification(intervention_record)
         
-        if self.intervention_config.get("notification.slack", False):
+        if notification.get("slack", False):
             self._send_slack_notification(intervention_record)
     
     def _send_email_notification(self, intervention_record: Dict[str, Any]):
@@ -142,28 +287,122 @@ class HumanInterventionHandler:
         # TODO: 实现Slack通知
         logger.info(f"发送人工干预Slack通知: {intervention_record}")
     
-    def _pause_agent(self, agent_id: str):
-        """暂停代理
+    def _pause_agent(self, agent_id: str, intervention_id: str):
+        """暂停代理，停止其消息消费，暂停期间分配给代理的任务进入积压
         
         Args:
             agent_id: 代理ID
+            intervention_id: 干预ID
         """
-        # TODO: 实现代理暂停逻辑
+        self.store.pause_agent(agent_id, intervention_id)
+        self.consumer_registry.pause(agent_id)
         logger.info(f"暂停代理{agent_id}")
     
-    def resolve_intervention(self, intervention_id: str, resolution: Dict[str, Any]) -> bool:
-        """解决干预
+    def pause_agent(self, agent_id: str, reason: str = "manual") -> bool:
+        """不经过干预记录直接暂停代理，供管理接口使用
+        
+        Args:
+            agent_id: 代理ID
+            reason: 暂停原因，记录在暂停信息中
+            
+        Returns:
+            是否成功暂停
+        """
+        try:
+            self._pause_agent(agent_id, None)
+            logger.info(f"代理{agent_id}暂停原因: {reason}")
+            return True
+        except Exception as e:
+            logger.error(f"暂停代理{agent_id}失败: {str(e)}")
+            return False
+    
+    def _republish_task(self, agent_id: str, task: Dict[str, Any]) -> bool:
+        """按代理配置的路由把积压任务重新发布到消息队列
+        
+        代理ID为代理名称或“代理名称-编号”，路由取管道配置 agents.<name>.routing，
+        消息优先级沿用任务 metadata.priority。
+        
+        Args:
+            agent_id: 代理ID
+            task: 任务数据
+            
+        Returns:
+            是否成功发布
+        """
+        pipeline_config = get_pipeline_config()
+        agents = pipeline_config.get("agents", {})
+        agent_name = agent_id if agent_id in agents else agent_id.rsplit("-", 1)[0]
+        route = pipeline_config.get("routing", {}).get(agents.get(agent_name, {}).get("routing"))
+        if not route:
+            logger.error(f"代理{agent_id}没有配置路由，无法重新发布积压任务")
+            return False
+        return QueueManager().publish_message(route["exchange"], route["key"], task)
+    
+    def resume_agent(self, agent_id: str, prefetch_count: int = None) -> List[Dict[str, Any]]:
+        """逐条转交积压任务，全部转交成功后恢复代理的消息消费
+        
+        积压任务在转交成功后才从存储中删除；有任务转交失败时剩余任务保留，
+        代理保持暂停，可以再次调用本方法重试。
+        
+        Args:
+            agent_id: 代理ID
+            prefetch_count: 恢复后使用的未确认消息上限，默认沿用配置
+            
+        Returns:
+            成功释放的积压任务列表
+        """
+        backlog = self.store.release_agent(agent_id, lambda task: self.backlog_handler(agent_id, task))
+        if self.store.is_paused(agent_id):
+            logger.error(f"代理{agent_id}的积压任务未能全部释放（已释放{len(backlog)}个），保持暂停")
+            return backlog
+        self.consumer_registry.resume(agent_id, prefetch_count)
+        logger.info(f"代理{agent_id}已恢复，释放{len(backlog)}个积压任务")
+        return backlog
+    
+    def is_agent_paused(self, agent_id: str) -> bool:
+        """判断代理是否因人工干预暂停
+        
+        Args:
+            agent_id: 代理ID
+            
+        Returns:
+            是否暂停
+        """
+        return self.store.is_paused(agent_id) or self.consumer_registry.is_paused(agent_id)
+    
+    def defer_task(self, agent_id: str, task: Dict[str, Any]) -> bool:
+        """暂存分配给已暂停代理的任务，干预解决后批量释放
+        
+        Args:
+            agent_id: 代理ID
+            task: 任务数据
+            
+        Returns:
+            是否成功暂存，代理已恢复时返回False，调用方应直接处理任务
+        """
+        return self.store.enqueue_backlog(agent_id, task)
+    
+    def resolve_intervention(self, intervention_id: str, resolution: Dict[str, Any],
+                             resolved_by: str = None) -> bool:
+        """解决干预，代理没有其他待处理干预时恢复代理并批量释放积压任务
         
         Args:
             intervention_id: 干预ID
             resolution: 解决方案
+            resolved_by: 处理人
             
         Returns:
             是否成功解决
         """
         try:
-            # TODO: 实现干预解决逻辑
+            agent_id = self.store.resolve(intervention_id, resolution, resolved_by)
+            if agent_id is None:
+                logger.warning(f"干预{intervention_id}不存在或已解决")
+                return False
             logger.info(f"解决干预{intervention_id}: {resolution}")
+            
+            if self.store.count_pending(agent_id) == 0:
+                self.resume_agent(agent_id)
             return True
         except Exception as e:
             logger.error(f"解决干预失败: {str(e)}")
@@ -178,8 +417,40 @@ class HumanInterventionHandler:
         Returns:
             干预状态
         """
-        # TODO: 实现获取干预状态逻辑
-        return {
-            "intervention_id": intervention_id,
-            "status": "pending"
-        }
\ No newline at end of file
+        record = self.store.get(intervention_id)
+        if record is None:
+            return {
+                "intervention_id": intervention_id,
+                "status": "not_found"
+            }
+        return record
+    
+    def list_interventions(self, status: str = "pending", agent_id: str = None,
+                           page: int = 1, page_size: int = 50) -> Dict[str, Any]:
+        """分页查询干预记录
+        
+        Args:
+            status: 按状态过滤，为None时不过滤
+            agent_id: 按代理ID过滤
+            page: 页码，从1开始
+            page_size: 每页条数
+            
+        Returns:
+            分页结果
+        """
+        return self.store.list(status=status, agent_id=agent_id, page=page, page_size=page_size)
+
+
+def get_intervention_handler() -> HumanInterventionHandler:
+    """获取进程内共享的人工干预处理器
+
+    错误率窗口保存在处理器实例中，记录成功和失败的各处需要使用同一个实例。
+
+    Returns:
+        人工干预处理器
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = HumanInterventionHandler()
+        return _instance
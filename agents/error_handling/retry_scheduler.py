@@ -0,0 +1,208 @@
+import json
+import heapq
+import random
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from agents.error_handling.retry_strategy import RetryStrategy
+from common.logger import get_logger
+from common.config import get_error_handling_config
+from message_broker.core.priority import resolve_priority
+
+logger = get_logger(__name__)
+
+
+class RetryScheduler:
+    """非阻塞重试调度器
+
+    失败任务不再在工作线程中 sleep 或递归重试，而是按指数退避加抖动计算
+    延迟后登记到定时器（或通过 RabbitMQ 的按次数延迟队列重新投递），
+    工作线程立即返回去处理其他合同。每份合同有独立的重试预算，并统计
+    因此节省的工作线程等待时间。
+    """
+
+    def __init__(self, retry_strategy: RetryStrategy = None, jitter: float = None,
+                 retry_budget: int = None):
+        """初始化重试调度器
+
+        Args:
+            retry_strategy: 提供退避延迟计算的重试策略
+            jitter: 抖动比例，延迟在 [1 - jitter, 1 + jitter] 倍范围内随机
+            retry_budget: 每份合同的最大重试次数
+        """
+        retry_config = get_error_handling_config().get("retry", {})
+        self.retry_strategy = retry_strategy or RetryStrategy()
+        self.jitter = jitter if jitter is not None else retry_config.get("jitter", 0.2)
+        self.retry_budget = retry_budget or retry_config.get(
+            "budget_per_contract", self.retry_strategy.max_attempts
+        )
+
+        self._attempts: Dict[str, int] = {}
+        self._timers = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._timer_thread: Optional[threading.Thread] = None
+        self._stats = {
+            "scheduled": 0,
+            "requeued": 0,
+            "exhausted": 0,
+            "worker_seconds_saved": 0.0
+        }
+
+    def get_delay(self, attempt: int) -> float:
+        """计算带抖动的重试延迟
+
+        Args:
+            attempt: 第几次重试，从1开始
+
+        Returns:
+            延迟秒数
+        """
+        delay = self.retry_strategy.get_retry_delay(attempt)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(0.0, delay)
+
+    def _next_attempt(self, task_key: str) -> Optional[int]:
+        """消耗一次重试预算
+
+        Args:
+            task_key: 任务标识，通常为合同ID
+
+        Returns:
+            本次重试的序号，预算耗尽时返回None
+        """
+        with self._condition:
+            attempt = self._attempts.get(task_key, 0) + 1
+            if attempt > self.retry_budget:
+                self._attempts.pop(task_key, None)
+                self._stats["exhausted"] += 1
+                logger.warning(f"任务{task_key}已用完{self.retry_budget}次重试预算")
+                return None
+            self._attempts[task_key] = attempt
+            return attempt
+
+    def schedule(self, task_key: str, callback: Callable[[], Any]) -> bool:
+        """在退避延迟后执行重试回调
+
+        Args:
+            task_key: 任务标识，通常为合同ID
+            callback: 重试时调用的函数，应当只负责重新提交任务
+
+        Returns:
+            是否已安排重试，预算耗尽时返回False
+        """
+        attempt = self._next_attempt(task_key)
+        if attempt is None:
+            return False
+
+        delay = self.get_delay(attempt)
+        with self._condition:
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._sequence), callback))
+            self._stats["scheduled"] += 1
+            self._stats["worker_seconds_saved"] += delay
+            self._ensure_timer_thread()
+            self._condition.notify()
+
+        logger.info(f"任务{task_key}第{attempt}次重试已安排在{delay:.2f}秒后执行")
+        return True
+
+    def requeue_via_broker(self, connection, task_key: str, exchange_name: str, routing_key: str,
+                           message: Dict[str, Any], queue_name: str = None) -> bool:
+        """通过 RabbitMQ 延迟队列重新投递失败消息
+
+        每个重试次数对应一个延迟队列，消息在其中按 expiration 过期后经死信
+        交换机回到原交换机和路由键，不占用任何消费者线程。
+
+        Args:
+            connection: RabbitMQConnection 或共享会话的 QueueManager 实例
+            task_key: 任务标识，通常为合同ID
+            exchange_name: 原交换机
+            routing_key: 原路由键
+            message: 消息内容
+            queue_name: 原队列名称，用于命名延迟队列，默认使用路由键
+
+        Returns:
+            是否已重新投递，预算耗尽或投递失败时返回False
+        """
+        import pika
+
+        attempt = self._next_attempt(task_key)
+        if attempt is None:
+            return False
+
+        delay = self.get_delay(attempt)
+        delay_queue = f"{queue_name or routing_key}.retry.{attempt}"
+        if not connection.declare_queue(delay_queue, durable=True, arguments={
+            "x-dead-letter-exchange": exchange_name,
+            "x-dead-letter-routing-key": routing_key
+        }):
+            return False
+
+        properties = pika.BasicProperties(
+            delivery_mode=2,
+            content_type="application/json",
+            expiration=str(int(delay * 1000)),
+            # 保持原优先级，延迟结束回到原队列后仍按上传时选择的优先级排队
+            priority=resolve_priority(message.get("metadata", {}).get("priority")),
+            headers={"x-retry-attempt": attempt, "x-task-key": task_key}
+        )
+        # 通过默认交换机直接投递到延迟队列
+        if not connection.publish_message("", delay_queue, json.dumps(message, ensure_ascii=False),
+                                          properties):
+            return False
+
+        with self._condition:
+            self._stats["requeued"] += 1
+            self._stats["worker_seconds_saved"] += delay
+        logger.info(f"任务{task_key}第{attempt}次重试已投递到延迟队列{delay_queue}，{delay:.2f}秒后回到{routing_key}")
+        return True
+
+    def complete(self, task_key: str):
+        """任务成功或最终失败后清除其重试计数
+
+        Args:
+            task_key: 任务标识
+        """
+        with self._condition:
+            self._attempts.pop(task_key, None)
+
+    def _ensure_timer_thread(self):
+        """按需启动定时器线程，调用方需持有锁"""
+        if self._timer_thread is None or not self._timer_thread.is_alive():
+            self._timer_thread = threading.Thread(target=self._run_timers, name="retry-scheduler",
+                                                  daemon=True)
+            self._timer_thread.start()
+
+    def _run_timers(self):
+        """定时器线程：等待最早到期的重试并执行其回调"""
+        while True:
+            with self._condition:
+                while not self._timers:
+                    self._condition.wait()
+                due_at, _, callback = self._timers[0]
+                remaining = due_at - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                heapq.heappop(self._timers)
+
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"执行重试回调失败: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取重试调度统计
+
+        Returns:
+            统计信息，worker_seconds_saved 为原本会阻塞在 sleep 上的工作线程秒数
+        """
+        with self._condition:
+            return {
+                **self._stats,
+                "pending": len(self._timers),
+                "tracked_tasks": len(self._attempts),
+                "retry_budget": self.retry_budget
+            }
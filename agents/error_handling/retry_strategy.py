@@ -1,7 +1,11 @@
+import asyncio
+import inspect
 from typing import Dict, Any, Optional
 from time import sleep
+from agents.error_handling.circuit_breaker import CircuitOpenError
 from common.logger import get_logger
-from common.config import get_config
+from common.config import get_config, get_error_handling_config
+from agents.error_handling.error_policy import get_error_policy_table
 
 logger = get_logger(__name__)
 config = get_config()
@@ -11,11 +15,12 @@ class RetryStrategy:
     
     def __init__(self):
         """初始化重试策略处理器"""
-        self.retry_config = config.get("error_handling.retry", {})
+        self.retry_config = get_error_handling_config().get("retry", {})
         self.max_attempts = self.retry_config.get("max_attempts", 3)
         self.initial_delay = self.retry_config.get("initial_delay", 1)
         self.max_delay = self.retry_config.get("max_delay", 30)
         self.backoff_factor = self.retry_config.get("backoff_factor", 2)
+        self.policy_table = get_error_policy_table()
     
     def should_retry(self, error: Exception, attempt: int) -> bool:
         """判断是否应该重试
@@ -32,9 +37,14 @@ class RetryStrategy:
             logger.warning(f"已达到最大重试次数{self.max_attempts}，停止重试")
             return False
         
-        # 获取错误类型配置
-        error_type = type(error).__name__
-        error_config = config.get(f"error_handling.error_types.{error_type}", {})
+        # 依赖已熔断，重试只会继续失败
+        if isinstance(error, CircuitOpenError):
+            logger.warning(f"{str(error)}，停止重试")
+            return False
+        
+        # 获取错误类型配置，按异常类的 MRO 匹配
+        error_config = self.policy_table.lookup(error)
+        error_type = error_config.get("error_type", type(error).__name__)
         
         # 检查错误类型是否允许重试
         if not error_config.get("retry", True):
@@ -107,6 +117,73 @@ class RetryStrategy:
         logger.error(f"在{attempt}次尝试后仍然失败: {str(last_error)}")
         raise last_error
     
+    async def execute_with_retry_async(self, func, *args, deadline: float = None, **kwargs) -> Any:
+        """使用重试策略执行协程函数
+        
+        与 execute_with_retry 的退避和错误类型策略相同，但使用 asyncio.sleep
+        等待，不占用线程。任务被取消时 CancelledError 直接向上传播，不会
+        被当作失败重试。
+        
+        Args:
+            func: 要执行的协程函数，也可以是返回可等待对象的普通函数
+            *args: 位置参数
+            deadline: 整个调用（含全部重试和等待）的时限秒数，为None时不限制
+            **kwargs: 关键字参数
+            
+        Returns:
+            函数执行结果
+        
+        Raises:
+            asyncio.TimeoutError: 超过时限
+        """
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline is not None else None
+        attempt = 0
+        last_error = None
+        
+        while attempt < self.max_attempts:
+            try:
+                # 执行函数
+                result = func(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    if deadline_at is None:
+                        result = await result
+                    else:
+                        result = await asyncio.wait_for(result, max(0, deadline_at - loop.time()))
+                
+                # 如果成功，返回结果
+                if attempt > 0:
+                    logger.info(f"在第{attempt + 1}次尝试后成功执行")
+                return result
+            
+            except Exception as e:
+                # 时限到期引发的超时不再重试，函数自身抛出的超时仍按策略处理
+                if (isinstance(e, asyncio.TimeoutError) and deadline_at is not None
+                        and loop.time() >= deadline_at):
+                    logger.error(f"执行超过时限{deadline}秒，停止重试")
+                    raise
+                
+                attempt += 1
+                last_error = e
+                
+                # 检查是否应该重试
+                if not self.should_retry(e, attempt):
+                    break
+                
+                # 计算延迟时间，等待后会超过时限则不再重试
+                delay = self.get_retry_delay(attempt)
+                if deadline_at is not None and loop.time() + delay >= deadline_at:
+                    logger.warning(f"重试等待{delay}秒将超过时限{deadline}秒，停止重试")
+                    break
+                logger.warning(f"执行失败，{delay}秒后进行第{attempt + 1}次重试: {str(e)}")
+                
+                # 等待后重试
+                await asyncio.sleep(delay)
+        
+        # 所有重试都失败
+        logger.error(f"在{attempt}次尝试后仍然失败: {str(last_error)}")
+        raise last_error
+    
     def get_retry_stats(self) -> Dict[str, Any]:
         """获取重试统计信息
         
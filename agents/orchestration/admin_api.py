@@ -0,0 +1,86 @@
+from typing import Any, Dict
+from agents.error_handling.human_intervention import HumanInterventionHandler, get_intervention_handler
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AgentAdminAPI:
+    """代理管理接口
+
+    供运维人员手动暂停、恢复代理的消息消费，查看消费者和人工干预状态，
+    与人工干预流程共享同一份暂停状态和积压任务。
+    """
+
+    def __init__(self, intervention_handler: HumanInterventionHandler = None):
+        """初始化管理接口
+
+        Args:
+            intervention_handler: 人工干预处理器，默认使用进程内共享的处理器
+        """
+        self.intervention_handler = intervention_handler or get_intervention_handler()
+
+    def pause_agent(self, agent_id: str, operator: str = None) -> Dict[str, Any]:
+        """暂停代理
+
+        Args:
+            agent_id: 代理ID
+            operator: 操作人
+
+        Returns:
+            操作结果
+        """
+        logger.info(f"{operator or '管理员'}请求暂停代理{agent_id}")
+        if not self.intervention_handler.pause_agent(agent_id, reason=f"admin:{operator or ''}"):
+            return {"error": True, "message": f"暂停代理{agent_id}失败"}
+        return {"agent_id": agent_id, "paused": True}
+
+    def resume_agent(self, agent_id: str, prefetch_count: int = None, operator: str = None) -> Dict[str, Any]:
+        """恢复代理并释放其积压任务
+
+        Args:
+            agent_id: 代理ID
+            prefetch_count: 恢复后使用的未确认消息上限，默认沿用配置
+            operator: 操作人
+
+        Returns:
+            操作结果
+        """
+        logger.info(f"{operator or '管理员'}请求恢复代理{agent_id}")
+        try:
+            backlog = self.intervention_handler.resume_agent(agent_id, prefetch_count)
+        except Exception as e:
+            logger.error(f"恢复代理{agent_id}失败: {str(e)}")
+            return {"error": True, "message": f"恢复代理{agent_id}失败: {str(e)}"}
+        return {
+            "agent_id": agent_id,
+            "paused": self.intervention_handler.is_agent_paused(agent_id),
+            "released_tasks": len(backlog)
+        }
+
+    def resolve_intervention(self, intervention_id: str, resolution: Dict[str, Any],
+                             operator: str = None) -> Dict[str, Any]:
+        """解决人工干预，代理没有其他待处理干预时自动恢复
+
+        Args:
+            intervention_id: 干预ID
+            resolution: 解决方案
+            operator: 操作人
+
+        Returns:
+            操作结果
+        """
+        if not self.intervention_handler.resolve_intervention(intervention_id, resolution, operator):
+            return {"error": True, "message": f"解决干预{intervention_id}失败"}
+        return self.intervention_handler.get_intervention_status(intervention_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取代理消费者和人工干预状态
+
+        Returns:
+            状态信息
+        """
+        return {
+            "consumers": self.intervention_handler.consumer_registry.get_status(),
+            "interventions": self.intervention_handler.store.get_stats()
+        }
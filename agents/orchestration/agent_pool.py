@@ -0,0 +1,396 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.retry_scheduler import RetryScheduler
+from agents.error_handling.circuit_breaker import get_circuit_breaker_stats
+from agents.orchestration.pipeline_orchestrator import create_agent
+from common.logger import get_logger
+from common.config import get_pipeline_config
+from common.utils import generate_uuid, hash_text
+from data_storage.cache.result_cache import get_result_cache
+from message_broker.core.priority import get_aging_seconds, get_priority_metrics, resolve_priority
+
+logger = get_logger(__name__)
+
+AgentFactory = Callable[[str], BaseAgent]
+
+
+class AgentPool:
+    """单一代理类型的工作池
+
+    BaseAgent 持有可变的 state 和 error_count，同一实例不能同时处理两份
+    合同。工作池维护若干代理实例，每个任务独占租用一个实例。重试次数随
+    任务携带，开始前重置实例状态并写入该任务已失败的次数，重试计数既不会
+    在合同之间泄漏，也能累计到 max_retries。
+
+    等待中的任务按 metadata.priority 排序，实例空闲时先处理优先级最高的
+    任务。任务每等待 aging_seconds 秒有效优先级提升1级，持续到达的加急
+    任务不会让普通任务无限等待。
+    """
+
+    def __init__(self, agent_name: str, factory: AgentFactory, size: int = 1,
+                 min_size: int = 1, max_size: int = None, result_cache=None,
+                 retry_scheduler: RetryScheduler = None, aging_seconds: float = None):
+        """初始化工作池
+
+        Args:
+            agent_name: 代理名称
+            factory: 根据代理ID创建代理实例的函数
+            size: 初始实例数
+            min_size: 自动伸缩的最小实例数
+            max_size: 自动伸缩的最大实例数，默认等于初始实例数
+            result_cache: 结果缓存（ResultCache），默认使用进程内共享的结果缓存
+            retry_scheduler: 重试调度器，可重试的失败会在退避后重新提交，
+                期间工作线程继续处理其他任务
+            aging_seconds: 优先级老化周期（秒），默认读取 message.aging_seconds
+        """
+        self.agent_name = agent_name
+        self.factory = factory
+        self.min_size = max(1, min_size)
+        self.max_size = max(size, max_size or size)
+        self.result_cache = result_cache if result_cache is not None else get_result_cache()
+        self.retry_scheduler = retry_scheduler
+        self.aging_seconds = get_aging_seconds() if aging_seconds is None else aging_seconds
+        self.metrics = get_priority_metrics()
+
+        self._target_size = max(self.min_size, min(size, self.max_size))
+        self._idle: List[BaseAgent] = []
+        self._created = 0
+        self._active = 0
+        self._pending = 0
+        # 等待中的任务堆：(排序键, 序号, 优先级, 入队时间, 输入, Future, 任务标识, 已失败次数)
+        self._waiting: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_size,
+            thread_name_prefix=f"agent-pool-{agent_name}"
+        )
+
+    @property
+    def size(self) -> int:
+        """当前目标实例数"""
+        return self._target_size
+
+    @property
+    def queue_depth(self) -> int:
+        """已提交但尚未开始处理的任务数"""
+        return self._pending
+
+    def submit(self, input_data: Dict[str, Any]) -> Future:
+        """提交任务
+
+        Args:
+            input_data: 代理输入数据
+
+        Returns:
+            任务的 Future，结果为代理处理结果
+        """
+        outer = Future()
+        self._dispatch(input_data, outer, self._task_key(input_data))
+        return outer
+
+    def _task_key(self, input_data: Dict[str, Any]) -> str:
+        """获取任务标识，用于区分各合同的重试预算
+
+        Args:
+            input_data: 代理输入数据
+
+        Returns:
+            任务标识
+        """
+        metadata = input_data.get("metadata", {})
+        contract_id = metadata.get("contract_id") or metadata.get("task_id")
+        if contract_id:
+            return f"{self.agent_name}:{contract_id}"
+        return f"{self.agent_name}:{hash_text(str(sorted(input_data.items(), key=lambda i: i[0])))}"
+
+    def _dispatch(self, input_data: Dict[str, Any], outer: Future, task_key: str, attempt: int = 0):
+        """按优先级把任务放入等待堆，并为其提交一次线程池执行
+
+        排序键为 入队时间 - 优先级 × aging_seconds：有效优先级随等待时间线性
+        增长，而各任务有效优先级的相对顺序不随时间改变，因此用堆即可实现
+        老化，无需重新排序。
+
+        Args:
+            input_data: 代理输入数据
+            outer: 返回给调用方的 Future
+            task_key: 任务标识
+            attempt: 任务此前已失败的次数
+        """
+        priority = resolve_priority(input_data.get("metadata", {}).get("priority"))
+        enqueued = time.monotonic()
+        with self._condition:
+            self._pending += 1
+            heapq.heappush(self._waiting, (enqueued - priority * self.aging_seconds, next(self._sequence),
+                                           priority, enqueued, input_data, outer, task_key, attempt))
+        self._executor.submit(self._run_next)
+
+    def _run_next(self):
+        """租到代理实例后取出当前优先级最高的任务执行，完成后决定返回结果还是安排重试"""
+        try:
+            agent = self._lease()
+        except Exception as e:
+            # 无法创建实例时让一个等待中的任务失败，保持任务数与提交次数一致
+            with self._condition:
+                outer, task_key = heapq.heappop(self._waiting)[5:7]
+            if self.retry_scheduler is not None:
+                self.retry_scheduler.complete(task_key)
+            outer.set_exception(e)
+            return
+        with self._condition:
+            _, _, priority, enqueued, input_data, outer, task_key, attempt = heapq.heappop(self._waiting)
+        started = time.monotonic()
+        try:
+            agent.reset()
+            agent.error_count = attempt
+            result = agent.run(input_data, self.result_cache)
+        except Exception as e:
+            if self.retry_scheduler is not None:
+                self.retry_scheduler.complete(task_key)
+            outer.set_exception(e)
+            return
+        finally:
+            self._release(agent)
+            self.metrics.record(priority, started - enqueued, time.monotonic() - started, self.agent_name)
+
+        retryable = result.get("error") and result.get("error_details", {}).get("retry", False)
+        if retryable and self.retry_scheduler is not None and self.retry_scheduler.schedule(
+            task_key, lambda: self._dispatch(input_data, outer, task_key, attempt + 1)
+        ):
+            return
+
+        if self.retry_scheduler is not None:
+            self.retry_scheduler.complete(task_key)
+        outer.set_result(result)
+
+    def _lease(self) -> BaseAgent:
+        """租用一个空闲实例，实例数未达目标时创建新实例，否则等待
+
+        Returns:
+            代理实例
+        """
+        with self._condition:
+            while not self._idle and self._created >= self._target_size:
+                self._condition.wait()
+            self._pending -= 1
+            self._active += 1
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            return self.factory(f"{self.agent_name}-{generate_uuid()[:8]}")
+        except Exception:
+            with self._condition:
+                self._created -= 1
+                self._active -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, agent: BaseAgent):
+        """归还实例，实例数超过目标时直接丢弃以完成缩容
+
+        Args:
+            agent: 代理实例
+        """
+        with self._condition:
+            self._active -= 1
+            if self._created > self._target_size:
+                self._created -= 1
+            else:
+                self._idle.append(agent)
+            self._condition.notify()
+
+    def resize(self, size: int):
+        """调整目标实例数
+
+        Args:
+            size: 新的目标实例数，限制在 [min_size, max_size] 内
+        """
+        size = max(self.min_size, min(size, self.max_size))
+        with self._condition:
+            if size == self._target_size:
+                return
+            logger.info(f"代理池{self.agent_name}实例数调整: {self._target_size} -> {size}")
+            self._target_size = size
+            # 缩容时立即释放多余的空闲实例，忙碌实例在归还时释放
+            while self._idle and self._created > size:
+                self._idle.pop()
+                self._created -= 1
+            self._condition.notify_all()
+
+    def autoscale(self, queue_depth: int = None, tasks_per_instance: int = 2):
+        """根据队列深度调整实例数
+
+        Args:
+            queue_depth: 待处理任务数，默认使用池内等待的任务数
+            tasks_per_instance: 每个实例期望承担的积压任务数
+        """
+        if queue_depth is None:
+            queue_depth = self.queue_depth
+        demand = self._active + math.ceil(queue_depth / max(1, tasks_per_instance))
+        self.resize(demand)
+
+    def shutdown(self, wait: bool = True):
+        """关闭工作池
+
+        Args:
+            wait: 是否等待进行中的任务完成
+        """
+        self._executor.shutdown(wait=wait)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取工作池状态
+
+        Returns:
+            状态信息
+        """
+        with self._condition:
+            return {
+                "agent_name": self.agent_name,
+                "size": self._target_size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "instances": self._created,
+                "active": self._active,
+                "idle": len(self._idle),
+                "queue_depth": self._pending
+            }
+
+
+class AgentPoolManager:
+    """代理工作池管理器，按 pipeline_config.yaml 的 concurrent_tasks 为每类代理建立工作池"""
+
+    def __init__(self, pipeline_config: Dict[str, Any] = None, result_cache=None,
+                 factories: Dict[str, AgentFactory] = None,
+                 queue_depth_provider: Callable[[str], int] = None):
+        """初始化工作池管理器
+
+        Args:
+            pipeline_config: 管道配置，默认读取 pipeline_config.yaml
+            result_cache: 结果缓存（ResultCache），默认使用进程内共享的结果缓存
+            factories: 代理名称到实例工厂的映射，未提供的按配置类型创建
+            queue_depth_provider: 返回代理对应消息队列深度的函数，用于自动伸缩，
+                默认使用池内等待的任务数
+        """
+        self.pipeline_config = pipeline_config or get_pipeline_config()
+        result_cache = result_cache if result_cache is not None else get_result_cache()
+        self.retry_scheduler = RetryScheduler()
+        autoscale_config = self.pipeline_config.get("performance", {}).get("autoscale", {})
+        self.autoscale_enabled = autoscale_config.get("enabled", False)
+        self.autoscale_interval = autoscale_config.get("interval", 10)
+        self.tasks_per_instance = autoscale_config.get("tasks_per_instance", 2)
+        max_multiplier = autoscale_config.get("max_multiplier", 2)
+        self.queue_depth_provider = queue_depth_provider
+
+        factories = factories or {}
+        self.pools: Dict[str, AgentPool] = {}
+        for agent_name, agent_config in self.pipeline_config.get("agents", {}).items():
+            size = agent_config.get("concurrent_tasks", 1)
+            factory = factories.get(agent_name) or self._default_factory(agent_name)
+            self.pools[agent_name] = AgentPool(
+                agent_name,
+                factory,
+                size=size,
+                min_size=1,
+                max_size=agent_config.get("max_concurrent_tasks", size * max_multiplier)
+                if self.autoscale_enabled else size,
+                result_cache=result_cache,
+                retry_scheduler=self.retry_scheduler
+            )
+
+        self._stop_event = threading.Event()
+        self._autoscaler: Optional[threading.Thread] = None
+
+    def _default_factory(self, agent_name: str) -> AgentFactory:
+        """创建按配置类型构造代理的工厂
+
+        Args:
+            agent_name: 代理名称
+
+        Returns:
+            代理工厂
+        """
+        def _factory(agent_id: str) -> BaseAgent:
+            return create_agent(agent_name, agent_id, self.pipeline_config)
+        return _factory
+
+    def get_pool(self, agent_name: str) -> AgentPool:
+        """获取代理工作池
+
+        Args:
+            agent_name: 代理名称
+
+        Returns:
+            工作池
+        """
+        if agent_name not in self.pools:
+            raise ValueError(f"代理{agent_name}没有对应的工作池")
+        return self.pools[agent_name]
+
+    def submit(self, agent_name: str, input_data: Dict[str, Any]) -> Future:
+        """向指定代理提交任务
+
+        Args:
+            agent_name: 代理名称
+            input_data: 代理输入数据
+
+        Returns:
+            任务的 Future
+        """
+        return self.get_pool(agent_name).submit(input_data)
+
+    def autoscale(self):
+        """按当前队列深度调整所有工作池的实例数"""
+        for agent_name, pool in self.pools.items():
+            try:
+                queue_depth = self.queue_depth_provider(agent_name) if self.queue_depth_provider else None
+                pool.autoscale(queue_depth, self.tasks_per_instance)
+            except Exception as e:
+                logger.error(f"代理池{agent_name}自动伸缩失败: {str(e)}")
+
+    def start_autoscaler(self):
+        """启动后台自动伸缩线程"""
+        if not self.autoscale_enabled:
+            logger.info("自动伸缩未启用")
+            return
+        if self._autoscaler and self._autoscaler.is_alive():
+            return
+        self._stop_event.clear()
+        self._autoscaler = threading.Thread(target=self._autoscale_loop, name="agent-pool-autoscaler",
+                                            daemon=True)
+        self._autoscaler.start()
+
+    def _autoscale_loop(self):
+        """后台定期执行自动伸缩"""
+        while not self._stop_event.wait(self.autoscale_interval):
+            self.autoscale()
+
+    def shutdown(self, wait: bool = True):
+        """停止自动伸缩并关闭全部工作池
+
+        Args:
+            wait: 是否等待进行中的任务完成
+        """
+        self._stop_event.set()
+        for pool in self.pools.values():
+            pool.shutdown(wait=wait)
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取全部工作池状态
+
+        Returns:
+            各工作池状态、重试调度、熔断器统计和各优先级的等待与处理耗时
+        """
+        return {
+            "pools": {agent_name: pool.get_status() for agent_name, pool in self.pools.items()},
+            "retry": self.retry_scheduler.get_stats(),
+            "circuit_breakers": get_circuit_breaker_stats(),
+            "priority_latency": get_priority_metrics().get_stats()
+        }
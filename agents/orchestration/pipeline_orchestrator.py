@@ -0,0 +1,364 @@
+import time
+import threading
+import importlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.human_intervention import get_intervention_handler
+from agents.error_handling.retry_scheduler import RetryScheduler
+from common.logger import get_logger
+from common.config import get_config, get_pipeline_config
+from common.utils import generate_uuid, hash_text
+from data_storage.cache.result_cache import get_result_cache
+
+logger = get_logger(__name__)
+config = get_config()
+
+# 代理类型到实现模块的映射
+AGENT_MODULES = {
+    "ContractAnalystAgent": "agents.pipeline_agents.contract_analyst_agent",
+    "LegalCounselAgent": "agents.pipeline_agents.legal_counsel_agent",
+    "RiskAnalystAgent": "agents.pipeline_agents.risk_analyst_agent",
+    "ReportGeneratorAgent": "agents.pipeline_agents.report_generator_agent"
+}
+
+# 各阶段结果在下游输入中的字段名
+STAGE_RESULT_KEYS = {
+    "contract_analyst": "contract_analysis",
+    "legal_counsel": "legal_assessment",
+    "risk_analyst": "risk_analysis",
+    "report_generator": "report"
+}
+
+
+def create_agent(agent_name: str, agent_id: str = None, pipeline_config: Dict[str, Any] = None) -> BaseAgent:
+    """根据管道配置创建代理实例
+
+    Args:
+        agent_name: 代理名称，例如 contract_analyst
+        agent_id: 代理ID，默认自动生成
+        pipeline_config: 管道配置，默认读取 pipeline_config.yaml
+
+    Returns:
+        代理实例
+    """
+    pipeline_config = pipeline_config or get_pipeline_config()
+    agent_type = pipeline_config.get("agents", {}).get(agent_name, {}).get("type")
+    if agent_type not in AGENT_MODULES:
+        raise ValueError(f"未知的代理类型: {agent_name} ({agent_type})")
+
+    module = importlib.import_module(AGENT_MODULES[agent_type])
+    agent_class = getattr(module, agent_type)
+    return agent_class(agent_id or f"{agent_name}-{generate_uuid()[:8]}")
+
+
+class PipelineOrchestrator:
+    """管道编排器，按 pipeline_config.yaml 中声明的依赖关系以DAG方式执行代理
+
+    依赖均已完成的阶段会立即提交到线程池，互不依赖的阶段（如 legal_counsel
+    和 risk_analyst）并行执行。每个阶段受代理配置的 timeout 约束，整个管道
+    受 pipelines.<name>.timeout 约束，并记录各阶段耗时和关键路径。
+    """
+
+    def __init__(self, pipeline_name: str = "contract_review", agents: Dict[str, Any] = None,
+                 result_cache=None, pipeline_config: Dict[str, Any] = None, agent_pools=None,
+                 retry_scheduler: RetryScheduler = None, intervention_handler=None):
+        """初始化管道编排器
+
+        Args:
+            pipeline_name: 管道名称
+            agents: 代理名称到代理实例的映射，未提供的代理按配置创建
+            result_cache: 结果缓存（ResultCache），默认使用进程内共享的结果缓存，
+                配置中禁用缓存时不使用缓存
+            pipeline_config: 管道配置，默认读取 pipeline_config.yaml
+            agent_pools: 代理工作池管理器（AgentPoolManager），提供时阶段任务交给
+                工作池执行，同一编排器可以同时处理多份合同
+            retry_scheduler: 未使用工作池时阶段可重试失败的重试调度器，默认新建
+            intervention_handler: 人工干预处理器（HumanInterventionHandler），分配给
+                已暂停代理的阶段任务交给它暂存，默认使用进程内共享的处理器
+        """
+        self.pipeline_config = pipeline_config or get_pipeline_config()
+        pipeline = self.pipeline_config.get("pipelines", {}).get(pipeline_name)
+        if not pipeline:
+            raise ValueError(f"管道{pipeline_name}未定义")
+
+        self.pipeline_name = pipeline_name
+        self.stages: List[str] = list(pipeline.get("agents", []))
+        self.timeout = pipeline.get("timeout", 1800)
+        self.result_cache = result_cache if result_cache is not None else get_result_cache()
+
+        agent_configs = self.pipeline_config.get("agents", {})
+        self.dependencies = {
+            stage: list(agent_configs.get(stage, {}).get("dependencies", []))
+            for stage in self.stages
+        }
+        self.stage_timeouts = {
+            stage: agent_configs.get(stage, {}).get("timeout", self.timeout)
+            for stage in self.stages
+        }
+        self._validate_graph()
+
+        self.agent_pools = agent_pools
+        self.retry_scheduler = retry_scheduler or RetryScheduler()
+        self.intervention_handler = intervention_handler or get_intervention_handler()
+        self.agents = dict(agents or {})
+        for stage in self.stages:
+            if stage not in self.agents and agent_pools is None:
+                self.agents[stage] = create_agent(stage, pipeline_config=self.pipeline_config)
+
+    def _validate_graph(self):
+        """校验依赖关系：依赖必须属于本管道且不能成环"""
+        for stage, dependencies in self.dependencies.items():
+            unknown = [d for d in dependencies if d not in self.dependencies]
+            if unknown:
+                raise ValueError(f"阶段{stage}依赖未在管道中声明的阶段: {unknown}")
+
+        visiting, visited = set(), set()
+
+        def _visit(stage: str):
+            if stage in visited:
+                return
+            if stage in visiting:
+                raise ValueError(f"管道{self.pipeline_name}的依赖关系存在环: {stage}")
+            visiting.add(stage)
+            for dependency in self.dependencies[stage]:
+                _visit(dependency)
+            visiting.discard(stage)
+            visited.add(stage)
+
+        for stage in self.stages:
+            _visit(stage)
+
+    def _ancestors(self, stage: str) -> List[str]:
+        """获取阶段的全部上游阶段
+
+        Args:
+            stage: 阶段名称
+
+        Returns:
+            上游阶段列表
+        """
+        ancestors, stack = [], list(self.dependencies[stage])
+        while stack:
+            dependency = stack.pop()
+            if dependency not in ancestors:
+                ancestors.append(dependency)
+                stack.extend(self.dependencies[dependency])
+        return ancestors
+
+    def _build_stage_input(self, stage: str, input_data: Dict[str, Any],
+                           results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """构建阶段输入：原始输入加上全部上游阶段的结果
+
+        Args:
+            stage: 阶段名称
+            input_data: 管道原始输入
+            results: 已完成阶段的结果
+
+        Returns:
+            阶段输入
+        """
+        stage_input = dict(input_data)
+        for ancestor in self._ancestors(stage):
+            stage_input[STAGE_RESULT_KEYS.get(ancestor, ancestor)] = results[ancestor]
+        return stage_input
+
+    def _run_stage(self, stage: str, stage_input: Dict[str, Any]) -> Dict[str, Any]:
+        """执行单个阶段
+
+        Args:
+            stage: 阶段名称
+            stage_input: 阶段输入
+
+        Returns:
+            阶段结果，代理暂停时任务暂存到干预积压中，返回带 deferred 标记的错误结果
+        """
+        # 代理因人工干预暂停时不执行，干预解决后积压任务按顺序重新投递到代理队列
+        if (self.intervention_handler.is_agent_paused(stage)
+                and self.intervention_handler.defer_task(stage, stage_input)):
+            return {"error": True, "deferred": True, "message": f"代理{stage}已暂停，任务已暂存"}
+
+        if self.agent_pools is not None:
+            return self.agent_pools.submit(stage, stage_input).result()
+
+        # 直接执行时阶段线程只服务本阶段，退避期间等待重试调度器唤醒后重新执行；
+        # 开始前重置代理，error_count 只累计本合同的失败次数
+        task_key = self._task_key(stage, stage_input)
+        agent = self.agents[stage]
+        agent.reset()
+        while True:
+            result = agent.run(stage_input, self.result_cache)
+            if not (result.get("error") and result.get("error_details", {}).get("retry", False)):
+                break
+            ready = threading.Event()
+            if not self.retry_scheduler.schedule(task_key, ready.set):
+                break
+            ready.wait()
+        self.retry_scheduler.complete(task_key)
+        return result
+
+    @staticmethod
+    def _task_key(stage: str, stage_input: Dict[str, Any]) -> str:
+        """获取阶段任务标识，用于区分各合同的重试预算
+
+        Args:
+            stage: 阶段名称
+            stage_input: 阶段输入
+
+        Returns:
+            任务标识
+        """
+        metadata = stage_input.get("metadata", {})
+        contract_id = metadata.get("contract_id") or metadata.get("task_id")
+        if contract_id:
+            return f"{stage}:{contract_id}"
+        return f"{stage}:{hash_text(str(sorted(stage_input.items(), key=lambda i: i[0])))}"
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """执行管道
+
+        Args:
+            input_data: 管道输入，包含合同文本和元数据
+
+        Returns:
+            执行结果，包含状态、各阶段结果、阶段耗时和关键路径
+        """
+        pipeline_start = time.monotonic()
+        pipeline_deadline = pipeline_start + self.timeout
+
+        results: Dict[str, Dict[str, Any]] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        running = {}  # future -> (阶段, 开始时间)
+        finished = set()
+        status = "completed"
+
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.stages)),
+            thread_name_prefix=f"pipeline-{self.pipeline_name}"
+        )
+        try:
+            while True:
+                # 提交依赖已全部成功完成的阶段
+                for stage in self.stages:
+                    if stage in finished or stage in timings:
+                        continue
+                    if all(d in results for d in self.dependencies[stage]):
+                        stage_input = self._build_stage_input(stage, input_data, results)
+                        started = time.monotonic()
+                        timings[stage] = {"start": started - pipeline_start, "status": "running"}
+                        running[executor.submit(self._run_stage, stage, stage_input)] = (stage, started)
+
+                if not running:
+                    break
+
+                now = time.monotonic()
+                next_deadline = min(
+                    [started + self.stage_timeouts[stage] for stage, started in running.values()]
+                    + [pipeline_deadline]
+                )
+                done, _ = wait(list(running), timeout=max(0, next_deadline - now),
+                               return_when=FIRST_COMPLETED)
+
+                now = time.monotonic()
+                for future in done:
+                    stage, started = running.pop(future)
+                    finished.add(stage)
+                    timing = timings[stage]
+                    timing.update({"end": now - pipeline_start, "duration": now - started})
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = {"error": True, "message": str(e)}
+                    if result.get("deferred"):
+                        timing["status"] = "deferred"
+                        status = "deferred" if status == "completed" else status
+                        logger.warning(f"阶段{stage}的代理已暂停，任务已暂存等待人工干预")
+                    elif result.get("error"):
+                        timing["status"] = "failed"
+                        status = "failed"
+                        logger.error(f"阶段{stage}执行失败: {result.get('message')}")
+                    else:
+                        timing["status"] = "completed"
+                        results[stage] = result
+                    logger.info(f"阶段{stage}{timing['status']}，耗时{timing['duration']:.2f}秒")
+
+                # 超时的阶段无法强制终止线程，放弃其结果并让下游阶段跳过
+                for future, (stage, started) in list(running.items()):
+                    if now - started >= self.stage_timeouts[stage] or now >= pipeline_deadline:
+                        running.pop(future)
+                        future.cancel()
+                        finished.add(stage)
+                        timings[stage].update({
+                            "end": now - pipeline_start,
+                            "duration": now - started,
+                            "status": "timeout"
+                        })
+                        status = "timeout" if status == "completed" else status
+                        logger.error(f"阶段{stage}执行超时（{self.stage_timeouts[stage]}秒）")
+
+                if now >= pipeline_deadline:
+                    status = "timeout"
+                    logger.error(f"管道{self.pipeline_name}执行超时（{self.timeout}秒）")
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        for stage in self.stages:
+            if stage not in timings:
+                timings[stage] = {"status": "skipped"}
+
+        total_seconds = time.monotonic() - pipeline_start
+        critical_path = self._critical_path(timings)
+        logger.info(
+            f"管道{self.pipeline_name}{status}，总耗时{total_seconds:.2f}秒，"
+            f"关键路径: {' -> '.join(critical_path) or '无'}"
+        )
+
+        final_stage = self.stages[-1] if self.stages else None
+        return {
+            "status": status,
+            "results": results,
+            "report": results.get(final_stage),
+            "timings": timings,
+            "critical_path": critical_path,
+            "total_seconds": total_seconds
+        }
+
+    def _critical_path(self, timings: Dict[str, Dict[str, Any]]) -> List[str]:
+        """根据阶段结束时间回溯关键路径
+
+        从最后结束的阶段开始，每一步选择结束最晚的上游阶段，即实际
+        决定该阶段开始时间的依赖。
+
+        Args:
+            timings: 阶段耗时信息
+
+        Returns:
+            关键路径上的阶段列表
+        """
+        ended = {stage: t["end"] for stage, t in timings.items() if "end" in t}
+        if not ended:
+            return []
+
+        path = [max(ended, key=ended.get)]
+        while True:
+            dependencies = [d for d in self.dependencies[path[-1]] if d in ended]
+            if not dependencies:
+                break
+            path.append(max(dependencies, key=ended.get))
+        return list(reversed(path))
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取编排器状态
+
+        Returns:
+            状态信息
+        """
+        return {
+            "pipeline": self.pipeline_name,
+            "stages": self.stages,
+            "dependencies": self.dependencies,
+            "timeout": self.timeout,
+            "agents": {stage: agent.get_status() for stage, agent in self.agents.items()},
+            "agent_pools": self.agent_pools.get_status() if self.agent_pools else None
+        }
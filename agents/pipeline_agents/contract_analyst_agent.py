@@ -2,6 +2,7 @@ from typing import Dict, Any
 from agents.base.base_agent import BaseAgent
 from common.logger import get_logger
 from common.config import get_config
+from common.utils import hash_text, normalize_text
 from contract.analyzer import ContractAnalyzer
 
 logger = get_logger(__name__)
@@ -68,14 +69,12 @@ class ContractAnalystAgent(BaseAgent):
             return analysis_result
         
         except Exception as e:
-            # 处理错误
+            # 处理错误，需要重试时由调用方通过 RetryScheduler 延迟重新投递，
+            # 不在当前线程中递归重试
             error_result = self.handle_error(e)
-            if error_result.get("retry", False):
-                # 如果需要重试，递归调用
-                return self.process(input_data)
             
             # 更新状态
-            self.update_state("failed")
+            self.update_state("retry_pending" if error_result.get("retry", False) else "failed")
             
             # 返回错误信息
             return {
@@ -84,6 +83,17 @@ class ContractAnalystAgent(BaseAgent):
                 "error_details": error_result
             }
     
+    def get_cache_key(self, input_data: Dict[str, Any]) -> str:
+        """按规范化后的合同文本计算缓存哈希
+        
+        Args:
+            input_data: 输入数据
+            
+        Returns:
+            内容哈希
+        """
+        return hash_text(normalize_text(input_data.get("contract_text", "")))
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """验证输入数据
         
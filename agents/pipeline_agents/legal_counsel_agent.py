@@ -2,6 +2,9 @@ from typing import Dict, Any
 from agents.base.base_agent import BaseAgent
 from common.logger import get_logger
 from common.config import get_config
+from core_services.contract_processor.incremental_review import (
+    ClauseReviewStore, IncrementalReviewer, default_clause_parser, group_clause_results
+)
 from legal.advisor import LegalAdvisor
 
 logger = get_logger(__name__)
@@ -18,6 +21,8 @@ class LegalCounselAgent(BaseAgent):
         """
         super().__init__(agent_id, "legal_counsel")
         self.advisor = LegalAdvisor()
+        self.clause_parser = default_clause_parser()
+        self.review_store = ClauseReviewStore(namespace=self.agent_type)
     
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理法律咨询任务
@@ -38,31 +43,23 @@ class LegalCounselAgent(BaseAgent):
             
             # 获取合同分析结果
             contract_analysis = input_data.get("contract_analysis", {})
+            contract_id = input_data.get("metadata", {}).get("contract_id")
+            contract_text = input_data.get("contract_text")
             
-            # 法律合规性检查
-            compliance_check = self.advisor.check_compliance(contract_analysis)
+            if contract_id and contract_text:
+                with self.review_store.lock(contract_id):
+                    if self.review_store.exists(contract_id):
+                        # 修订版本只审查新增和修改的条款，未变化条款复用上一版本的结果
+                        assessment_result = self._assess_revision(contract_id, contract_text,
+                                                                  contract_analysis)
+                    else:
+                        # 首个版本做整份合同的分析，只登记条款供下一版本比对
+                        assessment_result = self._assess_contract(contract_analysis)
+                        self._new_reviewer(contract_analysis).record(contract_id, contract_text)
+            else:
+                assessment_result = self._assess_contract(contract_analysis)
             
-            # 权利义务分析
-            rights_obligations = self.advisor.analyze_rights_obligations(contract_analysis)
-            
-            # 法律风险评估
-            legal_risks = self.advisor.assess_legal_risks(contract_analysis)
-            
-            # 生成法律建议
-            legal_advice = self.advisor.generate_legal_advice(
-                contract_analysis,
-                compliance_check,
-                legal_risks
-            )
-            
-            # 生成评估结果
-            assessment_result = {
-                "compliance_check": compliance_check,
-                "rights_obligations": rights_obligations,
-                "legal_risks": legal_risks,
-                "legal_advice": legal_advice,
-                "metadata": input_data.get("metadata", {})
-            }
+            assessment_result["metadata"] = input_data.get("metadata", {})
             
             # 更新状态
             self.update_state("completed")
@@ -70,14 +67,12 @@ class LegalCounselAgent(BaseAgent):
             return assessment_result
         
         except Exception as e:
-            # 处理错误
+            # 处理错误，需要重试时由调用方通过 RetryScheduler 延迟重新投递，
+            # 不在当前线程中递归重试
             error_result = self.handle_error(e)
-            if error_result.get("retry", False):
-                # 如果需要重试，递归调用
-                return self.process(input_data)
             
             # 更新状态
-            self.update_state("failed")
+            self.update_state("retry_pending" if error_result.get("retry", False) else "failed")
             
             # 返回错误信息
             return {
@@ -86,6 +81,92 @@ class LegalCounselAgent(BaseAgent):
                 "error_details": error_result
             }
     
+    def _assess_contract(self, contract_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """对合同做法律评估
+        
+        增量审查时传入只含单个条款的合同分析结果，得到该条款的评估。
+        
+        Args:
+            contract_analysis: 合同分析结果
+            
+        Returns:
+            评估结果
+        """
+        # 法律合规性检查
+        compliance_check = self.advisor.check_compliance(contract_analysis)
+        
+        # 权利义务分析
+        rights_obligations = self.advisor.analyze_rights_obligations(contract_analysis)
+        
+        # 法律风险评估
+        legal_risks = self.advisor.assess_legal_risks(contract_analysis)
+        
+        # 生成法律建议
+        legal_advice = self.advisor.generate_legal_advice(
+            contract_analysis,
+            compliance_check,
+            legal_risks
+        )
+        
+        return {
+            "compliance_check": compliance_check,
+            "rights_obligations": rights_obligations,
+            "legal_risks": legal_risks,
+            "legal_advice": legal_advice
+        }
+    
+    def _assess_revision(self, contract_id: str, contract_text: str,
+                         contract_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """增量评估合同修订版本，各项结果按条款汇总
+        
+        Args:
+            contract_id: 合同ID
+            contract_text: 本版本合同文本
+            contract_analysis: 合同分析结果
+            
+        Returns:
+            评估结果，各字段为按条款排列的结果列表，并附带增量审查结果
+        """
+        incremental_review = self._new_reviewer(contract_analysis).review(contract_id, contract_text)
+        grouped = group_clause_results(incremental_review, "legal")
+        if grouped["failed_clauses"]:
+            # 审查成功的条款已保存，重试时只重新审查失败的条款
+            raise RuntimeError(f"{len(grouped['failed_clauses'])}个条款的法律评估失败")
+        
+        return {
+            "compliance_check": grouped.get("compliance_check", []),
+            "rights_obligations": grouped.get("rights_obligations", []),
+            "legal_risks": grouped.get("legal_risks", []),
+            "legal_advice": grouped.get("legal_advice", []),
+            "incremental_review": incremental_review
+        }
+    
+    def _new_reviewer(self, contract_analysis: Dict[str, Any]) -> IncrementalReviewer:
+        """创建本次评估使用的增量审查器
+        
+        Args:
+            contract_analysis: 合同分析结果，作为单条款评估的上下文
+            
+        Returns:
+            增量审查器
+        """
+        return IncrementalReviewer(
+            {"legal": lambda clause: self._assess_contract({**contract_analysis, "key_clauses": [clause]})},
+            clause_parser=self.clause_parser,
+            store=self.review_store
+        )
+    
+    def use_result_cache(self, input_data: Dict[str, Any]) -> bool:
+        """带合同ID的任务由增量审查复用结果，不使用结果缓存
+        
+        Args:
+            input_data: 输入数据
+            
+        Returns:
+            是否使用结果缓存
+        """
+        return not (input_data.get("metadata", {}).get("contract_id") and input_data.get("contract_text"))
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """验证输入数据
         
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from agents.base.base_agent import BaseAgent
 from common.logger import get_logger
 from common.config import get_config
@@ -73,20 +73,31 @@ class ReportGeneratorAgent(BaseAgent):
                 }
             }
             
+            # 合并法律审查和风险分析阶段的条款级增量审查结果
+            incremental_reviews = [
+                review for review in (
+                    input_data.get("incremental_review"),
+                    legal_assessment.get("incremental_review"),
+                    risk_analysis.get("incremental_review")
+                ) if review
+            ]
+            if incremental_reviews:
+                report.update(self._merge_incremental_review(
+                    self._combine_incremental_reviews(incremental_reviews)
+                ))
+            
             # 更新状态
             self.update_state("completed")
             
             return report
         
         except Exception as e:
-            # 处理错误
+            # 处理错误，需要重试时由调用方通过 RetryScheduler 延迟重新投递，
+            # 不在当前线程中递归重试
             error_result = self.handle_error(e)
-            if error_result.get("retry", False):
-                # 如果需要重试，递归调用
-                return self.process(input_data)
             
             # 更新状态
-            self.update_state("failed")
+            self.update_state("retry_pending" if error_result.get("retry", False) else "failed")
             
             # 返回错误信息
             return {
@@ -95,6 +106,68 @@ class ReportGeneratorAgent(BaseAgent):
                 "error_details": error_result
             }
     
+    def _combine_incremental_reviews(self, incremental_reviews: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """按条款合并各阶段的增量审查结果
+        
+        各阶段对同一版本合同切分出相同的条款列表，逐条合并审查结果；
+        条款数不一致的结果（例如阶段间规则已更新）跳过并记录警告。
+        
+        Args:
+            incremental_reviews: 各阶段 IncrementalReviewer.review 的返回结果
+            
+        Returns:
+            合并后的增量审查结果，变更状态和汇总取第一个结果
+        """
+        combined = dict(incremental_reviews[0])
+        combined["clauses"] = [
+            {**clause, "review": dict(clause["review"])} for clause in combined.get("clauses", [])
+        ]
+        for other in incremental_reviews[1:]:
+            clauses = other.get("clauses", [])
+            if len(clauses) != len(combined["clauses"]):
+                logger.warning(f"合同{other.get('contract_id')}各阶段切分的条款数不一致，跳过合并")
+                continue
+            for clause, other_clause in zip(combined["clauses"], clauses):
+                clause["review"].update(other_clause["review"])
+        return combined
+    
+    def _merge_incremental_review(self, incremental_review: Dict[str, Any]) -> Dict[str, Any]:
+        """整理增量审查结果，合并复用条款和重新审查条款
+        
+        Args:
+            incremental_review: IncrementalReviewer.review 的返回结果
+            
+        Returns:
+            报告中的条款审查和修订摘要部分
+        """
+        clause_reviews = [
+            {
+                "id": clause["id"],
+                "type": clause["type"],
+                "heading": (clause.get("heading") or {}).get("text"),
+                "status": clause["status"],
+                "review": clause["review"]
+            }
+            for clause in incremental_review.get("clauses", [])
+        ]
+        
+        return {
+            "clause_reviews": clause_reviews,
+            "revision_summary": {
+                "contract_id": incremental_review.get("contract_id"),
+                "version": incremental_review.get("version"),
+                "previous_version": incremental_review.get("previous_version"),
+                **incremental_review.get("summary", {}),
+                "changed_clauses": [
+                    c["id"] for c in clause_reviews if c["status"] in ("modified", "added")
+                ],
+                "removed_clauses": [
+                    (c.get("heading") or {}).get("text") or c.get("id")
+                    for c in incremental_review.get("removed_clauses", [])
+                ]
+            }
+        }
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """验证输入数据
         
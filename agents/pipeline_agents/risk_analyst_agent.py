@@ -2,6 +2,9 @@ from typing import Dict, Any
 from agents.base.base_agent import BaseAgent
 from common.logger import get_logger
 from common.config import get_config
+from core_services.contract_processor.incremental_review import (
+    ClauseReviewStore, IncrementalReviewer, default_clause_parser, group_clause_results
+)
 from risk.analyzer import RiskAnalyzer
 
 logger = get_logger(__name__)
@@ -18,6 +21,8 @@ class RiskAnalystAgent(BaseAgent):
         """
         super().__init__(agent_id, "risk_analyst")
         self.analyzer = RiskAnalyzer()
+        self.clause_parser = default_clause_parser()
+        self.review_store = ClauseReviewStore(namespace=self.agent_type)
     
     def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理风险分析任务
@@ -38,45 +43,23 @@ class RiskAnalystAgent(BaseAgent):
             
             # 获取合同分析结果
             contract_analysis = input_data.get("contract_analysis", {})
+            contract_id = input_data.get("metadata", {}).get("contract_id")
+            contract_text = input_data.get("contract_text")
             
-            # 财务风险分析
-            financial_risks = self.analyzer.analyze_financial_risks(contract_analysis)
+            if contract_id and contract_text:
+                with self.review_store.lock(contract_id):
+                    if self.review_store.exists(contract_id):
+                        # 修订版本只分析新增和修改的条款，未变化条款复用上一版本的结果
+                        analysis_result = self._analyze_revision(contract_id, contract_text,
+                                                                 contract_analysis)
+                    else:
+                        # 首个版本做整份合同的分析，只登记条款供下一版本比对
+                        analysis_result = self._analyze_contract(contract_analysis)
+                        self._new_reviewer(contract_analysis).record(contract_id, contract_text)
+            else:
+                analysis_result = self._analyze_contract(contract_analysis)
             
-            # 业务风险分析
-            business_risks = self.analyzer.analyze_business_risks(contract_analysis)
-            
-            # 技术风险分析
-            technical_risks = self.analyzer.analyze_technical_risks(contract_analysis)
-            
-            # 安全风险分析
-            security_risks = self.analyzer.analyze_security_risks(contract_analysis)
-            
-            # 生成风险评分
-            risk_scores = self.analyzer.calculate_risk_scores({
-                "financial": financial_risks,
-                "business": business_risks,
-                "technical": technical_risks,
-                "security": security_risks
-            })
-            
-            # 生成风险缓解建议
-            mitigation_suggestions = self.analyzer.generate_mitigation_suggestions({
-                "financial": financial_risks,
-                "business": business_risks,
-                "technical": technical_risks,
-                "security": security_risks
-            })
-            
-            # 生成分析结果
-            analysis_result = {
-                "financial_risks": financial_risks,
-                "business_risks": business_risks,
-                "technical_risks": technical_risks,
-                "security_risks": security_risks,
-                "risk_scores": risk_scores,
-                "mitigation_suggestions": mitigation_suggestions,
-                "metadata": input_data.get("metadata", {})
-            }
+            analysis_result["metadata"] = input_data.get("metadata", {})
             
             # 更新状态
             self.update_state("completed")
@@ -84,14 +67,12 @@ class RiskAnalystAgent(BaseAgent):
             return analysis_result
         
         except Exception as e:
-            # 处理错误
+            # 处理错误，需要重试时由调用方通过 RetryScheduler 延迟重新投递，
+            # 不在当前线程中递归重试
             error_result = self.handle_error(e)
-            if error_result.get("retry", False):
-                # 如果需要重试，递归调用
-                return self.process(input_data)
             
             # 更新状态
-            self.update_state("failed")
+            self.update_state("retry_pending" if error_result.get("retry", False) else "failed")
             
             # 返回错误信息
             return {
@@ -100,6 +81,101 @@ class RiskAnalystAgent(BaseAgent):
                 "error_details": error_result
             }
     
+    def _analyze_contract(self, contract_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """分析合同的各类风险
+        
+        增量审查时传入只含单个条款的合同分析结果，得到该条款的风险分析。
+        
+        Args:
+            contract_analysis: 合同分析结果
+            
+        Returns:
+            风险分析结果
+        """
+        # 财务风险分析
+        financial_risks = self.analyzer.analyze_financial_risks(contract_analysis)
+        
+        # 业务风险分析
+        business_risks = self.analyzer.analyze_business_risks(contract_analysis)
+        
+        # 技术风险分析
+        technical_risks = self.analyzer.analyze_technical_risks(contract_analysis)
+        
+        # 安全风险分析
+        security_risks = self.analyzer.analyze_security_risks(contract_analysis)
+        
+        risks = {
+            "financial": financial_risks,
+            "business": business_risks,
+            "technical": technical_risks,
+            "security": security_risks
+        }
+        
+        return {
+            "financial_risks": financial_risks,
+            "business_risks": business_risks,
+            "technical_risks": technical_risks,
+            "security_risks": security_risks,
+            # 生成风险评分
+            "risk_scores": self.analyzer.calculate_risk_scores(risks),
+            # 生成风险缓解建议
+            "mitigation_suggestions": self.analyzer.generate_mitigation_suggestions(risks)
+        }
+    
+    def _analyze_revision(self, contract_id: str, contract_text: str,
+                          contract_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """增量分析合同修订版本，风险、评分和缓解建议按条款汇总
+        
+        Args:
+            contract_id: 合同ID
+            contract_text: 本版本合同文本
+            contract_analysis: 合同分析结果
+            
+        Returns:
+            风险分析结果，各字段为按条款排列的结果列表，并附带增量审查结果
+        """
+        incremental_review = self._new_reviewer(contract_analysis).review(contract_id, contract_text)
+        grouped = group_clause_results(incremental_review, "risk")
+        if grouped["failed_clauses"]:
+            # 分析成功的条款已保存，重试时只重新分析失败的条款
+            raise RuntimeError(f"{len(grouped['failed_clauses'])}个条款的风险分析失败")
+        
+        return {
+            "financial_risks": grouped.get("financial_risks", []),
+            "business_risks": grouped.get("business_risks", []),
+            "technical_risks": grouped.get("technical_risks", []),
+            "security_risks": grouped.get("security_risks", []),
+            "risk_scores": grouped.get("risk_scores", []),
+            "mitigation_suggestions": grouped.get("mitigation_suggestions", []),
+            "incremental_review": incremental_review
+        }
+    
+    def _new_reviewer(self, contract_analysis: Dict[str, Any]) -> IncrementalReviewer:
+        """创建本次分析使用的增量审查器
+        
+        Args:
+            contract_analysis: 合同分析结果，作为单条款分析的上下文
+            
+        Returns:
+            增量审查器
+        """
+        return IncrementalReviewer(
+            {"risk": lambda clause: self._analyze_contract({**contract_analysis, "key_clauses": [clause]})},
+            clause_parser=self.clause_parser,
+            store=self.review_store
+        )
+    
+    def use_result_cache(self, input_data: Dict[str, Any]) -> bool:
+        """带合同ID的任务由增量审查复用结果，不使用结果缓存
+        
+        Args:
+            input_data: 输入数据
+            
+        Returns:
+            是否使用结果缓存
+        """
+        return not (input_data.get("metadata", {}).get("contract_id") and input_data.get("contract_text"))
+    
     def validate_input(self, input_data: Dict[str, Any]) -> bool:
         """验证输入数据
         
@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 from datetime import datetime
+from message_broker.core.task_publisher import submit_contract
 
 def render_upload_page():
     st.title("合同上传")
@@ -36,8 +37,11 @@ def render_upload_page():
         
         # 开始处理按钮
         if st.button("开始处理", type="primary"):
-            # TODO: 实现文件处理逻辑
-            st.info("文件已提交处理，请在'分析进度'页面查看进度。")
+            result = submit_contract(uploaded_file.name, uploaded_file.getvalue(), priority, notify)
+            if result["error"]:
+                st.error(result["message"])
+            else:
+                st.info(f"文件已提交处理（任务ID: {result['task_id']}），请在'分析进度'页面查看进度。")
     
     # 使用说明
     with st.expander("使用说明"):
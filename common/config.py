@@ -10,6 +10,7 @@ class Config:
     
     _instance = None
     _config_data = None
+    version = 0
     
     def __new__(cls):
         if cls._instance is None:
@@ -84,9 +85,37 @@ class Config:
             "budget": {
                 "default_limit": 1000,
                 "alert_threshold": 0.8
+            },
+            "result_cache": {
+                "enabled": True,
+                "path": "data/cache/results.db",
+                "ttl": 604800,  # 7天
+                "max_size": 536870912  # 512MB
+            },
+            "intervention_store": {
+                "path": "data/interventions/interventions.db"
             }
         }
     
+    def reload(self):
+        """重新加载配置文件
+        
+        原配置字典原地更新，已通过 get_config() 持有字典的模块无需重新获取；
+        同时清除管道配置和错误处理配置的缓存，并递增版本号，依赖配置编译的
+        组件可据此判断是否需要重建。
+        """
+        global _pipeline_config, _error_handling_config
+        old_data = self._config_data
+        self._load_config()
+        if old_data is not None and old_data is not self._config_data:
+            old_data.clear()
+            old_data.update(self._config_data or {})
+            self._config_data = old_data
+        _pipeline_config = None
+        _error_handling_config = None
+        Config.version += 1
+        logger.info(f"配置已重新加载，版本{Config.version}")
+    
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值
         
@@ -161,4 +190,73 @@ def get_config() -> Dict[str, Any]:
     Returns:
         配置字典
     """
-    return Config()._config_data
\ No newline at end of file
+    return Config()._config_data
+
+def get_model_version() -> str:
+    """获取当前模型版本标识
+
+    Returns:
+        "默认模型:版本"形式的字符串，读取 model_services 配置
+    """
+    model_config = get_config().get("model_services", {})
+    return f"{model_config.get('default_model', '')}:{model_config.get('version', '')}"
+
+_pipeline_config = None
+
+def get_pipeline_config(config_path: str = None) -> Dict[str, Any]:
+    """获取代理管道配置
+    
+    Args:
+        config_path: 管道配置文件路径，默认读取 PIPELINE_CONFIG_PATH 环境变量或
+            agents/config/pipeline_config.yaml
+        
+    Returns:
+        管道配置字典
+    """
+    global _pipeline_config
+    if config_path is None and _pipeline_config is not None:
+        return _pipeline_config
+    
+    path = config_path or os.getenv("PIPELINE_CONFIG_PATH", "agents/config/pipeline_config.yaml")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            pipeline_config = yaml.safe_load(f) or {}
+    except Exception as e:
+        logger.error(f"加载管道配置{path}失败: {str(e)}")
+        pipeline_config = {}
+    
+    if config_path is None:
+        _pipeline_config = pipeline_config
+    return pipeline_config
+
+_error_handling_config = None
+
+def get_error_handling_config(config_path: str = None) -> Dict[str, Any]:
+    """获取错误处理配置
+    
+    主配置中包含 error_handling 段时优先使用，否则读取独立的错误处理配置文件。
+    
+    Args:
+        config_path: 错误处理配置文件路径，默认读取 ERROR_HANDLING_CONFIG_PATH 环境变量或
+            agents/config/error_handling.yaml
+        
+    Returns:
+        错误处理配置字典
+    """
+    global _error_handling_config
+    if config_path is None and _error_handling_config is not None:
+        return _error_handling_config
+    
+    error_handling_config = None if config_path else (get_config() or {}).get("error_handling")
+    if error_handling_config is None:
+        path = config_path or os.getenv("ERROR_HANDLING_CONFIG_PATH", "agents/config/error_handling.yaml")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                error_handling_config = yaml.safe_load(f) or {}
+        except Exception as e:
+            logger.error(f"加载错误处理配置{path}失败: {str(e)}")
+            error_handling_config = {}
+    
+    if config_path is None:
+        _error_handling_config = error_handling_config
+    return error_handling_config
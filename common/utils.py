@@ -1,4 +1,5 @@
 import os
+import re
 import json
 import uuid
 import hashlib
@@ -27,6 +28,17 @@ def hash_text(text: str) -> str:
     """
     return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
+def normalize_text(text: str) -> str:
+    """规范化文本，合并连续空白并去除首尾空白
+    
+    Args:
+        text: 输入文本
+        
+    Returns:
+        规范化后的文本
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
 def load_json(file_path: str) -> Dict[str, Any]:
     """加载JSON文件
     
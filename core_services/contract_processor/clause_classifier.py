@@ -0,0 +1,313 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_CLAUSE_TYPE = "其他条款"
+
+# 内置条款模式，知识库规则在其基础上覆盖或追加
+DEFAULT_CLAUSE_PATTERNS = {
+    "价格条款": r"价格|费用|报酬|金额|付款|￥|\$|人民币|美元",
+    "交付条款": r"交付|交货|运输|物流|配送|到货",
+    "违约责任": r"违约|赔偿|罚款|责任|索赔|争议",
+    "保密条款": r"保密|机密|秘密|信息安全|数据保护",
+    "合同期限": r"期限|有效期|终止|解除|到期|续约"
+}
+
+# 正则元字符，出现在未转义位置时说明后续内容不是字面量
+_REGEX_METACHARS = set(".^$*+?{}[]()|\\")
+# 作用于前一个字符、使其可选的量词
+_OPTIONAL_QUANTIFIERS = set("*?{")
+# 反向引用和条件分组依赖分组编号，拆分分支后编号会变化
+_GROUP_REFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+def _split_top_level_branches(pattern: str) -> List[str]:
+    """按顶层的 | 拆分模式
+
+    Args:
+        pattern: 条款模式
+
+    Returns:
+        顶层分支列表
+    """
+    branches = []
+    depth = 0
+    in_class = False
+    start = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+        elif char == "[":
+            in_class = True
+            # 字符类开头的 ] 或 ^] 是字面量
+            if pattern[i + 1:i + 2] == "^":
+                i += 1
+            if pattern[i + 1:i + 2] == "]":
+                i += 1
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "|" and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def _literal_prefix(branch: str) -> Tuple[str, bool]:
+    """提取分支开头的字面量前缀
+
+    Args:
+        branch: 单个分支
+
+    Returns:
+        (字面量前缀, 分支是否完全由字面量组成)
+    """
+    prefix = []
+    i = 0
+    while i < len(branch):
+        char = branch[i]
+        if char == "\\":
+            # \d、\s、\b 等转义属于正则语法
+            if i + 1 >= len(branch) or branch[i + 1].isalnum():
+                break
+            literal, width = branch[i + 1], 2
+        elif char in _REGEX_METACHARS:
+            break
+        else:
+            literal, width = char, 1
+
+        following = branch[i + width:i + width + 1]
+        if following and following in _OPTIONAL_QUANTIFIERS:
+            break
+        prefix.append(literal)
+        i += width
+        if following == "+":
+            break
+    return "".join(prefix), i == len(branch)
+
+
+class ClauseClassifier:
+    """条款分类器，将全部条款模式预编译为单个匹配器
+
+    每个模式按顶层 | 拆分为分支，分支开头的字面量统一放入一棵关键词前缀树，
+    编译为一个前缀树正则。分类时用该正则扫描一遍条款文本，纯关键词分支
+    直接命中，带正则语法的分支只在其字面量前缀出现的位置做一次锚定校验。
+    没有字面量前缀的模式（如以字符类开头）保留为独立正则按顺序匹配。
+    分类结果与按顺序逐条 re.search 的"先匹配先生效"语义一致。
+    """
+
+    def __init__(self, clause_patterns: Dict[str, str], flags: int = re.IGNORECASE):
+        """初始化条款分类器
+
+        Args:
+            clause_patterns: 条款类型到模式的有序映射
+            flags: 正则标志
+        """
+        self.flags = flags
+        # 在 flags 下互相匹配的字符归并为同一个代表字符，与正则的大小写规则一致
+        self._char_representatives: Dict[str, str] = {}
+        # 大小写映射形式 -> 以该形式登记过的代表字符
+        self._fold_keys: Dict[str, List[str]] = {}
+        self.clause_types: List[str] = []
+        self.keyword_regex: Optional[re.Pattern] = None
+        # 前缀树正则中关键词结尾的命名分组 -> 在该位置可能命中的候选
+        # [(模式序号, 锚定校验正则或None)]，按序号升序
+        self.candidates: Dict[str, List[Tuple[int, Optional[re.Pattern]]]] = {}
+        self.standalone: List[Tuple[int, re.Pattern]] = []
+        self._compile(clause_patterns)
+
+    def _compile(self, clause_patterns: Dict[str, str]):
+        """编译条款模式
+
+        Args:
+            clause_patterns: 条款类型到模式的有序映射
+        """
+        entries: Dict[str, List[Tuple[int, Optional[re.Pattern]]]] = {}
+
+        for clause_type, pattern in clause_patterns.items():
+            if not isinstance(pattern, str):
+                logger.warning(f"条款类型{clause_type}的模式无效，已忽略: {pattern!r}")
+                continue
+            try:
+                compiled = re.compile(pattern, self.flags)
+            except re.error as e:
+                logger.warning(f"条款类型{clause_type}的模式编译失败，已忽略: {str(e)}")
+                continue
+
+            index = len(self.clause_types)
+            self.clause_types.append(clause_type)
+
+            branch_entries = self._index_branches(pattern)
+            if branch_entries is None:
+                self.standalone.append((index, compiled))
+                continue
+            for prefix, verifier in branch_entries:
+                entries.setdefault(prefix, []).append((index, verifier))
+
+        if not entries:
+            return
+
+        # 同一位置命中的关键词互为前缀，预先合并每个关键词所有前缀上的候选
+        keywords = list(entries)
+        for group, keyword in enumerate(keywords):
+            merged = []
+            for length in range(1, len(keyword) + 1):
+                merged.extend(entries.get(keyword[:length], ()))
+            merged.sort(key=lambda entry: entry[0])
+            self.candidates[f"k{group}"] = merged
+
+        self.keyword_regex = re.compile(self._build_trie_regex(keywords), self.flags)
+
+    def _fold(self, text: str) -> str:
+        """把文本中的每个字符替换为其代表字符
+
+        字符是否等价由 re 在 flags 下的匹配结果决定，因此前缀树的归并方式
+        与分类时的正则匹配一致（例如忽略大小写时 ſ 与 s 等价）。
+
+        Args:
+            text: 字面量文本
+
+        Returns:
+            归并后的文本
+        """
+        folded = []
+        for char in text:
+            representative = self._char_representatives.get(char)
+            if representative is None:
+                representative = self._char_representatives[char] = self._representative(char)
+            folded.append(representative)
+        return "".join(folded)
+
+    def _representative(self, char: str) -> str:
+        """查找字符的代表字符
+
+        等价字符的 lower、upper、casefold 等映射形式（多字符形式另取首字符）
+        必有交集，只需与这些形式下登记过的少量代表字符比较，每个字符的开销
+        与已登记的字符数无关。
+
+        Args:
+            char: 字符
+
+        Returns:
+            代表字符，没有等价的已登记字符时为字符本身
+        """
+        if not self.flags & re.IGNORECASE:
+            return char
+
+        forms = {char, char.lower(), char.upper(), char.casefold(), char.upper().lower()}
+        keys = forms | {form[0] for form in forms if form}
+        representative = next(
+            (rep for key in keys for rep in self._fold_keys.get(key, ())
+             if re.fullmatch(re.escape(rep), char, self.flags)
+             and re.fullmatch(re.escape(char), rep, self.flags)),
+            char
+        )
+        for key in keys:
+            representatives = self._fold_keys.setdefault(key, [])
+            if representative not in representatives:
+                representatives.append(representative)
+        return representative
+
+    def _index_branches(self, pattern: str) -> Optional[List[Tuple[str, Optional[re.Pattern]]]]:
+        """为模式的各个分支生成前缀树条目
+
+        Args:
+            pattern: 条款模式
+
+        Returns:
+            [(字面量前缀, 锚定校验正则或None)]，无法拆分时返回None
+        """
+        if _GROUP_REFERENCE.search(pattern) or pattern.startswith("(?"):
+            return None
+
+        branch_entries = []
+        for branch in _split_top_level_branches(pattern):
+            prefix, is_literal = _literal_prefix(branch)
+            if not prefix:
+                return None
+            try:
+                verifier = None if is_literal else re.compile(branch, self.flags)
+            except re.error:
+                # 分支单独编译失败（如引用了其他分支中的分组），整个模式独立匹配
+                return None
+            branch_entries.append((self._fold(prefix), verifier))
+        return branch_entries
+
+    @staticmethod
+    def _build_trie_regex(keywords: List[str]) -> str:
+        """根据关键词构建前缀树形式的正则表达式
+
+        每个位置只沿一条分支匹配，并贪婪地取最长的关键词。每个关键词结尾
+        放一个空的命名分组 k<序号>，匹配结果的 lastgroup 即命中的最长关键词。
+
+        Args:
+            keywords: 关键词列表
+
+        Returns:
+            正则表达式字符串
+        """
+        trie: Dict[str, dict] = {}
+        for group, keyword in enumerate(keywords):
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = group
+
+        def _render(node: Dict[str, dict]) -> str:
+            marker = f"(?P<k{node['']}>)" if "" in node else ""
+            branches = [re.escape(char) + _render(node[char]) for char in sorted(node) if char]
+            if not branches:
+                return marker
+            if len(branches) == 1 and not marker:
+                return branches[0]
+            body = "(?:" + "|".join(branches) + ")"
+            return marker + body + "?" if marker else body
+
+        return _render(trie)
+
+    def classify(self, clause_text: str) -> str:
+        """对条款进行分类
+
+        Args:
+            clause_text: 条款文本
+
+        Returns:
+            条款类型
+        """
+        best = len(self.clause_types)
+
+        if self.keyword_regex is not None:
+            search = self.keyword_regex.search
+            match = search(clause_text)
+            while match is not None and best > 0:
+                position = match.start()
+                for index, verifier in self.candidates[match.lastgroup]:
+                    if index >= best:
+                        break
+                    if verifier is None or verifier.match(clause_text, position):
+                        best = index
+                        break
+                # 从下一个字符继续，避免重叠的关键词被跳过
+                match = search(clause_text, position + 1)
+
+        for index, compiled in self.standalone:
+            if index >= best:
+                break
+            if compiled.search(clause_text):
+                best = index
+                break
+
+        if best < len(self.clause_types):
+            return self.clause_types[best]
+        return DEFAULT_CLAUSE_TYPE
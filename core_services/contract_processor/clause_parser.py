@@ -1,33 +1,106 @@
+import os
 import re
 import pandas as pd
-from typing import List, Dict, Any
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from common.logger import get_logger
+from core_services.contract_processor.clause_classifier import ClauseClassifier, DEFAULT_CLAUSE_PATTERNS
+from core_services.contract_processor.rule_loader import load_compiled_rules, read_rule_patterns
+from core_services.contract_processor.rule_registry import ClauseRuleRegistry
 
 logger = get_logger(__name__)
 
+# 条款标题模式，假设条款以"第X条"或数字编号开头
+CLAUSE_HEADING_PATTERN = re.compile(r"第[一二三四五六七八九十\d]+条|[一二三四五六七八九十\d]+\.\s")
+
+# 金额模式，依次匹配人民币和美元金额
+AMOUNT_PATTERNS = [
+    re.compile(r"(?P<currency>人民币|RMB|￥)\s*(?P<value>[\d,]+\.?\d*)\s*(?P<unit>元|万元|亿元)?"),
+    re.compile(r"(?P<currency>\$|USD)\s*(?P<value>[\d,]+\.?\d*)\s*(?P<unit>dollars|美元)?")
+]
+
+# 金额单位换算倍数，未列出的单位按1计算
+UNIT_MULTIPLIERS = {
+    "万元": 10000,
+    "亿元": 100000000
+}
+
+AMOUNT_COLUMNS = ["clause_id", "currency", "value", "unit", "original", "offset"]
+
+# 批量解析时每个工作进程持有的解析器，由进程池初始化函数创建
+_worker_parser = None
+
 class ClauseParser:
     """合同条款解析器，负责从合同文本中提取和分类条款"""
     
-    def __init__(self, knowledge_base_path: str = None):
+    def __init__(self, knowledge_base_path: str = None, rule_cache_dir: str = None,
+                 rule_registry: ClauseRuleRegistry = None):
         """初始化条款解析器
         
         Args:
             knowledge_base_path: 知识库路径，包含条款分类规则
+            rule_cache_dir: 编译规则缓存目录，默认使用配置中的目录
+            rule_registry: 共享规则注册表，提供时始终使用注册表中的最新规则
         """
-        self.clause_patterns = {
-            "价格条款": r"价格|费用|报酬|金额|付款|￥|\$|人民币|美元",
-            "交付条款": r"交付|交货|运输|物流|配送|到货",
-            "违约责任": r"违约|赔偿|罚款|责任|索赔|争议",
-            "保密条款": r"保密|机密|秘密|信息安全|数据保护",
-            "合同期限": r"期限|有效期|终止|解除|到期|续约"
-        }
+        self.clause_patterns = dict(DEFAULT_CLAUSE_PATTERNS)
+        self.classifier = None
+        self.rule_registry = rule_registry
         
-        # 如果提供了知识库路径，从知识库加载更多规则
+        if rule_registry is not None:
+            rule_set = rule_registry.current
+            # 复制一份，避免修改解析器的模式时改动注册表中共享的规则集
+            self.clause_patterns = dict(rule_set.clause_patterns)
+            self.classifier = rule_set.classifier
+            return
+        
+        # 如果提供了知识库路径，从知识库加载更多规则，编译结果按文件内容缓存
         if knowledge_base_path:
             try:
-                self._load_patterns_from_knowledge_base(knowledge_base_path)
+                self.clause_patterns, self.classifier = load_compiled_rules(
+                    knowledge_base_path, self.clause_patterns, rule_cache_dir
+                )
             except Exception as e:
                 logger.error(f"加载知识库失败: {str(e)}")
+        
+        # 预编译全部条款模式
+        if self.classifier is None:
+            self.rebuild_classifier()
+    
+    def rebuild_classifier(self):
+        """根据当前条款模式重新编译分类器
+        
+        修改 clause_patterns 后需要调用此方法使新模式生效
+        """
+        self.classifier = ClauseClassifier(self.clause_patterns)
+    
+    @classmethod
+    def from_compiled(cls, clause_patterns: Dict[str, str],
+                      classifier: ClauseClassifier) -> "ClauseParser":
+        """使用已编译的分类器创建解析器，不重新加载和编译规则
+        
+        Args:
+            clause_patterns: 条款模式
+            classifier: 与条款模式对应的已编译分类器
+            
+        Returns:
+            条款解析器
+        """
+        parser = cls.__new__(cls)
+        parser.clause_patterns = dict(clause_patterns)
+        parser.classifier = classifier
+        parser.rule_registry = None
+        return parser
+    
+    def _active_classifier(self) -> ClauseClassifier:
+        """获取当前生效的分类器
+        
+        Returns:
+            使用规则注册表时返回注册表当前版本的分类器，否则返回自身的分类器
+        """
+        if self.rule_registry is not None:
+            return self.rule_registry.current.classifier
+        return self.classifier
     
     def _load_patterns_from_knowledge_base(self, kb_path: str):
         """从知识库加载条款模式
@@ -36,10 +109,7 @@ class ClauseParser:
             kb_path: 知识库文件路径
         """
         try:
-            kb_data = pd.read_csv(kb_path)
-            for _, row in kb_data.iterrows():
-                if 'clause_type' in row and 'pattern' in row:
-                    self.clause_patterns[row['clause_type']] = row['pattern']
+            self.clause_patterns.update(read_rule_patterns(kb_path))
         except Exception as e:
             logger.error(f"从知识库加载条款模式失败: {str(e)}")
             raise
@@ -53,28 +123,77 @@ class ClauseParser:
         Returns:
             提取的条款列表，每个条款包含类型、内容和位置信息
         """
-        clauses = []
+        return list(self.iter_clauses(text))
+    
+    def iter_clauses(self, text: str) -> Iterator[Dict[str, Any]]:
+        """逐条切分并分类条款
         
-        # 简单的条款分隔模式，假设条款以数字编号开头
-        clause_split_pattern = r"第[一二三四五六七八九十\d]+条|[一二三四五六七八九十\d]+\.\s"
-        potential_clauses = re.split(clause_split_pattern, text)
+        基于 finditer 定位条款标题，按标题之间的区间切分，位置直接由匹配
+        偏移计算，重复的条款文本也能得到各自的准确位置。以生成器形式逐条
+        返回，处理大型合同时无需一次性保存全部条款。
         
-        # 移除空白条款
-        potential_clauses = [c.strip() for c in potential_clauses if c.strip()]
+        Args:
+            text: 合同文本
+            
+        Yields:
+            条款字典，包含编号、类型、内容、标题和位置信息
+        """
+        # 整份合同使用同一版本的规则，规则热更新不会导致前后分类不一致
+        classifier = self._active_classifier()
+        clause_id = 0
+        heading = None
+        segment_start = 0
+        
+        for match in CLAUSE_HEADING_PATTERN.finditer(text):
+            clause = self._build_clause(text, segment_start, match.start(), heading,
+                                        clause_id + 1, classifier)
+            if clause is not None:
+                clause_id += 1
+                yield clause
+            heading = match
+            segment_start = match.end()
+        
+        clause = self._build_clause(text, segment_start, len(text), heading,
+                                    clause_id + 1, classifier)
+        if clause is not None:
+            yield clause
+    
+    def _build_clause(self, text: str, start: int, end: int, heading: Optional[re.Match],
+                      clause_id: int, classifier: ClauseClassifier) -> Optional[Dict[str, Any]]:
+        """根据标题之间的区间构建条款
         
-        for i, clause_text in enumerate(potential_clauses):
-            clause_type = self._classify_clause(clause_text)
-            clauses.append({
-                "id": i + 1,
-                "type": clause_type,
-                "content": clause_text,
-                "position": {
-                    "start": text.find(clause_text),
-                    "end": text.find(clause_text) + len(clause_text)
-                }
-            })
+        Args:
+            text: 合同文本
+            start: 区间起始偏移
+            end: 区间结束偏移
+            heading: 区间前的条款标题匹配，首个标题之前的内容为None
+            clause_id: 条款编号
+            classifier: 条款分类器
+            
+        Returns:
+            条款字典，区间内容为空白时返回None
+        """
+        segment = text[start:end]
+        clause_text = segment.strip()
+        if not clause_text:
+            return None
         
-        return clauses
+        content_start = start + len(segment) - len(segment.lstrip())
+        heading_text = heading.group().rstrip() if heading is not None else None
+        return {
+            "id": clause_id,
+            "type": classifier.classify(clause_text),
+            "content": clause_text,
+            "heading": {
+                "text": heading_text,
+                "start": heading.start(),
+                "end": heading.start() + len(heading_text)
+            } if heading is not None else None,
+            "position": {
+                "start": content_start,
+                "end": content_start + len(clause_text)
+            }
+        }
     
     def _classify_clause(self, clause_text: str) -> str:
         """对条款进行分类
@@ -85,11 +204,7 @@ class ClauseParser:
         Returns:
             条款类型
         """
-        for clause_type, pattern in self.clause_patterns.items():
-            if re.search(pattern, clause_text, re.IGNORECASE):
-                return clause_type
-        
-        return "其他条款"  # 默认分类
+        return self._active_classifier().classify(clause_text)
     
     def analyze_price_clauses(self, clauses: List[Dict[str, Any]]) -> Dict[str, Any]:
         """分析价格条款
@@ -106,36 +221,8 @@ class ClauseParser:
             return {"found": False, "message": "未找到价格条款"}
         
         # 提取金额
-        amounts = []
-        for clause in price_clauses:
-            # 匹配金额模式
-            amount_patterns = [
-                r"(人民币|RMB|￥)\s*([\d,]+\.?\d*)\s*(元|万元|亿元)?",
-                r"(\$|USD)\s*([\d,]+\.?\d*)\s*(dollars|美元)?"
-            ]
-            
-            for pattern in amount_patterns:
-                matches = re.findall(pattern, clause["content"])
-                for match in matches:
-                    currency = match[0]
-                    value = match[1].replace(',', '')
-                    unit = match[2] if len(match) > 2 else ""
-                    
-                    try:
-                        amount = float(value)
-                        # 处理单位转换
-                        if unit == "万元":
-                            amount *= 10000
-                        elif unit == "亿元":
-                            amount *= 100000000
-                            
-                        amounts.append({
-                            "currency": currency,
-                            "value": amount,
-                            "original": f"{currency}{value}{unit}"
-                        })
-                    except ValueError:
-                        logger.warning(f"无法解析金额: {match}")
+        amount_table = self.extract_price_amounts(price_clauses)
+        amounts = amount_table[["currency", "value", "original"]].to_dict("records")
         
         return {
             "found": True,
@@ -143,3 +230,189 @@ class ClauseParser:
             "amounts": amounts,
             "clauses": price_clauses
         }
+    
+    def extract_price_amounts(self, clauses: List[Dict[str, Any]]) -> pd.DataFrame:
+        """批量提取条款中的金额并归一化
+        
+        预编译的金额模式在一次遍历中收集全部条款的匹配列，数值解析和
+        万元/亿元单位换算在 pandas 中按列完成。pandas 的 str.extractall
+        不返回匹配偏移，因此匹配阶段直接使用 finditer。
+        
+        Args:
+            clauses: 条款列表，通常为同一批次的价格条款
+            
+        Returns:
+            金额表，列为 clause_id、currency、value（归一化为元）、unit、
+            original 和 offset（金额在合同文本中的起始偏移）
+        """
+        columns = {"clause_id": [], "currency": [], "raw_value": [], "unit": [], "offset": []}
+        for clause in clauses:
+            content = clause["content"]
+            base_offset = clause.get("position", {}).get("start", 0)
+            for pattern in AMOUNT_PATTERNS:
+                for match in pattern.finditer(content):
+                    columns["clause_id"].append(clause.get("id"))
+                    columns["currency"].append(match.group("currency"))
+                    columns["raw_value"].append(match.group("value"))
+                    columns["unit"].append(match.group("unit") or "")
+                    columns["offset"].append(base_offset + match.start())
+        
+        table = pd.DataFrame(columns)
+        if table.empty:
+            return pd.DataFrame(columns=AMOUNT_COLUMNS)
+        
+        value_text = table["raw_value"].str.replace(",", "", regex=False)
+        multipliers = table["unit"].map(UNIT_MULTIPLIERS).fillna(1)
+        table["value"] = pd.to_numeric(value_text, errors="coerce") * multipliers
+        table["original"] = table["currency"] + value_text + table["unit"]
+        
+        invalid = table["value"].isna()
+        if invalid.any():
+            for original in table.loc[invalid, "original"]:
+                logger.warning(f"无法解析金额: {original}")
+            table = table[~invalid].reset_index(drop=True)
+        
+        return table[AMOUNT_COLUMNS]
+    
+    def parse_document(self, text: str) -> Dict[str, Any]:
+        """解析单份合同，提取条款并分析价格条款
+        
+        Args:
+            text: 合同文本
+            
+        Returns:
+            解析结果，包含条款列表和价格条款分析
+        """
+        clauses = self.extract_clauses(text)
+        return {
+            "clauses": clauses,
+            "price_analysis": self.analyze_price_clauses(clauses)
+        }
+    
+    def parse_many(self, texts: Iterable[str], workers: int = None,
+                   chunksize: int = 8) -> Iterator[Dict[str, Any]]:
+        """使用多进程批量解析合同
+        
+        已编译的条款规则通过进程池初始化函数在每个工作进程中只传递一次，
+        合同按 chunksize 分批提交。结果按输入顺序流式返回，同时最多保留
+        workers * 4 个批次在途，单份合同解析失败不影响其他合同。
+        
+        Args:
+            texts: 合同文本序列
+            workers: 工作进程数，默认使用CPU核数，小于等于1时在当前进程中解析
+            chunksize: 每个任务包含的合同数量
+            
+        Yields:
+            解析结果，包含输入序号 index；失败时包含 error 和 message
+        """
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, chunksize)
+        
+        if workers <= 1:
+            for index, text in enumerate(texts):
+                yield _parse_with_isolation(self, index, text)
+            return
+        
+        if self.rule_registry is not None:
+            rule_set = self.rule_registry.current
+            clause_patterns, classifier = rule_set.clause_patterns, rule_set.classifier
+        else:
+            clause_patterns, classifier = self.clause_patterns, self.classifier
+        
+        max_pending = workers * 4
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_worker,
+            initargs=(clause_patterns, classifier)
+        ) as executor:
+            pending = deque()
+            for chunk in _iter_chunks(texts, chunksize):
+                pending.append((chunk, executor.submit(_parse_chunk, chunk)))
+                if len(pending) >= max_pending:
+                    yield from _collect_chunk(*pending.popleft())
+            
+            while pending:
+                yield from _collect_chunk(*pending.popleft())
+
+
+def _init_parse_worker(clause_patterns: Dict[str, str], classifier: ClauseClassifier):
+    """进程池初始化函数，在工作进程中创建解析器
+    
+    Args:
+        clause_patterns: 条款模式
+        classifier: 已编译的分类器
+    """
+    global _worker_parser
+    _worker_parser = ClauseParser.from_compiled(clause_patterns, classifier)
+
+
+def _parse_with_isolation(parser: ClauseParser, index: int, text: str) -> Dict[str, Any]:
+    """解析单份合同，捕获异常并转换为错误结果
+    
+    Args:
+        parser: 条款解析器
+        index: 输入序号
+        text: 合同文本
+        
+    Returns:
+        解析结果
+    """
+    try:
+        return {"index": index, **parser.parse_document(text)}
+    except Exception as e:
+        logger.error(f"解析第{index}份合同失败: {str(e)}")
+        return {
+            "index": index,
+            "error": True,
+            "message": str(e)
+        }
+
+
+def _parse_chunk(chunk: List[tuple]) -> List[Dict[str, Any]]:
+    """在工作进程中解析一批合同
+    
+    Args:
+        chunk: (输入序号, 合同文本) 列表
+        
+    Returns:
+        解析结果列表
+    """
+    return [_parse_with_isolation(_worker_parser, index, text) for index, text in chunk]
+
+
+def _iter_chunks(texts: Iterable[str], chunksize: int) -> Iterator[List[tuple]]:
+    """将合同文本按批次分组
+    
+    Args:
+        texts: 合同文本序列
+        chunksize: 每批数量
+        
+    Yields:
+        (输入序号, 合同文本) 列表
+    """
+    chunk = []
+    for index, text in enumerate(texts):
+        chunk.append((index, text))
+        if len(chunk) >= chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _collect_chunk(chunk: List[tuple], future) -> Iterator[Dict[str, Any]]:
+    """获取一批合同的解析结果，工作进程异常时为该批每份合同返回错误
+    
+    Args:
+        chunk: (输入序号, 合同文本) 列表
+        future: 该批次的任务
+        
+    Yields:
+        解析结果
+    """
+    try:
+        results = future.result()
+    except Exception as e:
+        logger.error(f"批量解析任务失败: {str(e)}")
+        results = [{"index": index, "error": True, "message": str(e)} for index, _ in chunk]
+    yield from results
@@ -0,0 +1,389 @@
+import os
+import json
+import threading
+from difflib import SequenceMatcher
+from typing import Any, Callable, Dict, List, Tuple
+from common.logger import get_logger
+from common.config import get_config, get_model_version
+from common.utils import hash_text, normalize_text, load_json, format_timestamp
+from core_services.contract_processor.clause_parser import ClauseParser
+from core_services.contract_processor.rule_loader import compute_rules_hash
+from core_services.contract_processor.rule_registry import get_rule_registry
+
+logger = get_logger(__name__)
+config = get_config()
+
+ClauseReviewer = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# 按存储文件路径分段的锁，同一合同的读取、比对、审查和保存串行执行，
+# 锁的数量固定，不随合同数增长
+_LOCK_STRIPES = 64
+_path_locks = [threading.RLock() for _ in range(_LOCK_STRIPES)]
+
+
+def clause_hash(clause: Dict[str, Any]) -> str:
+    """计算条款内容哈希
+
+    只使用规范化后的条款正文，不含条款编号，插入或删除条款导致的
+    重新编号不会让后续条款被误判为修改。
+
+    Args:
+        clause: 条款字典
+
+    Returns:
+        哈希字符串
+    """
+    return hash_text(normalize_text(clause["content"]))
+
+
+class ClauseReviewStore:
+    """条款审查结果存储，按合同ID保存最近一次审查的条款哈希和结果"""
+
+    def __init__(self, base_path: str = None, namespace: str = None):
+        """初始化存储
+
+        Args:
+            base_path: 存储目录，默认读取配置
+            namespace: 子目录名称，各审查阶段分别保存各自的审查记录
+        """
+        self.base_path = base_path or config.get("incremental_review", {}).get(
+            "store_path", "data/reviews"
+        )
+        if namespace:
+            self.base_path = os.path.join(self.base_path, namespace)
+
+    def _path(self, contract_id: str) -> str:
+        """获取合同的存储文件路径
+
+        Args:
+            contract_id: 合同ID
+
+        Returns:
+            文件路径
+        """
+        return os.path.join(self.base_path, f"{hash_text(contract_id)}.json")
+
+    def lock(self, contract_id: str) -> threading.RLock:
+        """获取合同的存储锁
+
+        同一进程内处理同一合同的各个代理实例共用此锁，持有期间完成
+        读取、比对、审查和保存，避免并发处理两个修订版本时丢失更新。
+
+        Args:
+            contract_id: 合同ID
+
+        Returns:
+            可重入锁
+        """
+        return _path_locks[int(hash_text(self._path(contract_id))[:8], 16) % _LOCK_STRIPES]
+
+    def exists(self, contract_id: str) -> bool:
+        """合同是否已有审查记录
+
+        Args:
+            contract_id: 合同ID
+
+        Returns:
+            是否存在
+        """
+        return os.path.exists(self._path(contract_id))
+
+    def load(self, contract_id: str) -> Dict[str, Any]:
+        """加载合同上一版本的审查记录
+
+        Args:
+            contract_id: 合同ID
+
+        Returns:
+            审查记录，不存在时返回空字典
+        """
+        path = self._path(contract_id)
+        if not os.path.exists(path):
+            return {}
+        return load_json(path)
+
+    def save(self, contract_id: str, record: Dict[str, Any]) -> bool:
+        """保存合同本版本的审查记录
+
+        Args:
+            contract_id: 合同ID
+            record: 审查记录
+
+        Returns:
+            是否成功保存
+        """
+        path = self._path(contract_id)
+        # 先写临时文件再替换，其他进程不会读到写了一半的记录
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.base_path, exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, path)
+            return True
+        except Exception as e:
+            logger.error(f"保存合同{contract_id}的审查记录失败: {str(e)}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+
+class IncrementalReviewer:
+    """条款级增量审查器
+
+    将新版本合同与已存储的上一版本按条款做差异比对，只有新增或修改的
+    条款重新经过审查函数（如风险分析、法律建议），未变化条款直接复用
+    上一版本的结果。每条审查结果记录审查时的规则哈希和模型版本，
+    规则或模型更新后未变化条款也会重新审查。
+    """
+
+    def __init__(self, clause_reviewers: Dict[str, ClauseReviewer],
+                 clause_parser: ClauseParser = None, store: ClauseReviewStore = None,
+                 model_version: Callable[[], str] = None):
+        """初始化增量审查器
+
+        Args:
+            clause_reviewers: 审查名称到单条款审查函数的映射，例如
+                {"risk": ..., "legal": ...}
+            clause_parser: 条款解析器，默认与结果缓存使用同一份条款规则
+            store: 审查结果存储
+            model_version: 返回当前模型版本的函数，默认读取 model_services 配置
+        """
+        self.clause_reviewers = clause_reviewers
+        self.clause_parser = clause_parser or default_clause_parser()
+        self.store = store or ClauseReviewStore()
+        self.model_version = model_version or get_model_version
+
+    def _current_versions(self) -> Dict[str, str]:
+        """获取当前的规则哈希和模型版本
+
+        Returns:
+            包含 rules、model 的版本字典
+        """
+        registry = self.clause_parser.rule_registry
+        rules_hash = (registry.content_hash if registry is not None
+                      else compute_rules_hash(self.clause_parser.clause_patterns))
+        return {"rules": rules_hash, "model": self.model_version()}
+
+    def _review_clause(self, clause: Dict[str, Any]) -> Dict[str, Any]:
+        """对单个条款运行全部审查函数
+
+        Args:
+            clause: 条款字典
+
+        Returns:
+            审查名称到审查结果的映射
+        """
+        results = {}
+        for name, reviewer in self.clause_reviewers.items():
+            try:
+                results[name] = reviewer(clause)
+            except Exception as e:
+                logger.error(f"条款{clause['id']}的{name}审查失败: {str(e)}")
+                results[name] = {"error": True, "message": str(e)}
+        return results
+
+    def _parse(self, contract_text: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """切分合同条款并计算条款哈希
+
+        Args:
+            contract_text: 合同文本
+
+        Returns:
+            (条款列表, 条款哈希列表)
+        """
+        clauses = list(self.clause_parser.iter_clauses(contract_text))
+        return clauses, [clause_hash(clause) for clause in clauses]
+
+    def _save(self, contract_id: str, previous: Dict[str, Any], clauses: List[Dict[str, Any]],
+              hashes: List[str], versions: Dict[str, str]) -> int:
+        """保存本版本的条款哈希和审查结果
+
+        Args:
+            contract_id: 合同ID
+            previous: 上一版本的审查记录
+            clauses: 本版本条款，review 为 None 表示尚未逐条审查
+            hashes: 条款哈希
+            versions: 审查时的规则哈希和模型版本
+
+        Returns:
+            本版本的版本号
+        """
+        version = previous.get("version", 0) + 1
+        self.store.save(contract_id, {
+            "contract_id": contract_id,
+            "version": version,
+            "updated_at": format_timestamp(),
+            "clauses": [
+                {
+                    "hash": hashes[index],
+                    "clause": {k: v for k, v in clause.items() if k not in ("status", "review")},
+                    "review": clause.get("review"),
+                    "versions": versions
+                }
+                for index, clause in enumerate(clauses)
+            ]
+        })
+        return version
+
+    def record(self, contract_id: str, contract_text: str) -> int:
+        """只登记合同版本的条款哈希，不逐条审查
+
+        首个版本由代理做整份合同的分析，这里只记录条款供下一版本比对，
+        未修订的合同不需要额外的逐条审查。下一版本中未变化的条款届时
+        再审查一次（计入 pending），之后即可复用。
+
+        Args:
+            contract_id: 合同ID
+            contract_text: 本版本合同文本
+
+        Returns:
+            本版本的版本号
+        """
+        with self.store.lock(contract_id):
+            previous = self.store.load(contract_id)
+            clauses, hashes = self._parse(contract_text)
+            return self._save(contract_id, previous, clauses, hashes, self._current_versions())
+
+    def review(self, contract_id: str, contract_text: str) -> Dict[str, Any]:
+        """增量审查合同
+
+        同一合同的读取、比对、审查和保存在合同的存储锁内完成，同时处理
+        两个修订版本时依次进行，后一个版本与前一个版本比对。
+
+        Args:
+            contract_id: 合同ID，同一合同的各个版本使用相同ID
+            contract_text: 本版本合同文本
+
+        Returns:
+            审查结果，包含带审查结果和变更状态的条款列表、被修改条款的旧版本、
+            已删除条款及汇总
+        """
+        with self.store.lock(contract_id):
+            return self._review(contract_id, contract_text)
+
+    def _review(self, contract_id: str, contract_text: str) -> Dict[str, Any]:
+        """增量审查合同，调用方持有合同的存储锁
+
+        Args:
+            contract_id: 合同ID
+            contract_text: 本版本合同文本
+
+        Returns:
+            审查结果
+        """
+        previous = self.store.load(contract_id)
+        previous_entries = previous.get("clauses", [])
+        versions = self._current_versions()
+        clauses, hashes = self._parse(contract_text)
+
+        reviewed_clauses: List[Dict[str, Any]] = [None] * len(clauses)
+        replaced = []
+        removed = []
+        summary = {"unchanged": 0, "modified": 0, "added": 0, "removed": 0,
+                   "retried": 0, "stale": 0, "pending": 0}
+
+        # 关闭 autojunk，重复出现的模板条款也参与比对
+        matcher = SequenceMatcher(None, [entry["hash"] for entry in previous_entries],
+                                  hashes, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                for offset in range(j2 - j1):
+                    entry = previous_entries[i1 + offset]
+                    review = entry.get("review")
+                    # 上一版本只登记了条款哈希，尚未逐条审查
+                    if review is None:
+                        review = self._review_clause(clauses[j1 + offset])
+                        summary["pending"] += 1
+                    # 上一版本审查失败的条款不复用，重新审查
+                    elif any(isinstance(r, dict) and r.get("error") for r in review.values()):
+                        review = self._review_clause(clauses[j1 + offset])
+                        summary["retried"] += 1
+                    # 审查后规则或模型已更新的条款不复用，重新审查
+                    elif entry.get("versions") != versions:
+                        review = self._review_clause(clauses[j1 + offset])
+                        summary["stale"] += 1
+                    reviewed_clauses[j1 + offset] = {
+                        **clauses[j1 + offset],
+                        "status": "unchanged",
+                        "review": review
+                    }
+                summary["unchanged"] += j2 - j1
+                continue
+
+            if tag == "replace":
+                replaced.extend(entry["clause"] for entry in previous_entries[i1:i2])
+            elif tag == "delete":
+                removed.extend(entry["clause"] for entry in previous_entries[i1:i2])
+            if tag in ("replace", "insert"):
+                status = "modified" if tag == "replace" else "added"
+                for index in range(j1, j2):
+                    reviewed_clauses[index] = {
+                        **clauses[index],
+                        "status": status,
+                        "review": self._review_clause(clauses[index])
+                    }
+                summary[status] += j2 - j1
+
+        summary["removed"] = len(removed)
+        summary["total"] = len(clauses)
+        summary["reviewed"] = (summary["modified"] + summary["added"] + summary["retried"]
+                               + summary["stale"] + summary["pending"])
+
+        version = self._save(contract_id, previous, reviewed_clauses, hashes, versions)
+
+        logger.info(f"合同{contract_id}第{version}版增量审查完成: 共{summary['total']}条，"
+                    f"复用{summary['total'] - summary['reviewed']}条，重新审查{summary['reviewed']}条")
+        return {
+            "contract_id": contract_id,
+            "version": version,
+            "previous_version": previous.get("version"),
+            "clauses": reviewed_clauses,
+            "replaced_clauses": replaced,
+            "removed_clauses": removed,
+            "versions": versions,
+            "summary": summary
+        }
+
+
+def group_clause_results(incremental_review: Dict[str, Any], name: str) -> Dict[str, List[Dict[str, Any]]]:
+    """按字段汇总各条款某一审查函数的结果
+
+    审查函数返回字段到结果的字典，例如 {"legal_risks": ..., "legal_advice": ...}，
+    汇总后每个字段对应按条款顺序排列的列表；审查失败的条款放入 failed_clauses。
+
+    Args:
+        incremental_review: IncrementalReviewer.review 的返回结果
+        name: 审查名称
+
+    Returns:
+        字段到条款结果列表的映射，列表项包含 clause_id、status 和 result
+    """
+    grouped: Dict[str, List[Dict[str, Any]]] = {"failed_clauses": []}
+    for clause in incremental_review.get("clauses", []):
+        result = clause["review"].get(name) or {}
+        if result.get("error"):
+            grouped["failed_clauses"].append({"clause_id": clause["id"], "message": result.get("message")})
+            continue
+        for field, value in result.items():
+            grouped.setdefault(field, []).append({
+                "clause_id": clause["id"],
+                "status": clause["status"],
+                "result": value
+            })
+    return grouped
+
+
+def default_clause_parser() -> ClauseParser:
+    """创建默认条款解析器
+
+    配置了 clause_parser.knowledge_base_path 时使用该知识库的共享规则注册表，
+    与结果缓存的 rules 版本保持一致。
+
+    Returns:
+        条款解析器
+    """
+    knowledge_base_path = config.get("clause_parser", {}).get("knowledge_base_path")
+    if knowledge_base_path:
+        return ClauseParser(rule_registry=get_rule_registry(knowledge_base_path))
+    return ClauseParser()
@@ -0,0 +1,141 @@
+import io
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+from typing import Dict, Tuple
+from common.logger import get_logger
+from common.config import get_config
+from core_services.contract_processor.clause_classifier import ClauseClassifier
+
+logger = get_logger(__name__)
+config = get_config()
+
+# 缓存格式版本，分类器结构变化时递增以使旧缓存失效
+RULE_CACHE_VERSION = 3
+
+REQUIRED_COLUMNS = ("clause_type", "pattern")
+
+
+def get_rule_cache_dir() -> str:
+    """获取编译规则缓存目录
+
+    Returns:
+        缓存目录路径
+    """
+    return config.get("clause_parser", {}).get("rule_cache_dir", "data/cache/clause_rules")
+
+
+def parse_rule_patterns(kb_data: pd.DataFrame) -> Dict[str, str]:
+    """从知识库数据中提取条款模式
+
+    列校验只做一次，模式映射按列一次性构建。同一条款类型出现多次时
+    以最后一行为准。
+
+    Args:
+        kb_data: 知识库数据
+
+    Returns:
+        条款类型到模式的映射
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in kb_data.columns]
+    if missing:
+        raise ValueError(f"知识库缺少必要列: {', '.join(missing)}")
+
+    rules = kb_data[list(REQUIRED_COLUMNS)].dropna()
+    return dict(zip(rules["clause_type"].astype(str), rules["pattern"].astype(str)))
+
+
+def read_rule_patterns(kb_path: str) -> Dict[str, str]:
+    """读取知识库文件中的条款模式
+
+    Args:
+        kb_path: 知识库文件路径
+
+    Returns:
+        条款类型到模式的映射
+    """
+    return parse_rule_patterns(pd.read_csv(kb_path))
+
+
+def _rule_cache_key(content: bytes, base_patterns: Dict[str, str]) -> str:
+    """根据知识库内容和内置模式计算缓存键
+
+    Args:
+        content: 知识库文件内容
+        base_patterns: 内置条款模式
+
+    Returns:
+        缓存键
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{RULE_CACHE_VERSION}".encode("utf-8"))
+    digest.update(json.dumps(base_patterns, ensure_ascii=False).encode("utf-8"))
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def compute_rules_hash(clause_patterns: Dict[str, str]) -> str:
+    """计算条款模式的内容哈希
+
+    哈希只取决于合并后的模式及其顺序，与加载次数和进程无关，
+    重启后相同的规则得到相同的哈希，可作为结果缓存等的规则版本。
+
+    Args:
+        clause_patterns: 条款类型到模式的有序映射
+
+    Returns:
+        sha256 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(clause_patterns.items()), ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_compiled_rules(kb_path: str, base_patterns: Dict[str, str],
+                        cache_dir: str = None) -> Tuple[Dict[str, str], ClauseClassifier]:
+    """加载知识库规则并编译分类器，优先使用磁盘缓存
+
+    缓存以知识库文件内容哈希为键，命中时直接反序列化合并后的模式和
+    分类器，跳过 CSV 解析、分支拆分和前缀树构建。
+
+    Args:
+        kb_path: 知识库文件路径
+        base_patterns: 内置条款模式，知识库模式在其基础上覆盖或追加
+        cache_dir: 缓存目录，默认使用配置中的目录
+
+    Returns:
+        (合并后的条款模式, 已编译的分类器)
+    """
+    cache_dir = cache_dir or get_rule_cache_dir()
+
+    with open(kb_path, "rb") as f:
+        content = f.read()
+
+    cache_path = os.path.join(cache_dir, f"{_rule_cache_key(content, base_patterns)}.pkl")
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                clause_patterns, classifier = pickle.load(f)
+            logger.info(f"从缓存加载条款规则: {cache_path}")
+            return clause_patterns, classifier
+        except Exception as e:
+            logger.warning(f"读取条款规则缓存失败，重新编译: {str(e)}")
+
+    clause_patterns = dict(base_patterns)
+    clause_patterns.update(parse_rule_patterns(pd.read_csv(io.BytesIO(content))))
+    classifier = ClauseClassifier(clause_patterns)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # 先写临时文件再替换，避免并发启动的进程读到不完整的缓存
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump((clause_patterns, classifier), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+        logger.info(f"条款规则已缓存: {cache_path}")
+    except Exception as e:
+        logger.warning(f"写入条款规则缓存失败: {str(e)}")
+
+    return clause_patterns, classifier
@@ -0,0 +1,216 @@
+import os
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional
+from common.logger import get_logger
+from common.config import get_config
+from core_services.contract_processor.clause_classifier import ClauseClassifier, DEFAULT_CLAUSE_PATTERNS
+from core_services.contract_processor.rule_loader import compute_rules_hash, load_compiled_rules
+
+logger = get_logger(__name__)
+config = get_config()
+
+# 进程内共享的规则注册表，按知识库绝对路径索引
+_registries: Dict[str, "ClauseRuleRegistry"] = {}
+_registries_lock = threading.Lock()
+
+
+class RuleSet:
+    """已编译的条款规则集快照，创建后不再修改"""
+
+    def __init__(self, version: int, clause_patterns: Dict[str, str], classifier: ClauseClassifier,
+                 compiled_at: datetime, compile_seconds: float):
+        """初始化规则集
+
+        Args:
+            version: 进程内的规则版本号，每次成功加载递增，重启后从头计数
+            clause_patterns: 条款模式
+            classifier: 已编译的分类器
+            compiled_at: 编译完成时间
+            compile_seconds: 编译耗时（秒）
+        """
+        self.version = version
+        self.clause_patterns = clause_patterns
+        # 规则内容哈希，跨进程和重启保持稳定
+        self.content_hash = compute_rules_hash(clause_patterns)
+        self.classifier = classifier
+        self.compiled_at = compiled_at
+        self.compile_seconds = compile_seconds
+
+
+class ClauseRuleRegistry:
+    """条款规则注册表，监视知识库文件并在后台热加载规则
+
+    新规则在后台线程中完整编译后，通过一次引用赋值替换当前规则集。
+    读取方通过 current 获取快照，既不会看到加载了一半的规则，也不会
+    因重新编译而阻塞。
+    """
+
+    def __init__(self, knowledge_base_path: str, base_patterns: Dict[str, str] = None,
+                 poll_interval: float = None, cache_dir: str = None):
+        """初始化规则注册表并同步加载第一版规则
+
+        Args:
+            knowledge_base_path: 知识库文件路径
+            base_patterns: 内置条款模式，默认使用 DEFAULT_CLAUSE_PATTERNS
+            poll_interval: 检查文件变更的间隔（秒），默认读取配置
+            cache_dir: 编译规则缓存目录
+        """
+        registry_config = config.get("clause_parser", {})
+        self.knowledge_base_path = knowledge_base_path
+        self.base_patterns = dict(base_patterns or DEFAULT_CLAUSE_PATTERNS)
+        self.poll_interval = poll_interval or registry_config.get("rule_poll_interval", 5)
+        self.cache_dir = cache_dir
+
+        self._current: Optional[RuleSet] = None
+        self._file_signature = None
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+        if not self.reload():
+            # 知识库不可用时仍以内置规则启动，后续文件恢复后自动加载
+            self._current = self._compile_base_patterns()
+
+    @property
+    def current(self) -> RuleSet:
+        """当前生效的规则集快照"""
+        return self._current
+
+    @property
+    def version(self) -> int:
+        """当前规则在本进程内的版本号"""
+        return self._current.version
+
+    @property
+    def content_hash(self) -> str:
+        """当前规则的内容哈希"""
+        return self._current.content_hash
+
+    def _compile_base_patterns(self) -> RuleSet:
+        """仅使用内置模式编译规则集
+
+        Returns:
+            规则集
+        """
+        start = time.perf_counter()
+        classifier = ClauseClassifier(self.base_patterns)
+        return RuleSet(0, dict(self.base_patterns), classifier, datetime.now(),
+                       time.perf_counter() - start)
+
+    def _read_file_signature(self) -> Optional[tuple]:
+        """读取知识库文件的修改时间和大小
+
+        Returns:
+            文件签名，文件不存在时返回None
+        """
+        try:
+            stat = os.stat(self.knowledge_base_path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def reload(self) -> bool:
+        """重新加载并编译知识库规则，成功后原子替换当前规则集
+
+        Returns:
+            是否成功加载
+        """
+        with self._reload_lock:
+            signature = self._read_file_signature()
+            start = time.perf_counter()
+            try:
+                clause_patterns, classifier = load_compiled_rules(
+                    self.knowledge_base_path, self.base_patterns, self.cache_dir
+                )
+            except Exception as e:
+                # 记录签名，同一份有问题的文件不再反复编译
+                self._file_signature = signature
+                logger.error(f"加载条款规则失败，继续使用当前规则: {str(e)}")
+                return False
+
+            version = self._current.version + 1 if self._current else 1
+            self._current = RuleSet(version, clause_patterns, classifier, datetime.now(),
+                                    time.perf_counter() - start)
+            self._file_signature = signature
+            logger.info(f"条款规则已更新到版本{version}，共{len(clause_patterns)}条模式，"
+                        f"耗时{self._current.compile_seconds:.3f}秒")
+            return True
+
+    def check_for_update(self) -> bool:
+        """检查知识库文件是否变更，变更时重新加载
+
+        Returns:
+            是否加载了新规则
+        """
+        signature = self._read_file_signature()
+        if signature is None or signature == self._file_signature:
+            return False
+        return self.reload()
+
+    def start(self):
+        """启动后台文件监视线程"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch,
+            name="clause-rule-watcher",
+            daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"开始监视条款规则文件: {self.knowledge_base_path}")
+
+    def stop(self):
+        """停止后台文件监视线程"""
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self):
+        """后台轮询知识库文件"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                logger.error(f"检查条款规则更新失败: {str(e)}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """获取注册表状态
+
+        Returns:
+            状态信息
+        """
+        rule_set = self._current
+        return {
+            "knowledge_base_path": self.knowledge_base_path,
+            "version": rule_set.version,
+            "content_hash": rule_set.content_hash,
+            "pattern_count": len(rule_set.clause_patterns),
+            "compiled_at": rule_set.compiled_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "compile_seconds": rule_set.compile_seconds,
+            "watching": bool(self._watcher and self._watcher.is_alive())
+        }
+
+
+def get_rule_registry(knowledge_base_path: str, start_watching: bool = True) -> ClauseRuleRegistry:
+    """获取进程内共享的规则注册表
+
+    Args:
+        knowledge_base_path: 知识库文件路径
+        start_watching: 是否启动后台文件监视
+
+    Returns:
+        规则注册表
+    """
+    key = os.path.abspath(knowledge_base_path)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = ClauseRuleRegistry(knowledge_base_path)
+            _registries[key] = registry
+    if start_watching:
+        registry.start()
+    return registry
@@ -0,0 +1,45 @@
+import io
+from common.logger import get_logger
+from common.utils import get_file_extension
+
+logger = get_logger(__name__)
+
+# 文本文件依次尝试的编码
+TEXT_ENCODINGS = ("utf-8-sig", "gb18030")
+
+
+def extract_text(file_name: str, content: bytes) -> str:
+    """从上传的合同文件中提取文本
+
+    Args:
+        file_name: 原始文件名，按扩展名选择解析方式
+        content: 文件内容
+
+    Returns:
+        合同文本
+
+    Raises:
+        ValueError: 文件格式不支持或无法解码
+    """
+    extension = get_file_extension(file_name).lstrip(".")
+    if extension == "txt":
+        for encoding in TEXT_ENCODINGS:
+            try:
+                return content.decode(encoding)
+            except UnicodeDecodeError:
+                continue
+        raise ValueError(f"无法识别文件{file_name}的文本编码")
+
+    if extension == "docx":
+        import docx
+
+        document = docx.Document(io.BytesIO(content))
+        return "\n".join(paragraph.text for paragraph in document.paragraphs)
+
+    if extension == "pdf":
+        import pdfplumber
+
+        with pdfplumber.open(io.BytesIO(content)) as pdf:
+            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+    raise ValueError(f"不支持的文件格式: {extension or file_name}")
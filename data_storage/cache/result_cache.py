@@ -0,0 +1,333 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional
+from common.logger import get_logger
+from common.config import get_config, get_model_version
+from common.utils import hash_text
+from core_services.contract_processor.clause_classifier import DEFAULT_CLAUSE_PATTERNS
+from core_services.contract_processor.rule_loader import compute_rules_hash
+from core_services.contract_processor.rule_registry import get_rule_registry
+
+logger = get_logger(__name__)
+config = get_config()
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+class ResultCache:
+    """审查结果缓存，按合同内容哈希和规则/模型版本持久化各阶段的处理结果
+
+    结果以JSON形式保存在SQLite中，支持按最近访问时间的LRU淘汰、按写入
+    时间的TTL过期以及磁盘占用上限。数据库文件可由多个进程共享，结果总字节数
+    保存在单行的 cache_meta 表中，与结果的增删在同一写事务内更新。
+    """
+
+    def __init__(self, db_path: str = None, ttl: int = None, max_size: int = None):
+        """初始化结果缓存
+
+        Args:
+            db_path: SQLite数据库文件路径
+            ttl: 结果有效期（秒），0表示不过期
+            max_size: 缓存结果的总字节数上限
+        """
+        cache_config = config.get("result_cache", {})
+        self.db_path = db_path or cache_config.get("path", "data/cache/results.db")
+        self.ttl = ttl if ttl is not None else cache_config.get("ttl", 604800)
+        self.max_size = max_size or cache_config.get("max_size", 536870912)
+
+        self._lock = threading.Lock()
+        self._version_sources: Dict[str, Callable[[], Any]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                cache_key TEXT PRIMARY KEY,
+                stage TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed_at ON results (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_created_at ON results (created_at)")
+        # 结果总字节数，写入和删除时增量维护，淘汰判断不必每次汇总全表
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_meta (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO cache_meta (id, total_size) "
+            "SELECT 1, COALESCE(SUM(size), 0) FROM results"
+        )
+        self._conn.commit()
+
+        # 默认将模型版本纳入缓存键，规则版本由 get_result_cache 注册
+        self.register_version_source("model", get_model_version)
+
+        logger.info(f"结果缓存初始化完成: {self.db_path}")
+
+    def register_version_source(self, name: str, source: Callable[[], Any]):
+        """注册参与缓存键计算的版本来源
+
+        Args:
+            name: 版本名称，例如 rules、model
+            source: 返回当前版本的函数，版本变化后旧结果自然失效
+        """
+        self._version_sources[name] = source
+
+    def make_key(self, stage: str, content_hash: str) -> str:
+        """计算缓存键
+
+        Args:
+            stage: 处理阶段（代理类型）
+            content_hash: 输入内容哈希
+
+        Returns:
+            缓存键
+        """
+        versions = ",".join(
+            f"{name}={source()}" for name, source in sorted(self._version_sources.items())
+        )
+        return hash_text(f"{stage}|{content_hash}|{versions}")
+
+    def _record(self, stage: str, outcome: str):
+        """记录命中或未命中
+
+        Args:
+            stage: 处理阶段
+            outcome: hits 或 misses
+        """
+        stats = self._stats.setdefault(stage, {"hits": 0, "misses": 0})
+        stats[outcome] += 1
+
+    def get(self, stage: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存结果
+
+        Args:
+            stage: 处理阶段
+            cache_key: 缓存键
+
+        Returns:
+            缓存的结果，未命中或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT payload, created_at FROM results WHERE cache_key = ?",
+                    (cache_key,)
+                ).fetchone()
+
+                if row is not None and self.ttl and now - row[1] > self.ttl:
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    self._delete([cache_key])
+                    self._conn.commit()
+                    row = None
+
+                if row is None:
+                    self._record(stage, "misses")
+                    return None
+
+                self._conn.execute(
+                    "UPDATE results SET accessed_at = ? WHERE cache_key = ?",
+                    (now, cache_key)
+                )
+                self._conn.commit()
+                self._record(stage, "hits")
+                return json.loads(row[0])
+            except Exception as e:
+                self._conn.rollback()
+                logger.error(f"读取结果缓存失败: {str(e)}")
+                self._record(stage, "misses")
+                return None
+
+    def set(self, stage: str, cache_key: str, result: Dict[str, Any]) -> bool:
+        """写入缓存结果
+
+        Args:
+            stage: 处理阶段
+            cache_key: 缓存键
+            result: 处理结果
+
+        Returns:
+            是否成功写入
+        """
+        try:
+            payload = json.dumps(result, ensure_ascii=False, default=str)
+        except Exception as e:
+            logger.warning(f"结果无法序列化，跳过缓存: {str(e)}")
+            return False
+
+        size = len(payload.encode("utf-8"))
+        if size > self.max_size:
+            logger.warning(f"结果大小{size}超过缓存上限，跳过缓存")
+            return False
+
+        now = time.time()
+        with self._lock:
+            try:
+                # 立即获取写锁，其他进程的写入不会插在读取旧大小和更新总大小之间
+                self._conn.execute("BEGIN IMMEDIATE")
+                replaced = self._conn.execute(
+                    "SELECT size FROM results WHERE cache_key = ?", (cache_key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results "
+                    "(cache_key, stage, payload, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (cache_key, stage, payload, size, now, now)
+                )
+                self._add_size(size - (replaced[0] if replaced else 0))
+                self._evict(now)
+                self._conn.commit()
+                return True
+            except Exception as e:
+                self._conn.rollback()
+                logger.error(f"写入结果缓存失败: {str(e)}")
+                return False
+
+    def _total_size(self) -> int:
+        """读取结果总字节数
+
+        Returns:
+            总字节数
+        """
+        return self._conn.execute("SELECT total_size FROM cache_meta WHERE id = 1").fetchone()[0]
+
+    def _add_size(self, delta: int):
+        """调整结果总字节数，调用方需持有锁并在写事务内调用
+
+        Args:
+            delta: 变化的字节数
+        """
+        if delta:
+            self._conn.execute("UPDATE cache_meta SET total_size = total_size + ? WHERE id = 1", (delta,))
+
+    def _delete(self, cache_keys):
+        """删除结果并扣减总大小，调用方需持有锁并在写事务内调用
+
+        Args:
+            cache_keys: 缓存键列表
+        """
+        for cache_key in cache_keys:
+            row = self._conn.execute("SELECT size FROM results WHERE cache_key = ?", (cache_key,)).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM results WHERE cache_key = ?", (cache_key,))
+                self._add_size(-row[0])
+
+    def _evict(self, now: float):
+        """淘汰过期结果，并按最近访问时间淘汰直到总大小不超过上限
+
+        总大小在写事务内读取，包含其他进程已提交的写入。
+
+        Args:
+            now: 当前时间戳
+        """
+        if self.ttl:
+            expired = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results WHERE created_at < ?", (now - self.ttl,)
+            ).fetchone()[0]
+            if expired:
+                self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl,))
+                self._add_size(-expired)
+
+        total_size = self._total_size()
+        if total_size <= self.max_size:
+            return
+
+        excess = total_size - self.max_size
+        freed = 0
+        evicted = []
+        for cache_key, size in self._conn.execute(
+            "SELECT cache_key, size FROM results ORDER BY accessed_at"
+        ):
+            evicted.append((cache_key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM results WHERE cache_key = ?", evicted)
+        self._add_size(-freed)
+        logger.info(f"结果缓存淘汰{len(evicted)}条记录，释放{freed}字节")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._conn.execute("DELETE FROM results")
+            self._conn.execute("UPDATE cache_meta SET total_size = 0 WHERE id = 1")
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取各阶段的命中统计
+
+        Returns:
+            统计信息，包含每个阶段的命中数、未命中数和命中率
+        """
+        stages = {}
+        with self._lock:
+            for stage, stats in self._stats.items():
+                total = stats["hits"] + stats["misses"]
+                stages[stage] = {
+                    "hits": stats["hits"],
+                    "misses": stats["misses"],
+                    "hit_rate": stats["hits"] / total if total else 0.0
+                }
+            entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            total_size = self._total_size()
+        return {
+            "stages": stages,
+            "entries": entries,
+            "size": total_size,
+            "max_size": self.max_size
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """获取进程内共享的结果缓存
+
+    Returns:
+        结果缓存实例，配置中禁用缓存时返回None
+    """
+    global _instance
+    if not config.get("result_cache", {}).get("enabled", True):
+        return None
+    with _instance_lock:
+        if _instance is None:
+            _instance = ResultCache()
+            _register_rules_version(_instance)
+        return _instance
+
+
+def _register_rules_version(cache: ResultCache):
+    """将条款规则的内容哈希注册为缓存键的 rules 版本
+
+    配置了 clause_parser.knowledge_base_path 时使用该知识库的共享规则注册表，
+    规则热加载后旧结果自然失效；未配置时规则即内置模式，哈希固定。
+
+    Args:
+        cache: 结果缓存
+    """
+    knowledge_base_path = config.get("clause_parser", {}).get("knowledge_base_path")
+    if knowledge_base_path:
+        registry = get_rule_registry(knowledge_base_path)
+        cache.register_version_source("rules", lambda: registry.content_hash)
+    else:
+        rules_hash = compute_rules_hash(DEFAULT_CLAUSE_PATTERNS)
+        cache.register_version_source("rules", lambda: rules_hash)
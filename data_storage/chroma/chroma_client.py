@@ -5,6 +5,7 @@ from chromadb.config import Settings
 from chromadb.utils import embedding_functions
 from common.logger import get_logger
 from common.config import get_config
+from agents.error_handling.circuit_breaker import get_circuit_breaker
 
 logger = get_logger(__name__)
 config = get_config()
@@ -37,6 +38,8 @@ class ChromaClient:
             model_name=config.get("embedding", {}).get("model_name", "all-MiniLM-L6-v2")
         )
         
+        self.circuit_breaker = get_circuit_breaker("chroma")
+        
         logger.info(f"ChromaDB客户端初始化完成，持久化目录: {persist_directory}")
     
     def create_collection(self, collection_name: str, metadata: Dict[str, Any] = None) -> Any:
@@ -86,7 +89,8 @@ class ChromaClient:
             if metadatas is None:
                 metadatas = [{} for _ in range(len(documents))]
             
-            collection.add(
+            self.circuit_breaker.call(
+                collection.add,
                 documents=documents,
                 metadatas=metadatas,
                 ids=ids
@@ -114,7 +118,8 @@ class ChromaClient:
         try:
             collection = self.client.get_collection(collection_name, self.embedding_function)
             
-            results = collection.query(
+            results = self.circuit_breaker.call(
+                collection.query,
                 query_texts=[query_text],
                 n_results=n_results,
                 where=filter_dict
@@ -0,0 +1,418 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from common.logger import get_logger
+from common.config import get_config
+
+logger = get_logger(__name__)
+config = get_config()
+
+_instance = None
+_instance_lock = threading.Lock()
+
+# 生产环境 MySQL 表结构，与本地 SQLite 表结构和索引保持一致
+MYSQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interventions (
+    intervention_id VARCHAR(64) NOT NULL PRIMARY KEY,
+    agent_id VARCHAR(128) NOT NULL,
+    status VARCHAR(32) NOT NULL,
+    error_count INT NOT NULL DEFAULT 0,
+    error_rate DOUBLE NOT NULL DEFAULT 0,
+    last_error TEXT,
+    record JSON NOT NULL,
+    resolution JSON NULL,
+    resolved_by VARCHAR(128) NULL,
+    created_at DOUBLE NOT NULL,
+    resolved_at DOUBLE NULL,
+    INDEX idx_interventions_status_created_at (status, created_at),
+    INDEX idx_interventions_agent_status (agent_id, status)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS paused_agents (
+    agent_id VARCHAR(128) NOT NULL PRIMARY KEY,
+    intervention_id VARCHAR(64),
+    paused_at DOUBLE NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS intervention_backlog (
+    id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    agent_id VARCHAR(128) NOT NULL,
+    payload JSON NOT NULL,
+    created_at DOUBLE NOT NULL,
+    INDEX idx_intervention_backlog_agent (agent_id, id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+"""
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interventions (
+    intervention_id TEXT PRIMARY KEY,
+    agent_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    error_rate REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    record TEXT NOT NULL,
+    resolution TEXT,
+    resolved_by TEXT,
+    created_at REAL NOT NULL,
+    resolved_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_interventions_status_created_at ON interventions (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_interventions_agent_status ON interventions (agent_id, status);
+
+CREATE TABLE IF NOT EXISTS paused_agents (
+    agent_id TEXT PRIMARY KEY,
+    intervention_id TEXT,
+    paused_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS intervention_backlog (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_intervention_backlog_agent ON intervention_backlog (agent_id, id);
+"""
+
+
+class InterventionStore:
+    """人工干预记录存储
+
+    干预记录、被暂停的代理及其积压任务持久化在SQLite中，按干预ID、代理ID
+    和状态建立索引；待处理列表查询走 (status, created_at) 索引，历史记录
+    增长不影响查询耗时。生产环境使用 MYSQL_SCHEMA 中结构相同的表。
+    """
+
+    def __init__(self, db_path: str = None):
+        """初始化干预存储
+
+        Args:
+            db_path: SQLite数据库文件路径
+        """
+        store_config = config.get("intervention_store", {})
+        self.db_path = db_path or store_config.get("path", "data/interventions/interventions.db")
+
+        self._lock = threading.Lock()
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._conn.commit()
+
+        logger.info(f"人工干预存储初始化完成: {self.db_path}")
+
+    @staticmethod
+    def _row_to_record(row) -> Dict[str, Any]:
+        """将查询结果转换为干预记录
+
+        Args:
+            row: (record, status, resolution, resolved_by, resolved_at)
+
+        Returns:
+            干预记录
+        """
+        record = json.loads(row[0])
+        record.update({
+            "status": row[1],
+            "resolution": json.loads(row[2]) if row[2] else None,
+            "resolved_by": row[3],
+            "resolved_at": row[4]
+        })
+        return record
+
+    def save(self, record: Dict[str, Any]) -> bool:
+        """保存干预记录，已存在时更新，保留原创建时间和解决时间
+
+        Args:
+            record: 干预记录，必须包含 intervention_id 和 agent_id
+
+        Returns:
+            是否成功保存
+        """
+        with self._lock:
+            try:
+                # INSERT OR REPLACE 会删除旧行再插入，created_at 被重置，
+                # 按 created_at 排序的待处理列表顺序随之错乱
+                self._conn.execute(
+                    "INSERT INTO interventions "
+                    "(intervention_id, agent_id, status, error_count, error_rate, last_error, "
+                    "record, resolution, resolved_by, created_at, resolved_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(intervention_id) DO UPDATE SET "
+                    "agent_id = excluded.agent_id, status = excluded.status, "
+                    "error_count = excluded.error_count, error_rate = excluded.error_rate, "
+                    "last_error = excluded.last_error, record = excluded.record, "
+                    "resolution = COALESCE(excluded.resolution, interventions.resolution), "
+                    "resolved_by = COALESCE(excluded.resolved_by, interventions.resolved_by)",
+                    (
+                        record["intervention_id"],
+                        record["agent_id"],
+                        record.get("status", "pending"),
+                        record.get("error_count", 0),
+                        record.get("error_rate", 0.0),
+                        record.get("last_error"),
+                        json.dumps(record, ensure_ascii=False, default=str),
+                        json.dumps(record["resolution"], ensure_ascii=False, default=str)
+                        if record.get("resolution") is not None else None,
+                        record.get("resolved_by"),
+                        time.time(),
+                        None
+                    )
+                )
+                self._conn.commit()
+                return True
+            except Exception as e:
+                logger.error(f"保存干预记录失败: {str(e)}")
+                return False
+
+    def get(self, intervention_id: str) -> Optional[Dict[str, Any]]:
+        """按干预ID获取记录
+
+        Args:
+            intervention_id: 干预ID
+
+        Returns:
+            干预记录，不存在时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record, status, resolution, resolved_by, resolved_at "
+                "FROM interventions WHERE intervention_id = ?",
+                (intervention_id,)
+            ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def resolve(self, intervention_id: str, resolution: Dict[str, Any],
+                resolved_by: str = None) -> Optional[str]:
+        """将待处理的干预标记为已解决
+
+        Args:
+            intervention_id: 干预ID
+            resolution: 解决方案
+            resolved_by: 处理人
+
+        Returns:
+            干预所属的代理ID，干预不存在或已解决时返回None
+        """
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT agent_id FROM interventions WHERE intervention_id = ? AND status = 'pending'",
+                    (intervention_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE interventions SET status = 'resolved', resolution = ?, resolved_by = ?, "
+                    "resolved_at = ? WHERE intervention_id = ?",
+                    (json.dumps(resolution, ensure_ascii=False, default=str), resolved_by,
+                     time.time(), intervention_id)
+                )
+                self._conn.commit()
+                return row[0]
+            except Exception as e:
+                logger.error(f"更新干预记录失败: {str(e)}")
+                return None
+
+    def list(self, status: str = None, agent_id: str = None, page: int = 1,
+             page_size: int = 50) -> Dict[str, Any]:
+        """分页查询干预记录，按创建时间倒序
+
+        Args:
+            status: 按状态过滤
+            agent_id: 按代理ID过滤
+            page: 页码，从1开始
+            page_size: 每页条数
+
+        Returns:
+            包含 items、total、page、page_size 的分页结果
+        """
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if agent_id:
+            conditions.append("agent_id = ?")
+            params.append(agent_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        page = max(1, page)
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) FROM interventions {where}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT record, status, resolution, resolved_by, resolved_at FROM interventions {where} "
+                f"ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+        return {
+            "items": [self._row_to_record(row) for row in rows],
+            "total": total,
+            "page": page,
+            "page_size": page_size
+        }
+
+    def count_pending(self, agent_id: str) -> int:
+        """统计代理尚未解决的干预数
+
+        Args:
+            agent_id: 代理ID
+
+        Returns:
+            待处理干预数
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM interventions WHERE agent_id = ? AND status = 'pending'",
+                (agent_id,)
+            ).fetchone()[0]
+
+    def pause_agent(self, agent_id: str, intervention_id: str):
+        """记录代理因干预被暂停
+
+        Args:
+            agent_id: 代理ID
+            intervention_id: 导致暂停的干预ID，管理员直接暂停时为None
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paused_agents (agent_id, intervention_id, paused_at) VALUES (?, ?, ?)",
+                (agent_id, intervention_id, time.time())
+            )
+            self._conn.commit()
+
+    def is_paused(self, agent_id: str) -> bool:
+        """判断代理是否处于暂停状态
+
+        Args:
+            agent_id: 代理ID
+
+        Returns:
+            是否暂停
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM paused_agents WHERE agent_id = ?", (agent_id,)
+            ).fetchone() is not None
+
+    def enqueue_backlog(self, agent_id: str, payload: Dict[str, Any]) -> bool:
+        """暂存暂停期间分配给代理的任务
+
+        只在代理仍处于暂停状态时写入，检查和写入在同一语句中完成，
+        不会在代理恢复后留下无人释放的积压任务。
+
+        Args:
+            agent_id: 代理ID
+            payload: 任务数据
+
+        Returns:
+            是否成功暂存，代理未暂停时返回False
+        """
+        with self._lock:
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO intervention_backlog (agent_id, payload, created_at) "
+                    "SELECT ?, ?, ? WHERE EXISTS (SELECT 1 FROM paused_agents WHERE agent_id = ?)",
+                    (agent_id, json.dumps(payload, ensure_ascii=False, default=str), time.time(), agent_id)
+                )
+                self._conn.commit()
+                return cursor.rowcount == 1
+            except Exception as e:
+                logger.error(f"暂存积压任务失败: {str(e)}")
+                return False
+
+    def release_agent(self, agent_id: str, handler: Callable[[Dict[str, Any]], bool]) -> List[Dict[str, Any]]:
+        """恢复代理并按暂存顺序把积压任务逐条交给 handler
+
+        每条积压任务只有在 handler 返回True后才删除；handler 失败时停止释放，
+        剩余任务保留在积压中，代理保持暂停状态，等待下次恢复时重试。
+        handler 在锁外调用，重新投递期间不阻塞其他存储操作；释放期间新暂存的
+        任务同样会被释放，积压清空后才解除暂停。
+
+        Args:
+            agent_id: 代理ID
+            handler: 接收单条积压任务的函数，返回是否已成功转交
+
+        Returns:
+            成功释放的积压任务列表
+        """
+        released = []
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, payload FROM intervention_backlog WHERE agent_id = ? ORDER BY id",
+                    (agent_id,)
+                ).fetchall()
+                # 积压为空时在同一把锁内解除暂停，释放期间新暂存的任务会在下一轮读到
+                if not rows:
+                    self._conn.execute("DELETE FROM paused_agents WHERE agent_id = ?", (agent_id,))
+                    self._conn.commit()
+                    return released
+
+            released_ids = []
+            for row_id, payload in rows:
+                task = json.loads(payload)
+                try:
+                    handled = handler(task)
+                except Exception as e:
+                    logger.error(f"释放代理{agent_id}积压任务{row_id}失败: {str(e)}")
+                    handled = False
+                if not handled:
+                    break
+                released_ids.append(row_id)
+                released.append(task)
+
+            with self._lock:
+                try:
+                    self._conn.executemany("DELETE FROM intervention_backlog WHERE id = ?",
+                                           [(row_id,) for row_id in released_ids])
+                    self._conn.commit()
+                except Exception as e:
+                    self._conn.rollback()
+                    logger.error(f"删除代理{agent_id}已释放的积压任务失败: {str(e)}")
+                    raise
+            if len(released_ids) < len(rows):
+                logger.warning(f"代理{agent_id}有{len(rows) - len(released_ids)}个积压任务未能释放，保持暂停")
+                return released
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取存储统计
+
+        Returns:
+            各状态的干预数、暂停的代理数和积压任务数
+        """
+        with self._lock:
+            by_status = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM interventions GROUP BY status"
+            ).fetchall())
+            paused = self._conn.execute("SELECT COUNT(*) FROM paused_agents").fetchone()[0]
+            backlog = self._conn.execute("SELECT COUNT(*) FROM intervention_backlog").fetchone()[0]
+        return {
+            "interventions": by_status,
+            "paused_agents": paused,
+            "backlog": backlog
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+def get_intervention_store() -> InterventionStore:
+    """获取进程内共享的人工干预存储
+
+    Returns:
+        干预存储实例
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = InterventionStore()
+        return _instance
@@ -0,0 +1,414 @@
+import os
+import asyncio
+from urllib.parse import quote
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from common.logger import get_logger
+from common.config import get_config, get_pipeline_config
+from agents.error_handling.circuit_breaker import get_circuit_breaker
+from message_broker.core.connection import stage_queue_arguments
+
+logger = get_logger(__name__)
+config = get_config()
+
+
+class AsyncRabbitMQConnection:
+    """基于 asyncio 的 RabbitMQ 连接管理器
+
+    与 RabbitMQConnection 提供相同的声明、绑定、发布、消费和确认接口，但全部为
+    协程：consume() 注册消费者后立即返回，单个事件循环即可同时驱动大量代理
+    任务，每条消息的回调作为独立任务执行，并发度由 prefetch_count 限制。
+
+    client 为提供 connect_robust 和 Message 的客户端模块，默认使用 aio_pika；
+    测试时可传入 message_broker.core.in_memory_broker.InMemoryBroker 实例。
+    """
+
+    def __init__(self, host: str = None, port: int = None,
+                 username: str = None, password: str = None,
+                 virtual_host: str = "/", client: Any = None):
+        """初始化RabbitMQ连接
+
+        Args:
+            host: RabbitMQ主机地址
+            port: RabbitMQ端口
+            username: 用户名
+            password: 密码
+            virtual_host: 虚拟主机
+            client: 客户端模块，默认 aio_pika
+        """
+        self.host = host or config.get("rabbitmq", {}).get("host") or os.getenv("RABBITMQ_HOST", "localhost")
+        self.port = port or config.get("rabbitmq", {}).get("port") or int(os.getenv("RABBITMQ_PORT", "5672"))
+        self.username = username or config.get("rabbitmq", {}).get("username") or os.getenv("RABBITMQ_USERNAME", "guest")
+        self.password = password or config.get("rabbitmq", {}).get("password") or os.getenv("RABBITMQ_PASSWORD", "guest")
+        self.virtual_host = virtual_host or config.get("rabbitmq", {}).get("virtual_host") or os.getenv("RABBITMQ_VHOST", "/")
+
+        self.client = client
+        self.connection = None
+        self.channel = None
+        self.generation = 0
+        self.circuit_breaker = get_circuit_breaker("rabbitmq")
+        self.prefetch_count = get_pipeline_config().get("performance", {}).get("prefetch_count", 1)
+
+        # 通道级缓存，重连后清空
+        self._exchanges: Dict[str, Any] = {}
+        self._queues: Dict[str, Any] = {}
+        # 队列名称 -> 消费者信息（回调、确认方式、消费者标签、是否暂停）
+        self._consumers: Dict[str, Dict[str, Any]] = {}
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def url(self) -> str:
+        """AMQP 连接地址"""
+        return (f"amqp://{quote(self.username, safe='')}:{quote(self.password, safe='')}"
+                f"@{self.host}:{self.port}/{quote(self.virtual_host, safe='')}")
+
+    def _get_client(self):
+        """获取客户端模块，未指定时导入 aio_pika"""
+        if self.client is None:
+            import aio_pika
+            self.client = aio_pika
+        return self.client
+
+    async def connect(self) -> bool:
+        """建立与RabbitMQ的连接
+
+        Returns:
+            是否成功连接
+        """
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f"RabbitMQ已熔断，{self.circuit_breaker.retry_after():.1f}秒后重新尝试连接")
+            return False
+
+        try:
+            self.connection = await self._get_client().connect_robust(self.url)
+            self.channel = await self.connection.channel()
+            await self.channel.set_qos(prefetch_count=self.prefetch_count)
+            self._exchanges.clear()
+            self._queues.clear()
+            # 重建连接后恢复未暂停的消费者
+            for queue_name, consumer in self._consumers.items():
+                if not consumer["paused"]:
+                    await self._start_consumer(queue_name)
+
+            self.generation += 1
+            self.circuit_breaker.record_success()
+            logger.info(f"成功连接到RabbitMQ: {self.host}:{self.port}")
+            return True
+        except asyncio.CancelledError:
+            self.circuit_breaker.release()
+            raise
+        except Exception as e:
+            self.circuit_breaker.record_failure()
+            logger.error(f"连接RabbitMQ失败: {str(e)}")
+            return False
+
+    def is_connected(self) -> bool:
+        """连接和通道是否均处于打开状态
+
+        Returns:
+            是否可用
+        """
+        return bool(self.connection is not None and not self.connection.is_closed
+                    and self.channel is not None and not self.channel.is_closed)
+
+    async def ensure_connected(self) -> bool:
+        """确保连接可用，并发调用时只由一个任务执行重连
+
+        Returns:
+            连接是否可用
+        """
+        if self.is_connected():
+            return True
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.is_connected():
+                return True
+            if self.connection is not None:
+                logger.warning(f"RabbitMQ连接或通道已关闭，重新连接: {self.host}:{self.port}")
+                try:
+                    if not self.connection.is_closed:
+                        await self.connection.close()
+                except Exception:
+                    pass
+            self.channel = None
+            return await self.connect()
+
+    async def close(self):
+        """关闭连接"""
+        if self.connection is not None and not self.connection.is_closed:
+            await self.connection.close()
+            logger.info("RabbitMQ连接已关闭")
+
+    async def declare_queue(self, queue_name: str, durable: bool = True,
+                            arguments: Dict[str, Any] = None) -> bool:
+        """声明队列
+
+        Args:
+            queue_name: 队列名称
+            durable: 是否持久化
+            arguments: 队列参数，阶段队列的补充规则与 RabbitMQConnection 相同
+
+        Returns:
+            是否成功声明
+        """
+        try:
+            if not await self.ensure_connected():
+                return False
+
+            self._queues[queue_name] = await self.channel.declare_queue(
+                queue_name,
+                durable=durable,
+                arguments=stage_queue_arguments(queue_name, arguments)
+            )
+
+            logger.info(f"成功声明队列: {queue_name}")
+            return True
+        except Exception as e:
+            logger.error(f"声明队列失败: {str(e)}")
+            return False
+
+    async def declare_exchange(self, exchange_name: str, exchange_type: str = "direct",
+                               durable: bool = True) -> bool:
+        """声明交换机
+
+        Args:
+            exchange_name: 交换机名称
+            exchange_type: 交换机类型
+            durable: 是否持久化
+
+        Returns:
+            是否成功声明
+        """
+        try:
+            if not await self.ensure_connected():
+                return False
+
+            self._exchanges[exchange_name] = await self.channel.declare_exchange(
+                exchange_name,
+                exchange_type,
+                durable=durable
+            )
+
+            logger.info(f"成功声明交换机: {exchange_name}, 类型: {exchange_type}")
+            return True
+        except Exception as e:
+            logger.error(f"声明交换机失败: {str(e)}")
+            return False
+
+    async def _get_queue(self, queue_name: str):
+        """获取队列句柄，未在当前通道声明过时被动获取已存在的队列"""
+        queue = self._queues.get(queue_name)
+        if queue is None:
+            queue = self._queues[queue_name] = await self.channel.get_queue(queue_name)
+        return queue
+
+    async def _get_exchange(self, exchange_name: str):
+        """获取交换机句柄，空名称为默认交换机"""
+        if not exchange_name:
+            return self.channel.default_exchange
+        exchange = self._exchanges.get(exchange_name)
+        if exchange is None:
+            exchange = self._exchanges[exchange_name] = await self.channel.get_exchange(exchange_name)
+        return exchange
+
+    async def bind_queue(self, queue_name: str, exchange_name: str, routing_key: str) -> bool:
+        """绑定队列到交换机
+
+        Args:
+            queue_name: 队列名称
+            exchange_name: 交换机名称
+            routing_key: 路由键
+
+        Returns:
+            是否成功绑定
+        """
+        try:
+            if not await self.ensure_connected():
+                return False
+
+            queue = await self._get_queue(queue_name)
+            await queue.bind(await self._get_exchange(exchange_name), routing_key=routing_key)
+
+            logger.info(f"成功绑定队列{queue_name}到交换机{exchange_name}，路由键: {routing_key}")
+            return True
+        except Exception as e:
+            logger.error(f"绑定队列失败: {str(e)}")
+            return False
+
+    async def publish_message(self, exchange_name: str, routing_key: str,
+                              message: Union[str, bytes], properties: Dict[str, Any] = None) -> bool:
+        """发布消息
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            message: 消息内容
+            properties: 消息属性，如 headers、priority、expiration，
+                默认持久化且 content_type 为 application/json
+
+        Returns:
+            是否成功发布
+        """
+        try:
+            if not await self.ensure_connected():
+                return False
+            if not self.circuit_breaker.allow_request():
+                logger.warning(f"RabbitMQ已熔断，放弃发布消息到{exchange_name}")
+                return False
+
+            body = message.encode("utf-8") if isinstance(message, str) else message
+            properties = {"delivery_mode": 2, "content_type": "application/json", **(properties or {})}
+            try:
+                exchange = await self._get_exchange(exchange_name)
+                await exchange.publish(self._get_client().Message(body, **properties), routing_key=routing_key)
+            except asyncio.CancelledError:
+                self.circuit_breaker.release()
+                raise
+            except Exception:
+                self.circuit_breaker.record_failure()
+                raise
+            self.circuit_breaker.record_success()
+
+            logger.debug(f"成功发布消息到{exchange_name}，路由键: {routing_key}")
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"发布消息失败: {str(e)}")
+            return False
+
+    async def consume(self, queue_name: str, callback: Callable[[Any], Awaitable[Any]],
+                      auto_ack: bool = False, prefetch_count: int = None) -> Optional[str]:
+        """注册消费者后立即返回，不阻塞事件循环
+
+        Args:
+            queue_name: 队列名称
+            callback: 接收消息对象的协程函数，消息通过 acknowledge/reject 确认
+            auto_ack: 是否自动确认
+            prefetch_count: 未确认消息上限，默认读取 performance.prefetch_count
+
+        Returns:
+            消费者标签，失败时返回None
+        """
+        try:
+            if not await self.ensure_connected():
+                return None
+
+            self._consumers[queue_name] = {
+                "callback": callback,
+                "auto_ack": auto_ack,
+                "consumer_tag": None,
+                "paused": False
+            }
+            if prefetch_count is not None and prefetch_count != self.prefetch_count:
+                self.prefetch_count = prefetch_count
+                await self.channel.set_qos(prefetch_count=prefetch_count)
+            await self._start_consumer(queue_name)
+
+            logger.info(f"开始消费队列: {queue_name}")
+            return self._consumers[queue_name]["consumer_tag"]
+        except Exception as e:
+            logger.error(f"消费消息失败: {str(e)}")
+            return None
+
+    async def _start_consumer(self, queue_name: str):
+        """在当前通道上注册消费者
+
+        Args:
+            queue_name: 队列名称
+        """
+        consumer = self._consumers[queue_name]
+        queue = await self._get_queue(queue_name)
+        consumer["consumer_tag"] = await queue.consume(consumer["callback"], no_ack=consumer["auto_ack"])
+        consumer["paused"] = False
+
+    async def pause_consumer(self, queue_name: str) -> bool:
+        """暂停消费队列，正在处理的消息仍可正常确认
+
+        Args:
+            queue_name: 队列名称
+
+        Returns:
+            是否已暂停
+        """
+        consumer = self._consumers.get(queue_name)
+        if consumer is None or consumer["paused"]:
+            return False
+        try:
+            if consumer["consumer_tag"] and self.is_connected():
+                queue = await self._get_queue(queue_name)
+                await queue.cancel(consumer["consumer_tag"])
+            consumer["consumer_tag"] = None
+            consumer["paused"] = True
+            logger.info(f"已暂停消费队列: {queue_name}")
+            return True
+        except Exception as e:
+            logger.error(f"暂停消费队列{queue_name}失败: {str(e)}")
+            return False
+
+    async def resume_consumer(self, queue_name: str, prefetch_count: int = None) -> bool:
+        """恢复消费队列
+
+        Args:
+            queue_name: 队列名称
+            prefetch_count: 恢复后使用的未确认消息上限，默认沿用当前配置
+
+        Returns:
+            是否已恢复
+        """
+        consumer = self._consumers.get(queue_name)
+        if consumer is None or not consumer["paused"]:
+            return False
+        try:
+            if not await self.ensure_connected():
+                return False
+            if prefetch_count is not None and prefetch_count != self.prefetch_count:
+                self.prefetch_count = prefetch_count
+                await self.channel.set_qos(prefetch_count=prefetch_count)
+            await self._start_consumer(queue_name)
+            logger.info(f"已恢复消费队列: {queue_name}，prefetch_count: {self.prefetch_count}")
+            return True
+        except Exception as e:
+            logger.error(f"恢复消费队列{queue_name}失败: {str(e)}")
+            return False
+
+    def get_consumer_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各队列的消费状态
+
+        Returns:
+            队列名称到消费状态的映射
+        """
+        return {
+            queue_name: {
+                "consumer_tag": consumer["consumer_tag"],
+                "paused": consumer["paused"],
+                "prefetch_count": self.prefetch_count
+            }
+            for queue_name, consumer in self._consumers.items()
+        }
+
+    async def acknowledge(self, message: Any):
+        """确认消息
+
+        消息对象自带所属通道，因此与 RabbitMQConnection 不同，这里传入消息本身
+        而不是投递标签。
+
+        Args:
+            message: 回调收到的消息对象
+        """
+        try:
+            await message.ack()
+        except Exception as e:
+            logger.error(f"确认消息失败: {str(e)}")
+
+    async def reject(self, message: Any, requeue: bool = False):
+        """拒绝消息
+
+        Args:
+            message: 回调收到的消息对象
+            requeue: 是否重新入队
+        """
+        try:
+            await message.reject(requeue=requeue)
+        except Exception as e:
+            logger.error(f"拒绝消息失败: {str(e)}")
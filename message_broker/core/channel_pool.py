@@ -0,0 +1,252 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Union
+from common.logger import get_logger
+from common.config import get_pipeline_config
+from message_broker.core.connection import RabbitMQConnection
+
+logger = get_logger(__name__)
+
+_channel_pool = None
+_channel_pool_lock = threading.Lock()
+
+
+class ChannelPool:
+    """线程安全的 RabbitMQ 发布通道池
+
+    pika 的 BlockingConnection 及其通道不能跨线程共享，因此池中每个槽位
+    持有一条独立的 RabbitMQConnection。线程通过 lease() 独占租用一个槽位，
+    用完归还；租出前检查连接和通道是否仍然打开，RabbitMQ 重启等原因导致
+    的失效连接会被透明重建，调用方不会拿到已关闭的通道。
+    """
+
+    def __init__(self, size: int = None, connection_factory: Callable[[], RabbitMQConnection] = None,
+                 lease_timeout: float = 30):
+        """初始化通道池
+
+        Args:
+            size: 槽位数，默认读取管道配置 performance.producer_pool_size
+            connection_factory: 创建连接的函数，默认按配置新建 RabbitMQConnection
+            lease_timeout: 租用槽位的最长等待时间（秒）
+        """
+        performance = get_pipeline_config().get("performance", {})
+        self.size = max(1, int(size or performance.get("producer_pool_size", 5)))
+        self.connection_factory = connection_factory or RabbitMQConnection
+        self.lease_timeout = lease_timeout
+
+        # 槽位按需创建，空闲槽位放在 _idle 中
+        self._idle: List[RabbitMQConnection] = []
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {"leases": 0, "waits": 0, "timeouts": 0, "reconnects": 0, "replaced": 0}
+
+    def _acquire(self, timeout: float) -> Optional[RabbitMQConnection]:
+        """取出一个空闲槽位，没有空闲且未达上限时新建
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            连接，超时返回None
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            waited = False
+            while True:
+                if self._closed:
+                    raise RuntimeError("通道池已关闭")
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    connection = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    return None
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                self._condition.wait(remaining)
+            self._stats["leases"] += 1
+
+        if connection is None:
+            try:
+                connection = self.connection_factory()
+            except Exception:
+                with self._condition:
+                    self._created -= 1
+                    self._condition.notify()
+                raise
+        return connection
+
+    def _release(self, connection: RabbitMQConnection):
+        """归还槽位
+
+        Args:
+            connection: 租用的连接
+        """
+        with self._condition:
+            if self._closed:
+                connection.close()
+            else:
+                self._idle.append(connection)
+            self._condition.notify()
+
+    def _check(self, connection: RabbitMQConnection) -> bool:
+        """检查槽位连接是否可用，失效时重建
+
+        Args:
+            connection: 槽位连接
+
+        Returns:
+            连接是否可用
+        """
+        if connection.is_connected():
+            return True
+        had_connection = connection.connection is not None
+        if not connection.ensure_connected():
+            return False
+        if had_connection:
+            with self._condition:
+                self._stats["reconnects"] += 1
+        return True
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """独占租用一个已连接的槽位
+
+        Args:
+            timeout: 最长等待时间（秒），默认使用 lease_timeout
+
+        Yields:
+            可用的 RabbitMQConnection
+
+        Raises:
+            TimeoutError: 等待空闲槽位超时
+            ConnectionError: 槽位无法连接到 RabbitMQ
+        """
+        connection = self._acquire(self.lease_timeout if timeout is None else timeout)
+        if connection is None:
+            raise TimeoutError(f"{self.lease_timeout}秒内没有空闲的RabbitMQ通道")
+        try:
+            if not self._check(connection):
+                raise ConnectionError("无法连接到RabbitMQ")
+            yield connection
+        finally:
+            self._release(connection)
+
+    def _replace(self, connection: RabbitMQConnection) -> bool:
+        """操作失败后丢弃槽位当前的连接并重新连接
+
+        Args:
+            connection: 槽位连接
+
+        Returns:
+            是否重新连接成功
+        """
+        try:
+            connection.close()
+        except Exception:
+            pass
+        connection.connection = None
+        connection.channel = None
+        with self._condition:
+            self._stats["replaced"] += 1
+        return connection.ensure_connected()
+
+    def publish_message(self, exchange_name: str, routing_key: str, message: Union[str, bytes],
+                        properties=None, priority: int = None) -> bool:
+        """租用通道发布消息，失败时重建连接后重试一次
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            message: 消息内容
+            properties: 消息属性
+            priority: 消息优先级
+
+        Returns:
+            是否成功发布
+        """
+        try:
+            with self.lease() as connection:
+                if connection.publish_message(exchange_name, routing_key, message, properties, priority):
+                    return True
+                if not self._replace(connection):
+                    return False
+                return connection.publish_message(exchange_name, routing_key, message, properties, priority)
+        except (TimeoutError, ConnectionError, RuntimeError) as e:
+            logger.error(f"通过通道池发布消息失败: {str(e)}")
+            return False
+
+    def publish_batch(self, exchange_name: str, routing_key: str, messages: List[Union[str, bytes]],
+                      properties=None, timeout: float = 30, priority: int = None) -> Dict[str, Any]:
+        """租用通道批量发布消息，整批未发出时重建连接后重试一次
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            messages: 消息内容列表
+            properties: 消息属性
+            timeout: 等待确认的最长时间（秒）
+            priority: 整批消息的优先级
+
+        Returns:
+            发布结果，见 RabbitMQConnection.publish_batch
+        """
+        try:
+            with self.lease() as connection:
+                result = connection.publish_batch(exchange_name, routing_key, messages, properties,
+                                                  timeout, priority)
+                if result["published"] or not messages or not self._replace(connection):
+                    return result
+                return connection.publish_batch(exchange_name, routing_key, messages, properties,
+                                                timeout, priority)
+        except (TimeoutError, ConnectionError, RuntimeError) as e:
+            logger.error(f"通过通道池批量发布消息失败: {str(e)}")
+            return {"published": 0, "acked": 0, "nacked": [], "unconfirmed": list(range(len(messages)))}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取通道池统计
+
+        Returns:
+            统计信息
+        """
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self.size,
+                "created": self._created,
+                "idle": len(self._idle),
+                "leased": self._created - len(self._idle)
+            }
+
+    def close(self):
+        """关闭全部空闲连接，租出中的连接在归还时关闭"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for connection in idle:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"关闭RabbitMQ连接失败: {str(e)}")
+
+
+def get_channel_pool() -> ChannelPool:
+    """获取进程内共享的发布通道池
+
+    Returns:
+        通道池
+    """
+    global _channel_pool
+    with _channel_pool_lock:
+        if _channel_pool is None:
+            _channel_pool = ChannelPool()
+        return _channel_pool
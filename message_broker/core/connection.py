@@ -1,8 +1,12 @@
 import os
+import copy
+import time
 import pika
-from typing import Callable, Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional, Union
 from common.logger import get_logger
-from common.config import get_config
+from common.config import get_config, get_error_handling_config, get_pipeline_config
+from agents.error_handling.circuit_breaker import get_circuit_breaker
+from message_broker.core.consumer_registry import get_consumer_registry
 
 logger = get_logger(__name__)
 config = get_config()
@@ -31,6 +35,17 @@ class RabbitMQConnection:
         
         self.connection = None
         self.channel = None
+        # 每次成功建立连接加1，上层据此判断连接是否重建过
+        self.generation = 0
+        self.circuit_breaker = get_circuit_breaker("rabbitmq")
+        self.prefetch_count = get_pipeline_config().get("performance", {}).get("prefetch_count", 1)
+        
+        # 队列名称 -> 消费者信息（回调、确认方式、消费者标签、是否暂停）
+        self._consumers: Dict[str, Dict[str, Any]] = {}
+        self._consuming = False
+        
+        # 批量发布使用的确认模式发布器，首次批量发布时建立
+        self._batch_publisher: Optional[_ConfirmPublisher] = None
     
     def connect(self) -> bool:
         """建立与RabbitMQ的连接
@@ -38,28 +53,73 @@ class RabbitMQConnection:
         Returns:
             是否成功连接
         """
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f"RabbitMQ已熔断，{self.circuit_breaker.retry_after():.1f}秒后重新尝试连接")
+            return False
+        
         try:
-            # 创建连接参数
-            credentials = pika.PlainCredentials(self.username, self.password)
-            parameters = pika.ConnectionParameters(
-                host=self.host,
-                port=self.port,
-                virtual_host=self.virtual_host,
-                credentials=credentials
-            )
-            
             # 建立连接
-            self.connection = pika.BlockingConnection(parameters)
+            self.connection = pika.BlockingConnection(self._connection_parameters())
             self.channel = self.connection.channel()
             
+            self.generation += 1
+            self.circuit_breaker.record_success()
             logger.info(f"成功连接到RabbitMQ: {self.host}:{self.port}")
             return True
         except Exception as e:
+            self.circuit_breaker.record_failure()
             logger.error(f"连接RabbitMQ失败: {str(e)}")
             return False
     
+    def _connection_parameters(self, **overrides) -> pika.ConnectionParameters:
+        """生成连接参数
+        
+        Args:
+            overrides: 覆盖的连接参数，例如 heartbeat
+            
+        Returns:
+            连接参数
+        """
+        return pika.ConnectionParameters(
+            host=self.host,
+            port=self.port,
+            virtual_host=self.virtual_host,
+            credentials=pika.PlainCredentials(self.username, self.password),
+            **overrides
+        )
+    
+    def is_connected(self) -> bool:
+        """连接和通道是否均处于打开状态
+        
+        Returns:
+            是否可用
+        """
+        return bool(self.connection and self.connection.is_open
+                    and self.channel and self.channel.is_open)
+    
+    def ensure_connected(self) -> bool:
+        """确保连接可用，连接或通道已关闭时（如 RabbitMQ 重启）重新连接
+        
+        Returns:
+            连接是否可用
+        """
+        if self.is_connected():
+            return True
+        if self.connection is not None:
+            logger.warning(f"RabbitMQ连接或通道已关闭，重新连接: {self.host}:{self.port}")
+            try:
+                if self.connection.is_open:
+                    self.connection.close()
+            except Exception:
+                pass
+        self.channel = None
+        return self.connect()
+    
     def close(self):
         """关闭连接"""
+        if self._batch_publisher is not None:
+            self._batch_publisher.close()
+            self._batch_publisher = None
         if self.connection and self.connection.is_open:
             self.connection.close()
             logger.info("RabbitMQ连接已关闭")
@@ -71,15 +131,17 @@ class RabbitMQConnection:
         Args:
             queue_name: 队列名称
             durable: 是否持久化
-            arguments: 队列参数
+            arguments: 队列参数，管道配置中的阶段队列自动加入 x-max-priority
+                和死信参数，见 stage_queue_arguments
             
         Returns:
             是否成功声明
         """
         try:
-            if not self.channel:
-                if not self.connect():
-                    return False
+            if not self.ensure_connected():
+                return False
+            
+            arguments = stage_queue_arguments(queue_name, arguments)
             
             self.channel.queue_declare(
                 queue=queue_name,
@@ -106,9 +168,8 @@ class RabbitMQConnection:
             是否成功声明
         """
         try:
-            if not self.channel:
-                if not self.connect():
-                    return False
+            if not self.ensure_connected():
+                return False
             
             self.channel.exchange_declare(
                 exchange=exchange_name,
@@ -134,9 +195,8 @@ class RabbitMQConnection:
             是否成功绑定
         """
         try:
-            if not self.channel:
-                if not self.connect():
-                    return False
+            if not self.ensure_connected():
+                return False
             
             self.channel.queue_bind(
                 queue=queue_name,
@@ -150,8 +210,34 @@ class RabbitMQConnection:
             logger.error(f"绑定队列失败: {str(e)}")
             return False
     
+    @staticmethod
+    def _build_properties(properties: Optional[pika.BasicProperties], priority: Optional[int]) -> pika.BasicProperties:
+        """生成发布使用的消息属性
+        
+        Args:
+            properties: 调用方指定的属性，为None时使用持久化的JSON消息属性，
+                并在 published_at 头中记录发布时间（毫秒整数，AMQP 头不支持
+                浮点数），供消费端统计排队等待时间
+            priority: 消息优先级，指定时覆盖属性中的优先级
+            
+        Returns:
+            消息属性
+        """
+        if properties is None:
+            properties = pika.BasicProperties(
+                delivery_mode=2,  # 持久化消息
+                content_type='application/json',
+                headers={"published_at": int(time.time() * 1000)}
+            )
+        elif priority is not None:
+            properties = copy.copy(properties)
+        if priority is not None:
+            properties.priority = priority
+        return properties
+    
     def publish_message(self, exchange_name: str, routing_key: str, 
-                       message: str, properties: pika.BasicProperties = None) -> bool:
+                       message: str, properties: pika.BasicProperties = None,
+                       priority: int = None) -> bool:
         """发布消息
         
         Args:
@@ -159,23 +245,19 @@ class RabbitMQConnection:
             routing_key: 路由键
             message: 消息内容
             properties: 消息属性
+            priority: 消息优先级，队列需声明 x-max-priority 才会按优先级投递
             
         Returns:
             是否成功发布
         """
         try:
-            if not self.channel:
-                if not self.connect():
-                    return False
-            
-            # 如果没有指定属性，创建默认属性
-            if properties is None:
-                properties = pika.BasicProperties(
-                    delivery_mode=2,  # 持久化消息
-                    content_type='application/json'
-                )
-            
-            self.channel.basic_publish(
+            if not self.ensure_connected():
+                return False
+            
+            properties = self._build_properties(properties, priority)
+            
+            self.circuit_breaker.call(
+                self.channel.basic_publish,
                 exchange=exchange_name,
                 routing_key=routing_key,
                 body=message,
@@ -188,30 +270,268 @@ class RabbitMQConnection:
             logger.error(f"发布消息失败: {str(e)}")
             return False
     
-    def consume(self, queue_name: str, callback: Callable, auto_ack: bool = False):
+    def publish_batch(self, exchange_name: str, routing_key: str, messages: List[Union[str, bytes]],
+                      properties: pika.BasicProperties = None, timeout: float = 30,
+                      priority: int = None) -> Dict[str, Any]:
+        """批量发布消息并等待发布确认
+        
+        全部消息连续写入确认模式通道后统一等待一个确认窗口，服务器通常以
+        multiple 确认一次性确认整批消息。
+        
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            messages: 消息内容列表
+            properties: 消息属性，整批共用
+            timeout: 建立发布连接和等待确认的最长时间（秒）
+            priority: 整批消息的优先级
+            
+        Returns:
+            发布结果，包含 published、acked，以及被拒绝（nacked）和超时未确认
+            （unconfirmed）的消息下标，可据此重试
+        """
+        result = {"published": 0, "acked": 0, "nacked": [], "unconfirmed": []}
+        if not messages:
+            return result
+        
+        if not self.circuit_breaker.allow_request():
+            logger.warning(f"RabbitMQ已熔断，批量发布{len(messages)}条消息被拒绝")
+            result["nacked"] = list(range(len(messages)))
+            return result
+        
+        properties = self._build_properties(properties, priority)
+        
+        if self._batch_publisher is None:
+            # 两批之间没有线程驱动发布器的 IOLoop，无法按时回应心跳，因此关闭心跳
+            self._batch_publisher = _ConfirmPublisher(self._connection_parameters(heartbeat=0))
+        
+        # 未收到确认和未能发出的消息视为未确认，由调用方决定是否重试
+        result["unconfirmed"] = list(range(len(messages)))
+        failed = False
+        try:
+            self._batch_publisher.publish(exchange_name, routing_key, messages, properties, timeout, result)
+        except Exception as e:
+            failed = True
+            self._batch_publisher.close()
+            logger.error(f"批量发布消息失败: {str(e)}")
+        
+        result["acked"] = len(messages) - len(result["nacked"]) - len(result["unconfirmed"])
+        
+        if failed or result["nacked"] or result["unconfirmed"]:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        logger.debug(f"批量发布{len(messages)}条消息到{exchange_name}，路由键: {routing_key}，"
+                     f"确认{result['acked']}条，拒绝{len(result['nacked'])}条，"
+                     f"未确认{len(result['unconfirmed'])}条")
+        return result
+    
+    def consume(self, queue_name: str, callback: Callable, auto_ack: bool = False,
+                prefetch_count: int = None, agent_id: str = None):
         """消费消息
         
         Args:
             queue_name: 队列名称
             callback: 回调函数
             auto_ack: 是否自动确认
+            prefetch_count: 该队列的未确认消息上限，默认读取队列配置的 prefetch_count，
+                未配置时使用 performance.prefetch_count
+            agent_id: 消费该队列的代理ID，提供时登记到消费者注册表，
+                以便人工干预和管理接口暂停或恢复
         """
         try:
-            if not self.channel:
-                if not self.connect():
-                    return
+            if not self.ensure_connected():
+                return
             
-            self.channel.basic_consume(
-                queue=queue_name,
-                on_message_callback=callback,
-                auto_ack=auto_ack
-            )
+            self._consumers[queue_name] = {
+                "callback": callback,
+                "auto_ack": auto_ack,
+                "consumer_tag": None,
+                "paused": False,
+                "prefetch_count": prefetch_count or self.get_queue_prefetch(queue_name)
+            }
+            self._start_consumer(queue_name)
+            if agent_id:
+                get_consumer_registry().register(agent_id, self, queue_name)
             
             logger.info(f"开始消费队列: {queue_name}")
-            self.channel.start_consuming()
+            self._consuming = True
+            try:
+                self.channel.start_consuming()
+            finally:
+                self._consuming = False
         except Exception as e:
             logger.error(f"消费消息失败: {str(e)}")
     
+    def get_queue_prefetch(self, queue_name: str) -> int:
+        """获取队列的默认未确认消息上限
+        
+        Args:
+            queue_name: 队列名称
+            
+        Returns:
+            管道配置 queues 中该队列的 prefetch_count，未配置时为 performance.prefetch_count
+        """
+        return self._get_queue_config(queue_name).get("prefetch_count") or self.prefetch_count
+    
+    @staticmethod
+    def _get_queue_config(queue_name: str) -> Dict[str, Any]:
+        """获取管道配置 queues 中名称为 queue_name 的队列配置
+        
+        Args:
+            queue_name: 队列名称
+            
+        Returns:
+            队列配置，未配置时返回空字典
+        """
+        for queue_config in get_pipeline_config().get("queues", {}).values():
+            if queue_config.get("name") == queue_name:
+                return queue_config
+        return {}
+    
+    def _start_consumer(self, queue_name: str):
+        """按队列的 prefetch_count 设置 QoS 并注册消费者，需在连接线程中调用
+        
+        basic_qos 未设置 global 时只作用于之后创建的消费者，因此每个队列的
+        消费者都有独立的未确认消息上限。
+        
+        Args:
+            queue_name: 队列名称
+        """
+        consumer = self._consumers[queue_name]
+        self.channel.basic_qos(prefetch_count=consumer["prefetch_count"])
+        consumer["consumer_tag"] = self.channel.basic_consume(
+            queue=queue_name,
+            on_message_callback=consumer["callback"],
+            auto_ack=consumer["auto_ack"]
+        )
+        consumer["paused"] = False
+    
+    def _run_in_connection_thread(self, func: Callable):
+        """在连接所在线程中执行操作
+        
+        pika 的 BlockingConnection 不是线程安全的，消费循环运行时通过
+        add_callback_threadsafe 交给连接线程执行，否则直接执行。
+        
+        Args:
+            func: 要执行的操作
+        """
+        if self._consuming and self.connection and self.connection.is_open:
+            self.connection.add_callback_threadsafe(func)
+        else:
+            func()
+    
+    def pause_consumer(self, queue_name: str) -> bool:
+        """暂停消费队列
+        
+        取消消费者后服务器不再投递新消息；正在处理的消息不受影响，仍可
+        正常确认，已投递但尚未分发到回调的消息会被重新入队。
+        
+        Args:
+            queue_name: 队列名称
+            
+        Returns:
+            是否已提交暂停操作
+        """
+        consumer = self._consumers.get(queue_name)
+        if consumer is None or consumer["paused"]:
+            return False
+        
+        def _cancel():
+            try:
+                if consumer["consumer_tag"]:
+                    self.channel.basic_cancel(consumer["consumer_tag"])
+                consumer["consumer_tag"] = None
+                logger.info(f"已暂停消费队列: {queue_name}")
+            except Exception as e:
+                logger.error(f"暂停消费队列{queue_name}失败: {str(e)}")
+        
+        consumer["paused"] = True
+        self._run_in_connection_thread(_cancel)
+        return True
+    
+    def resume_consumer(self, queue_name: str, prefetch_count: int = None) -> bool:
+        """恢复消费队列
+        
+        Args:
+            queue_name: 队列名称
+            prefetch_count: 恢复后使用的未确认消息上限，默认沿用当前配置
+            
+        Returns:
+            是否已提交恢复操作
+        """
+        consumer = self._consumers.get(queue_name)
+        if consumer is None or not consumer["paused"]:
+            return False
+        if prefetch_count is not None:
+            consumer["prefetch_count"] = prefetch_count
+        consumer["paused"] = False
+        
+        def _resume():
+            try:
+                self._start_consumer(queue_name)
+                logger.info(f"已恢复消费队列: {queue_name}，prefetch_count: {consumer['prefetch_count']}")
+            except Exception as e:
+                logger.error(f"恢复消费队列{queue_name}失败: {str(e)}")
+        
+        self._run_in_connection_thread(_resume)
+        return True
+    
+    def set_prefetch(self, queue_name: str, prefetch_count: int) -> bool:
+        """调整队列消费者的未确认消息上限
+        
+        RabbitMQ 的消费者级 prefetch 只对新消费者生效，因此通过取消并重新注册
+        消费者来应用新值；取消时尚未分发到回调的消息由 pika 拒绝并重新入队，
+        已在处理中的消息仍可正常确认。
+        
+        Args:
+            queue_name: 队列名称
+            prefetch_count: 新的未确认消息上限
+            
+        Returns:
+            是否已提交调整
+        """
+        consumer = self._consumers.get(queue_name)
+        if consumer is None or consumer["prefetch_count"] == prefetch_count:
+            return False
+        consumer["prefetch_count"] = prefetch_count
+        if consumer["paused"]:
+            return True
+        
+        def _apply():
+            try:
+                if consumer["paused"]:
+                    return
+                if consumer["consumer_tag"]:
+                    self.channel.basic_cancel(consumer["consumer_tag"])
+                self._start_consumer(queue_name)
+                logger.info(f"已调整队列{queue_name}的prefetch_count为{prefetch_count}")
+            except Exception as e:
+                logger.error(f"调整队列{queue_name}的prefetch_count失败: {str(e)}")
+        
+        self._run_in_connection_thread(_apply)
+        return True
+    
+    def stop_consuming(self):
+        """停止消费循环，可从其他线程调用"""
+        if self._consuming and self.connection and self.connection.is_open:
+            self.connection.add_callback_threadsafe(self.channel.stop_consuming)
+    
+    def get_consumer_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各队列的消费状态
+        
+        Returns:
+            队列名称到消费状态的映射
+        """
+        return {
+            queue_name: {
+                "consumer_tag": consumer["consumer_tag"],
+                "paused": consumer["paused"],
+                "prefetch_count": consumer["prefetch_count"]
+            }
+            for queue_name, consumer in self._consumers.items()
+        }
+    
     def acknowledge(self, delivery_tag: int):
         """确认消息
         
@@ -236,3 +556,217 @@ class RabbitMQConnection:
                 self.channel.basic_reject(delivery_tag=delivery_tag, requeue=requeue)
         except Exception as e:
             logger.error(f"拒绝消息失败: {str(e)}")
+
+
+def stage_queue_arguments(queue_name: str, arguments: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    """为管道配置 queues 中的阶段队列补充队列参数
+
+    设置了 max_priority 的队列加入 x-max-priority；阶段队列统一加入指向死信
+    交换机的 x-dead-letter-exchange 和 x-dead-letter-routing-key，消费者拒绝
+    且不重新入队的消息（重试预算用完或重新投递失败）进入死信队列，由死信
+    处理器和重放工具接管。调用方显式传入的同名参数优先。
+
+    Args:
+        queue_name: 队列名称
+        arguments: 调用方传入的队列参数
+
+    Returns:
+        队列参数，非阶段队列原样返回
+    """
+    queue_config = RabbitMQConnection._get_queue_config(queue_name)
+    if not queue_config:
+        return arguments
+
+    dead_letter = get_error_handling_config().get("dead_letter", {})
+    defaults = {
+        "x-dead-letter-exchange": dead_letter.get("exchange", "dead_letter_exchange"),
+        "x-dead-letter-routing-key": dead_letter.get("routing_key", "dead_letter")
+    }
+    if queue_config.get("max_priority"):
+        defaults["x-max-priority"] = queue_config["max_priority"]
+    return {**defaults, **(arguments or {})}
+
+
+class _ConfirmPublisher:
+    """批量发布使用的确认模式发布器
+
+    BlockingChannel 开启发布确认后每次 basic_publish 都阻塞到确认返回，
+    无法连续发布。发布器改用 pika 的 SelectConnection 适配器建立独立连接，
+    在调用线程中运行其 IOLoop：整批消息连续写出，确认通过 ack_nack_callback
+    异步到达，整批确认完成或超时后停止 IOLoop 返回。
+    """
+
+    def __init__(self, parameters: pika.ConnectionParameters):
+        """初始化发布器
+
+        Args:
+            parameters: 连接参数
+        """
+        self.parameters = parameters
+        self.connection: Optional[pika.SelectConnection] = None
+        self.channel = None
+        self._ready = False
+        self._error = None
+        self._done: Callable[[], bool] = lambda: True
+        self._sequence = 0
+        # 投递标签 -> (所属批次, 批次内下标)
+        self._pending: Dict[int, tuple] = {}
+
+    def _open(self, timeout: float):
+        """建立连接、打开通道并开启发布确认
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Raises:
+            ConnectionError: 连接失败或超时
+        """
+        self.close()
+        self._ready = False
+        self._error = None
+        self._sequence = 0
+        self._pending = {}
+        self.connection = pika.SelectConnection(
+            self.parameters,
+            on_open_callback=self._on_connection_open,
+            on_open_error_callback=self._on_connection_error,
+            on_close_callback=self._on_connection_error
+        )
+        if not self._run_until(lambda: self._ready, timeout):
+            raise ConnectionError(f"{timeout}秒内未能建立确认模式发布连接")
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_channel_open(self, channel):
+        self.channel = channel
+        channel.add_on_close_callback(self._on_connection_error)
+        channel.confirm_delivery(ack_nack_callback=self._on_delivery_confirmation,
+                                 callback=self._on_confirm_selected)
+
+    def _on_confirm_selected(self, frame):
+        self._ready = True
+        self._check_done()
+
+    def _on_connection_error(self, _, error):
+        self._ready = False
+        self._error = error
+        self._check_done()
+
+    def _on_delivery_confirmation(self, frame):
+        """处理服务器的发布确认，multiple 确认会覆盖此前的全部投递标签
+
+        Args:
+            frame: Basic.Ack 或 Basic.Nack 帧
+        """
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = []
+            for delivery_tag in self._pending:
+                if delivery_tag > method.delivery_tag:
+                    break
+                tags.append(delivery_tag)
+        else:
+            tags = [method.delivery_tag]
+
+        for delivery_tag in tags:
+            pending = self._pending.pop(delivery_tag, None)
+            if pending is None:
+                continue
+            batch, index = pending
+            batch["outstanding"] -= 1
+            if not acked:
+                batch["nacked"].append(index)
+        self._check_done()
+
+    def _check_done(self):
+        """等待的条件满足或连接出错时停止 IOLoop"""
+        if self._done() or self._error is not None:
+            self.connection.ioloop.stop()
+
+    def _run_until(self, done: Callable[[], bool], timeout: float) -> bool:
+        """运行 IOLoop 直到条件满足、连接出错或超时
+
+        Args:
+            done: 等待的条件
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            条件是否满足
+
+        Raises:
+            ConnectionError: 连接或通道被关闭
+        """
+        if not done() and self._error is None:
+            ioloop = self.connection.ioloop
+            self._done = done
+            deadline = ioloop.call_later(timeout, ioloop.stop)
+            try:
+                ioloop.start()
+            finally:
+                ioloop.remove_timeout(deadline)
+                self._done = lambda: True
+        if done():
+            return True
+        if self._error is not None:
+            raise ConnectionError(f"确认模式发布连接已关闭: {self._error}")
+        return False
+
+    def publish(self, exchange_name: str, routing_key: str, messages: List[Union[str, bytes]],
+                properties: pika.BasicProperties, timeout: float,
+                result: Dict[str, Any]):
+        """连续发布整批消息并等待确认
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            messages: 消息内容列表
+            properties: 消息属性
+            timeout: 建立连接和等待确认的最长时间（秒）
+            result: 发布结果，published 随发布进度更新，结束时（包括出错时）
+                写入 nacked 和 unconfirmed
+        """
+        deadline = time.monotonic() + timeout
+        if not self._ready or self._error is not None or not self.connection.is_open:
+            self._open(timeout)
+
+        batch = {"outstanding": 0, "nacked": []}
+        tags = []
+        try:
+            for index, message in enumerate(messages):
+                self._sequence += 1
+                self._pending[self._sequence] = (batch, index)
+                tags.append(self._sequence)
+                batch["outstanding"] += 1
+                self.channel.basic_publish(exchange_name, routing_key, message, properties)
+                result["published"] += 1
+            self._run_until(lambda: batch["outstanding"] == 0, max(0.0, deadline - time.monotonic()))
+        finally:
+            unconfirmed = set(range(result["published"], len(messages)))
+            for delivery_tag in tags:
+                pending = self._pending.pop(delivery_tag, None)
+                if pending is not None:
+                    unconfirmed.add(pending[1])
+            result["nacked"] = sorted(batch["nacked"])
+            result["unconfirmed"] = sorted(unconfirmed)
+
+    def close(self):
+        """关闭连接"""
+        connection, self.connection = self.connection, None
+        self.channel = None
+        self._ready = False
+        if connection is None:
+            return
+        try:
+            if connection.is_open:
+                self.connection = connection
+                self._error = None
+                connection.close()
+                # 主动关闭同样会触发关闭回调，回调记录的原因不视为错误
+                self._run_until(lambda: connection.is_closed or self._error is not None, 5)
+        except Exception as e:
+            logger.warning(f"关闭确认模式发布连接失败: {str(e)}")
+        finally:
+            self.connection = None
+            connection.ioloop.close()
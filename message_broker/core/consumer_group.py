@@ -0,0 +1,280 @@
+import json
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from common.logger import get_logger
+from common.config import get_pipeline_config
+from common.utils import hash_text
+from agents.error_handling.retry_scheduler import RetryScheduler
+from message_broker.core.connection import RabbitMQConnection
+from message_broker.core.priority import get_priority_metrics
+
+logger = get_logger(__name__)
+
+
+class AdaptivePrefetch:
+    """根据实测处理耗时调整 prefetch_count
+
+    每个消费者预取约 target_buffer_seconds 秒的工作量：单条耗时短的阶段
+    （如合同分析）预取更多，避免等待服务器投递的往返；单条耗时长的阶段
+    （如法律审查）只预取一两条，避免占住消息让其他消费者无事可做。
+    """
+
+    def __init__(self, initial: int, target_buffer_seconds: float = 2, minimum: int = 1,
+                 maximum: int = 50, smoothing: float = 0.2, adjust_every: int = 20):
+        """初始化调整器
+
+        Args:
+            initial: 初始 prefetch_count
+            target_buffer_seconds: 预取消息约覆盖的处理时间（秒）
+            minimum: prefetch_count 下限
+            maximum: prefetch_count 上限
+            smoothing: 处理耗时指数移动平均的平滑系数
+            adjust_every: 每处理多少条消息评估一次
+        """
+        self.prefetch_count = initial
+        self.target_buffer_seconds = target_buffer_seconds
+        self.minimum = minimum
+        self.maximum = maximum
+        self.smoothing = smoothing
+        self.adjust_every = adjust_every
+        self.avg_seconds: Optional[float] = None
+        self._since_adjust = 0
+
+    def observe(self, seconds: float) -> Optional[int]:
+        """记录一条消息的处理耗时
+
+        Args:
+            seconds: 处理耗时（秒）
+
+        Returns:
+            需要调整时返回新的 prefetch_count，否则返回None
+        """
+        if self.avg_seconds is None:
+            self.avg_seconds = seconds
+        else:
+            self.avg_seconds += self.smoothing * (seconds - self.avg_seconds)
+
+        self._since_adjust += 1
+        if self._since_adjust < self.adjust_every:
+            return None
+        self._since_adjust = 0
+
+        target = math.ceil(self.target_buffer_seconds / max(self.avg_seconds, 1e-3))
+        target = max(self.minimum, min(self.maximum, target))
+        if target == self.prefetch_count:
+            return None
+        self.prefetch_count = target
+        return target
+
+
+class ConsumerGroup:
+    """队列的消费线程组
+
+    按 performance.consumer_threads 启动多个消费线程，每个线程持有独立的
+    RabbitMQConnection（pika 连接不能跨线程共享）、独立的 QoS 和独立的确认，
+    一条消息处理缓慢不会阻塞其他线程的确认。连接断开后线程自动重连继续消费。
+    """
+
+    def __init__(self, queue_name: str, handler: Callable[[Dict[str, Any]], Any],
+                 threads: int = None, prefetch_count: int = None, agent_id: str = None,
+                 adaptive: bool = None, connection_factory: Callable[[], RabbitMQConnection] = None,
+                 reconnect_delay: float = 5, retry_scheduler: RetryScheduler = None):
+        """初始化消费线程组
+
+        Args:
+            queue_name: 队列名称
+            handler: 处理消息的函数，参数为解析后的消息，抛出异常时按重试调度器
+                延迟重新投递，无法重试时消息被拒绝并转入死信
+            threads: 消费线程数，默认读取 performance.consumer_threads
+            prefetch_count: 每个线程的未确认消息上限，默认读取队列或 performance 配置
+            agent_id: 消费该队列的代理ID，提供时登记到消费者注册表
+            adaptive: 是否自动调整 prefetch_count，默认读取 performance.adaptive_prefetch.enabled
+            connection_factory: 创建连接的函数，默认按配置新建 RabbitMQConnection
+            reconnect_delay: 连接断开后重新消费前的等待时间（秒）
+            retry_scheduler: 重试调度器，处理失败的消息通过其延迟队列重新投递，
+                重试预算用完后转入死信，默认新建
+        """
+        performance = get_pipeline_config().get("performance", {})
+        self.adaptive_config = performance.get("adaptive_prefetch", {})
+
+        self.queue_name = queue_name
+        self.handler = handler
+        self.threads = max(1, int(threads or performance.get("consumer_threads", 1)))
+        self.prefetch_count = prefetch_count
+        self.agent_id = agent_id
+        self.adaptive = self.adaptive_config.get("enabled", False) if adaptive is None else adaptive
+        self.connection_factory = connection_factory or RabbitMQConnection
+        self.reconnect_delay = reconnect_delay
+        self.retry_scheduler = retry_scheduler or RetryScheduler()
+
+        self._workers: List[Dict[str, Any]] = []
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def _new_tuner(self, initial: int) -> AdaptivePrefetch:
+        """按配置创建 prefetch 调整器"""
+        return AdaptivePrefetch(
+            initial,
+            target_buffer_seconds=self.adaptive_config.get("target_buffer_seconds", 2),
+            minimum=self.adaptive_config.get("min", 1),
+            maximum=self.adaptive_config.get("max", 50),
+            smoothing=self.adaptive_config.get("smoothing", 0.2),
+            adjust_every=self.adaptive_config.get("adjust_every", 20)
+        )
+
+    def start(self):
+        """启动全部消费线程"""
+        with self._lock:
+            if self._workers:
+                return
+            self._stop_event.clear()
+            for index in range(self.threads):
+                connection = self.connection_factory()
+                prefetch_count = self.prefetch_count or connection.get_queue_prefetch(self.queue_name)
+                worker = {
+                    "index": index,
+                    "connection": connection,
+                    "prefetch_count": prefetch_count,
+                    "tuner": self._new_tuner(prefetch_count) if self.adaptive else None,
+                    "stats": {"processed": 0, "failed": 0, "total_seconds": 0.0, "reconnects": 0}
+                }
+                worker["thread"] = threading.Thread(
+                    target=self._run, args=(worker,),
+                    name=f"consumer-{self.queue_name}-{index}", daemon=True
+                )
+                self._workers.append(worker)
+                worker["thread"].start()
+        logger.info(f"已启动队列{self.queue_name}的{self.threads}个消费线程")
+
+    def _run(self, worker: Dict[str, Any]):
+        """消费线程：阻塞消费，连接断开后等待片刻重新消费
+
+        Args:
+            worker: 线程状态
+        """
+        connection = worker["connection"]
+        callback = self._make_callback(worker)
+        while not self._stop_event.is_set():
+            connection.consume(self.queue_name, callback, auto_ack=False,
+                               prefetch_count=worker["prefetch_count"], agent_id=self.agent_id)
+            if self._stop_event.wait(self.reconnect_delay):
+                break
+            worker["stats"]["reconnects"] += 1
+            logger.warning(f"队列{self.queue_name}的消费线程{worker['index']}停止消费，重新连接")
+        connection.close()
+
+    def _make_callback(self, worker: Dict[str, Any]) -> Callable:
+        """创建消费线程的消息回调
+
+        Args:
+            worker: 线程状态
+
+        Returns:
+            pika 消息回调
+        """
+        connection = worker["connection"]
+        stats = worker["stats"]
+        metrics = get_priority_metrics()
+
+        def _on_message(channel, method, properties, body):
+            started = time.monotonic()
+            published_at = (getattr(properties, "headers", None) or {}).get("published_at")
+            wait_seconds = max(0.0, time.time() - published_at / 1000) if published_at else None
+            message = None
+            task_key = None
+            try:
+                message = json.loads(body)
+                task_key = self._task_key(properties, message, body)
+                self.handler(message)
+                channel.basic_ack(delivery_tag=method.delivery_tag)
+                self.retry_scheduler.complete(task_key)
+                stats["processed"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error(f"队列{self.queue_name}的消息处理失败: {str(e)}")
+                if isinstance(message, dict) and self.retry_scheduler.requeue_via_broker(
+                        connection, task_key, method.exchange, method.routing_key,
+                        message, self.queue_name):
+                    # 副本已进入延迟队列，确认原消息
+                    channel.basic_ack(delivery_tag=method.delivery_tag)
+                else:
+                    # 不重新入队，由队列的死信交换机接管
+                    channel.basic_reject(delivery_tag=method.delivery_tag, requeue=False)
+
+            elapsed = time.monotonic() - started
+            stats["total_seconds"] += elapsed
+            metrics.record(getattr(properties, "priority", None) or 0, wait_seconds, elapsed, self.queue_name)
+            tuner = worker["tuner"]
+            if tuner is not None:
+                new_prefetch = tuner.observe(elapsed)
+                if new_prefetch is not None:
+                    logger.info(f"队列{self.queue_name}平均处理耗时{tuner.avg_seconds * 1000:.0f}毫秒，"
+                                f"prefetch_count调整为{new_prefetch}")
+                    worker["prefetch_count"] = new_prefetch
+                    connection.set_prefetch(self.queue_name, new_prefetch)
+
+        return _on_message
+
+    @staticmethod
+    def _task_key(properties, message: Any, body: bytes) -> str:
+        """获取消息的任务标识，用于区分各合同的重试预算
+
+        Args:
+            properties: 消息属性
+            message: 解析后的消息
+            body: 原始消息体
+
+        Returns:
+            任务标识，重新投递的消息沿用 x-task-key 头
+        """
+        task_key = (getattr(properties, "headers", None) or {}).get("x-task-key")
+        if task_key:
+            return task_key
+        metadata = message.get("metadata", {}) if isinstance(message, dict) else {}
+        return metadata.get("contract_id") or metadata.get("task_id") or hash_text(
+            body.decode("utf-8", errors="replace") if isinstance(body, bytes) else str(body))
+
+    def stop(self, timeout: float = 10):
+        """停止全部消费线程，正在处理的消息处理完毕后退出
+
+        Args:
+            timeout: 等待每个线程退出的最长时间（秒）
+        """
+        self._stop_event.set()
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker["connection"].stop_consuming()
+        for worker in workers:
+            worker["thread"].join(timeout=timeout)
+        logger.info(f"已停止队列{self.queue_name}的消费线程")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取消费线程组统计
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            workers = list(self._workers)
+        result = []
+        for worker in workers:
+            stats = worker["stats"]
+            handled = stats["processed"] + stats["failed"]
+            result.append({
+                "index": worker["index"],
+                "alive": worker["thread"].is_alive(),
+                "prefetch_count": worker["prefetch_count"],
+                "processed": stats["processed"],
+                "failed": stats["failed"],
+                "reconnects": stats["reconnects"],
+                "avg_ms": stats["total_seconds"] / handled * 1000 if handled else 0.0
+            })
+        return {
+            "queue": self.queue_name,
+            "threads": self.threads,
+            "adaptive": self.adaptive,
+            "workers": result
+        }
@@ -0,0 +1,130 @@
+import threading
+from typing import Any, Dict, List, Tuple
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+_instance = None
+_instance_lock = threading.Lock()
+
+
+class ConsumerRegistry:
+    """代理与其消息消费者的对应关系
+
+    代理开始消费队列时登记，人工干预和管理接口据此暂停或恢复该代理的
+    消费者，实现真正的背压：暂停期间队列中的消息留在服务器上，不再被
+    拉取后失败。
+    """
+
+    def __init__(self):
+        """初始化消费者注册表"""
+        self._consumers: Dict[str, List[Tuple[Any, str]]] = {}
+        self._paused = set()
+        self._lock = threading.Lock()
+
+    def register(self, agent_id: str, connection, queue_name: str):
+        """登记代理的消费者
+
+        Args:
+            agent_id: 代理ID
+            connection: 消费所用的 RabbitMQConnection
+            queue_name: 队列名称
+        """
+        with self._lock:
+            consumers = self._consumers.setdefault(agent_id, [])
+            if (connection, queue_name) not in consumers:
+                consumers.append((connection, queue_name))
+            paused = agent_id in self._paused
+        # 代理在暂停期间重新登记时保持暂停
+        if paused:
+            connection.pause_consumer(queue_name)
+
+    def unregister(self, agent_id: str):
+        """移除代理的全部消费者
+
+        Args:
+            agent_id: 代理ID
+        """
+        with self._lock:
+            self._consumers.pop(agent_id, None)
+            self._paused.discard(agent_id)
+
+    def pause(self, agent_id: str) -> int:
+        """暂停代理的全部消费者
+
+        Args:
+            agent_id: 代理ID
+
+        Returns:
+            暂停的消费者数
+        """
+        with self._lock:
+            self._paused.add(agent_id)
+            consumers = list(self._consumers.get(agent_id, []))
+        paused = sum(1 for connection, queue_name in consumers if connection.pause_consumer(queue_name))
+        logger.info(f"代理{agent_id}已暂停{paused}个消费者")
+        return paused
+
+    def resume(self, agent_id: str, prefetch_count: int = None) -> int:
+        """恢复代理的全部消费者
+
+        Args:
+            agent_id: 代理ID
+            prefetch_count: 恢复后使用的未确认消息上限，默认沿用连接配置
+
+        Returns:
+            恢复的消费者数
+        """
+        with self._lock:
+            self._paused.discard(agent_id)
+            consumers = list(self._consumers.get(agent_id, []))
+        resumed = sum(
+            1 for connection, queue_name in consumers
+            if connection.resume_consumer(queue_name, prefetch_count)
+        )
+        logger.info(f"代理{agent_id}已恢复{resumed}个消费者")
+        return resumed
+
+    def is_paused(self, agent_id: str) -> bool:
+        """判断代理是否已暂停
+
+        Args:
+            agent_id: 代理ID
+
+        Returns:
+            是否暂停
+        """
+        return agent_id in self._paused
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """获取各代理的消费者状态
+
+        Returns:
+            代理ID到消费者状态的映射
+        """
+        with self._lock:
+            consumers = {agent_id: list(items) for agent_id, items in self._consumers.items()}
+            paused = set(self._paused)
+        return {
+            agent_id: {
+                "paused": agent_id in paused,
+                "queues": {
+                    queue_name: connection.get_consumer_status().get(queue_name, {})
+                    for connection, queue_name in items
+                }
+            }
+            for agent_id, items in consumers.items()
+        }
+
+
+def get_consumer_registry() -> ConsumerRegistry:
+    """获取进程内共享的消费者注册表
+
+    Returns:
+        消费者注册表
+    """
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            _instance = ConsumerRegistry()
+        return _instance
@@ -0,0 +1,565 @@
+import asyncio
+import itertools
+import re
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Union
+from common.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class Message:
+    """待发布的消息，属性与 aio_pika.Message 保持一致"""
+
+    def __init__(self, body: bytes, **properties):
+        """初始化消息
+
+        Args:
+            body: 消息内容
+            **properties: 消息属性，如 delivery_mode、content_type、headers、priority
+        """
+        self.body = body
+        self.headers = properties.pop("headers", None) or {}
+        self.properties = properties
+
+
+class IncomingMessage:
+    """投递给消费者的消息，支持 ack、reject 和 nack"""
+
+    def __init__(self, queue: "_QueueState", consumer: Optional["_Consumer"], delivery_tag: int,
+                 message: Message, exchange: str, routing_key: str, redelivered: bool = False):
+        self._queue = queue
+        self._consumer = consumer
+        self._message = message
+        self._settled = consumer is None or consumer.no_ack
+        self.delivery_tag = delivery_tag
+        self.body = message.body
+        self.headers = message.headers
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.redelivered = redelivered
+        for name, value in message.properties.items():
+            setattr(self, name, value)
+
+    def _settle(self):
+        """结束本条消息的未确认状态"""
+        if self._settled:
+            raise RuntimeError(f"消息{self.delivery_tag}已确认或拒绝")
+        self._settled = True
+        if self._consumer is not None:
+            self._consumer.unacked -= 1
+
+    def _ack(self):
+        """确认消息，同步版本供 BlockingChannel 使用"""
+        self._settle()
+        self._queue.dispatch()
+
+    def _reject(self, requeue: bool):
+        """拒绝消息，同步版本供 BlockingChannel 使用
+
+        Args:
+            requeue: 是否重新入队，否则按队列的 x-dead-letter-exchange 转入死信
+        """
+        self._settle()
+        if requeue:
+            self._queue.pending.appendleft((self._message, self.exchange, self.routing_key, True))
+        else:
+            self._queue.dead_letter(self._message, self.exchange, self.routing_key)
+        self._queue.dispatch()
+
+    async def ack(self):
+        """确认消息"""
+        self._ack()
+
+    async def reject(self, requeue: bool = False):
+        """拒绝消息
+
+        Args:
+            requeue: 是否重新入队，否则按队列的 x-dead-letter-exchange 转入死信
+        """
+        self._reject(requeue)
+
+    async def nack(self, requeue: bool = True):
+        """否定确认消息
+
+        Args:
+            requeue: 是否重新入队
+        """
+        await self.reject(requeue=requeue)
+
+
+class _Consumer:
+    """队列上的一个消费者"""
+
+    def __init__(self, tag: str, callback: Callable, no_ack: bool, prefetch_count: int):
+        self.tag = tag
+        self.callback = callback
+        self.no_ack = no_ack
+        self.prefetch_count = prefetch_count
+        self.unacked = 0
+
+    def has_capacity(self) -> bool:
+        return self.no_ack or not self.prefetch_count or self.unacked < self.prefetch_count
+
+
+class _QueueState:
+    """队列在内存中的状态：待投递消息和消费者"""
+
+    def __init__(self, broker: "InMemoryBroker", name: str, arguments: Dict[str, Any]):
+        self.broker = broker
+        self.name = name
+        self.arguments = arguments or {}
+        self.pending: Deque[Tuple[Message, str, str, bool]] = deque()
+        self.consumers: List[_Consumer] = []
+        self._next_consumer = 0
+
+    def dispatch(self):
+        """按预取上限把待投递消息轮流分发给消费者"""
+        while self.pending and self.consumers:
+            consumer = None
+            for offset in range(len(self.consumers)):
+                candidate = self.consumers[(self._next_consumer + offset) % len(self.consumers)]
+                if candidate.has_capacity():
+                    consumer = candidate
+                    self._next_consumer = (self._next_consumer + offset + 1) % len(self.consumers)
+                    break
+            if consumer is None:
+                return
+
+            message, exchange, routing_key, redelivered = self.pending.popleft()
+            if not consumer.no_ack:
+                consumer.unacked += 1
+            incoming = IncomingMessage(self, consumer, next(self.broker._delivery_tags), message,
+                                       exchange, routing_key, redelivered)
+            self.broker.stats["delivered"] += 1
+            task = asyncio.get_running_loop().create_task(consumer.callback(incoming))
+            self.broker._tasks.add(task)
+            task.add_done_callback(self.broker._on_task_done)
+
+    def dead_letter(self, message: Message, exchange: str, routing_key: str):
+        """按 x-dead-letter-exchange 转发被拒绝的消息，未配置时丢弃
+
+        与 RabbitMQ 一样在 x-death 头中记录原队列、原交换机和原路由键。
+
+        Args:
+            message: 消息
+            exchange: 原交换机
+            routing_key: 原路由键
+        """
+        dead_letter_exchange = self.arguments.get("x-dead-letter-exchange")
+        if dead_letter_exchange is None:
+            self.broker.stats["dropped"] += 1
+            return
+        death = {"queue": self.name, "reason": "rejected", "exchange": exchange,
+                 "routing-keys": [routing_key], "time": datetime.now(), "count": 1}
+        headers = {**message.headers, "x-death": [death] + list(message.headers.get("x-death", []))}
+        self.broker.route(dead_letter_exchange, self.arguments.get("x-dead-letter-routing-key", routing_key),
+                          Message(message.body, headers=headers, **message.properties))
+
+
+class Exchange:
+    """交换机，属性与 aio_pika.Exchange 的发布接口保持一致"""
+
+    def __init__(self, broker: "InMemoryBroker", name: str, type: str = "direct"):
+        self.broker = broker
+        self.name = name
+        self.type = type
+        self.bindings: List[Tuple[str, str]] = []
+
+    async def publish(self, message: Message, routing_key: str, mandatory: bool = True):
+        """发布消息
+
+        Args:
+            message: 消息
+            routing_key: 路由键
+            mandatory: 是否要求路由到队列（内存代理只计入 unroutable 统计）
+        """
+        if not self.broker.route(self.name, routing_key, message):
+            logger.debug(f"消息未路由到任何队列: {self.name or '(default)'}，路由键: {routing_key}")
+
+    def matches(self, pattern: str, routing_key: str) -> bool:
+        """判断绑定键是否匹配路由键
+
+        Args:
+            pattern: 绑定键
+            routing_key: 路由键
+
+        Returns:
+            是否匹配
+        """
+        if self.type == "fanout":
+            return True
+        if self.type == "topic":
+            regex = "^" + re.escape(pattern).replace(r"\*", r"[^.]+").replace(r"\#", r".*") + "$"
+            return re.match(regex, routing_key) is not None
+        return pattern == routing_key
+
+
+class Queue:
+    """队列句柄，接口与 aio_pika.Queue 保持一致"""
+
+    def __init__(self, channel: "Channel", state: _QueueState):
+        self.channel = channel
+        self.name = state.name
+        self._state = state
+
+    async def bind(self, exchange: Union[str, Exchange], routing_key: str = None):
+        """绑定到交换机
+
+        Args:
+            exchange: 交换机或交换机名称
+            routing_key: 绑定键
+        """
+        name = exchange if isinstance(exchange, str) else exchange.name
+        target = self.channel.broker.exchanges.get(name)
+        if target is None:
+            raise LookupError(f"交换机不存在: {name}")
+        binding = (self.name, routing_key or self.name)
+        if binding not in target.bindings:
+            target.bindings.append(binding)
+
+    async def consume(self, callback: Callable, no_ack: bool = False) -> str:
+        """注册消费者
+
+        Args:
+            callback: 接收 IncomingMessage 的协程函数
+            no_ack: 是否自动确认
+
+        Returns:
+            消费者标签
+        """
+        tag = f"ctag-{next(self.channel.broker._consumer_tags)}"
+        self._state.consumers.append(_Consumer(tag, callback, no_ack, self.channel.prefetch_count))
+        self._state.dispatch()
+        return tag
+
+    async def cancel(self, consumer_tag: str):
+        """取消消费者，已投递未确认的消息仍可确认
+
+        Args:
+            consumer_tag: 消费者标签
+        """
+        self._state.consumers = [c for c in self._state.consumers if c.tag != consumer_tag]
+        self._state._next_consumer = 0
+
+    async def get(self, no_ack: bool = False, fail: bool = True) -> Optional[IncomingMessage]:
+        """拉取一条消息
+
+        Args:
+            no_ack: 是否自动确认
+            fail: 队列为空时是否抛出异常
+
+        Returns:
+            消息，队列为空且 fail 为False时返回None
+        """
+        if not self._state.pending:
+            if fail:
+                raise LookupError(f"队列为空: {self.name}")
+            return None
+        message, exchange, routing_key, redelivered = self._state.pending.popleft()
+        consumer = None if no_ack else _Consumer("get", None, False, 0)
+        if consumer is not None:
+            consumer.unacked = 1
+        return IncomingMessage(self._state, consumer, next(self.channel.broker._delivery_tags),
+                               message, exchange, routing_key, redelivered)
+
+
+class Channel:
+    """通道，接口与 aio_pika.Channel 保持一致"""
+
+    def __init__(self, connection: "Connection"):
+        self.connection = connection
+        self.broker = connection.broker
+        self.prefetch_count = 0
+        self.is_closed = False
+        self.default_exchange = self.broker.exchanges[""]
+
+    async def set_qos(self, prefetch_count: int = 0):
+        """设置之后注册的消费者的预取上限
+
+        Args:
+            prefetch_count: 未确认消息上限，0 表示不限
+        """
+        self.prefetch_count = prefetch_count
+
+    async def declare_exchange(self, name: str, type: str = "direct", durable: bool = True) -> Exchange:
+        """声明交换机
+
+        Args:
+            name: 交换机名称
+            type: 交换机类型
+            durable: 是否持久化（内存代理忽略）
+
+        Returns:
+            交换机
+        """
+        exchange = self.broker.exchanges.get(name)
+        if exchange is None:
+            exchange = self.broker.exchanges[name] = Exchange(self.broker, name, type)
+        elif exchange.type != type:
+            raise ValueError(f"交换机{name}已声明为{exchange.type}类型")
+        return exchange
+
+    async def get_exchange(self, name: str) -> Exchange:
+        """获取已存在的交换机
+
+        Args:
+            name: 交换机名称
+
+        Returns:
+            交换机
+        """
+        exchange = self.broker.exchanges.get(name)
+        if exchange is None:
+            raise LookupError(f"交换机不存在: {name}")
+        return exchange
+
+    async def declare_queue(self, name: str, durable: bool = True, arguments: Dict[str, Any] = None) -> Queue:
+        """声明队列
+
+        Args:
+            name: 队列名称
+            durable: 是否持久化（内存代理忽略）
+            arguments: 队列参数
+
+        Returns:
+            队列
+        """
+        state = self.broker.queues.get(name)
+        if state is None:
+            state = self.broker.queues[name] = _QueueState(self.broker, name, arguments)
+        return Queue(self, state)
+
+    async def get_queue(self, name: str) -> Queue:
+        """获取已存在的队列
+
+        Args:
+            name: 队列名称
+
+        Returns:
+            队列
+        """
+        state = self.broker.queues.get(name)
+        if state is None:
+            raise LookupError(f"队列不存在: {name}")
+        return Queue(self, state)
+
+    async def close(self):
+        self.is_closed = True
+
+
+class Connection:
+    """连接，接口与 aio_pika.RobustConnection 保持一致"""
+
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+        self.is_closed = False
+
+    async def channel(self) -> Channel:
+        if self.is_closed:
+            raise ConnectionError("连接已关闭")
+        return Channel(self)
+
+    async def close(self):
+        self.is_closed = True
+
+
+class BlockingChannel:
+    """同步通道，接口与 pika BlockingChannel 的拉取、发布和确认方法保持一致
+
+    供死信重放等使用 basic_get 的同步工具在没有 RabbitMQ 的环境中运行。
+    basic_get 返回的 IncomingMessage 同时充当 pika 的 method（delivery_tag、
+    exchange、routing_key、redelivered）和 properties（headers 等）。
+    """
+
+    def __init__(self, broker: "InMemoryBroker"):
+        self.broker = broker
+        self.is_open = True
+        self._confirm = False
+        self._unacked: Dict[int, IncomingMessage] = {}
+
+    def confirm_delivery(self):
+        """开启发布确认，之后 mandatory 消息未路由时抛出 UnroutableError"""
+        self._confirm = True
+
+    def basic_get(self, queue: str, auto_ack: bool = False) -> Tuple[Any, Any, Optional[bytes]]:
+        """拉取一条消息
+
+        Args:
+            queue: 队列名称
+            auto_ack: 是否自动确认
+
+        Returns:
+            (method, properties, body)，队列为空时为 (None, None, None)
+        """
+        state = self.broker.queues.get(queue)
+        if state is None:
+            raise LookupError(f"队列不存在: {queue}")
+        if not state.pending:
+            return None, None, None
+        message, exchange, routing_key, redelivered = state.pending.popleft()
+        consumer = None if auto_ack else _Consumer("get", None, False, 0)
+        incoming = IncomingMessage(state, consumer, next(self.broker._delivery_tags), message,
+                                   exchange, routing_key, redelivered)
+        if not auto_ack:
+            self._unacked[incoming.delivery_tag] = incoming
+        return incoming, incoming, incoming.body
+
+    def basic_publish(self, exchange: str, routing_key: str, body: Union[str, bytes],
+                      properties: Any = None, mandatory: bool = False):
+        """发布消息
+
+        Args:
+            exchange: 交换机名称
+            routing_key: 路由键
+            body: 消息内容
+            properties: pika.BasicProperties 或同类对象
+            mandatory: 是否要求路由到队列
+        """
+        message_properties = {
+            name: getattr(properties, name)
+            for name in ("delivery_mode", "content_type", "priority", "expiration")
+            if getattr(properties, name, None) is not None
+        }
+        message = Message(body.encode("utf-8") if isinstance(body, str) else body,
+                          headers=dict(getattr(properties, "headers", None) or {}), **message_properties)
+        if not self.broker.route(exchange, routing_key, message) and mandatory and self._confirm:
+            from pika.exceptions import UnroutableError
+            raise UnroutableError([])
+
+    def basic_ack(self, delivery_tag: int):
+        """确认消息
+
+        Args:
+            delivery_tag: 投递标签
+        """
+        self._unacked.pop(delivery_tag)._ack()
+
+    def basic_nack(self, delivery_tag: int, requeue: bool = True):
+        """否定确认消息
+
+        Args:
+            delivery_tag: 投递标签
+            requeue: 是否重新入队，否则转入死信
+        """
+        self._unacked.pop(delivery_tag)._reject(requeue)
+
+    def close(self):
+        """关闭通道，未确认的消息重新入队"""
+        for incoming in reversed(list(self._unacked.values())):
+            incoming._reject(True)
+        self._unacked.clear()
+        self.is_open = False
+
+
+class InMemoryBroker:
+    """进程内的 RabbitMQ 替身
+
+    提供与 aio_pika 模块相同的 connect_robust 和 Message 入口，可直接作为
+    AsyncRabbitMQConnection 的 client 参数，在没有 RabbitMQ 的环境中验证
+    声明、路由、预取、确认、重新入队和死信转发的行为。
+    """
+
+    Message = Message
+
+    def __init__(self):
+        self.exchanges: Dict[str, Exchange] = {"": Exchange(self, "", "direct")}
+        self.queues: Dict[str, _QueueState] = {}
+        self.connections: List[Connection] = []
+        self.stats = {"published": 0, "unroutable": 0, "delivered": 0, "dropped": 0, "callback_errors": 0}
+        self._delivery_tags = itertools.count(1)
+        self._consumer_tags = itertools.count(1)
+        self._tasks = set()
+
+    async def connect_robust(self, url: str = None, **kwargs) -> Connection:
+        """建立连接
+
+        Args:
+            url: 连接地址（内存代理忽略）
+
+        Returns:
+            连接
+        """
+        connection = Connection(self)
+        self.connections.append(connection)
+        return connection
+
+    def route(self, exchange_name: str, routing_key: str, message: Message) -> bool:
+        """把消息路由到匹配的队列
+
+        Args:
+            exchange_name: 交换机名称，空字符串为默认交换机
+            routing_key: 路由键
+            message: 消息
+
+        Returns:
+            是否路由到至少一个队列
+        """
+        self.stats["published"] += 1
+        if exchange_name == "":
+            targets = [routing_key] if routing_key in self.queues else []
+        else:
+            exchange = self.exchanges.get(exchange_name)
+            if exchange is None:
+                raise LookupError(f"交换机不存在: {exchange_name}")
+            targets = list(dict.fromkeys(
+                queue for queue, pattern in exchange.bindings if exchange.matches(pattern, routing_key)
+            ))
+
+        if not targets:
+            self.stats["unroutable"] += 1
+            return False
+        for name in targets:
+            state = self.queues[name]
+            state.pending.append((message, exchange_name, routing_key, False))
+            state.dispatch()
+        return True
+
+    def _on_task_done(self, task: asyncio.Task):
+        """回收消费回调任务并记录异常"""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["callback_errors"] += 1
+            logger.error(f"消费回调异常: {str(task.exception())}")
+
+    def blocking_channel(self) -> BlockingChannel:
+        """创建同步通道
+
+        Returns:
+            同步通道
+        """
+        return BlockingChannel(self)
+
+    def queue_depth(self, queue_name: str) -> int:
+        """获取队列中待投递的消息数
+
+        Args:
+            queue_name: 队列名称
+
+        Returns:
+            消息数
+        """
+        state = self.queues.get(queue_name)
+        return len(state.pending) if state else 0
+
+    async def drain(self, timeout: float = 5):
+        """等待已投递的消费回调全部执行完毕
+
+        Args:
+            timeout: 最长等待时间（秒）
+        """
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._tasks:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError("等待消费回调超时")
+            await asyncio.wait(list(self._tasks), timeout=remaining)
+
+    def disconnect_all(self):
+        """模拟 RabbitMQ 重启，关闭全部连接并取消其上的消费者"""
+        for connection in self.connections:
+            connection.is_closed = True
+        for state in self.queues.values():
+            state.consumers = []
+            state._next_consumer = 0
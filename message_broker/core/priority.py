@@ -0,0 +1,157 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Union
+from common.logger import get_logger
+from common.config import get_pipeline_config
+
+logger = get_logger(__name__)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def _message_config() -> Dict[str, Any]:
+    return get_pipeline_config().get("message", {})
+
+
+def resolve_priority(value: Union[int, str, None] = None) -> int:
+    """把优先级统一转换为 AMQP 消息优先级
+
+    Args:
+        value: 整数优先级、priority_levels 中的级别名（如 high）或上传页面的
+            选项（如 加急），为空时使用 message.default_priority
+
+    Returns:
+        消息优先级
+    """
+    message_config = _message_config()
+    levels = message_config.get("priority_levels", {})
+    if value is None or value == "":
+        value = message_config.get("default_priority", "medium")
+
+    if isinstance(value, str):
+        value = message_config.get("upload_priorities", {}).get(value, value)
+        if value in levels:
+            return levels[value]
+        try:
+            value = int(value)
+        except ValueError:
+            logger.warning(f"未知的优先级{value}，使用默认优先级")
+            return levels.get(message_config.get("default_priority", "medium"), 0)
+    return max(0, int(value))
+
+
+def get_bulk_priority() -> int:
+    """获取批量重新处理（死信重放、积压释放）使用的优先级
+
+    Returns:
+        消息优先级
+    """
+    return resolve_priority(_message_config().get("bulk_priority", "low"))
+
+
+def get_aging_seconds() -> float:
+    """获取优先级老化周期：任务每等待该秒数，有效优先级提升1级
+
+    Returns:
+        老化周期（秒），0 表示不老化
+    """
+    return float(_message_config().get("aging_seconds", 30))
+
+
+def get_priority_name(priority: int) -> str:
+    """获取优先级对应的级别名
+
+    Args:
+        priority: 消息优先级
+
+    Returns:
+        级别名，没有对应级别时返回数字本身
+    """
+    for name, level in _message_config().get("priority_levels", {}).items():
+        if level == priority:
+            return name
+    return str(priority)
+
+
+class PriorityLatencyMetrics:
+    """按优先级统计等待时间和处理时间"""
+
+    def __init__(self, window: int = 1000):
+        """初始化统计
+
+        Args:
+            window: 每个优先级保留的最近样本数
+        """
+        self.window = window
+        self._samples: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, priority: int, wait_seconds: Optional[float],
+               processing_seconds: Optional[float] = None, stage: str = None):
+        """记录一个任务的耗时
+
+        Args:
+            priority: 消息优先级
+            wait_seconds: 从入队到开始处理的等待时间（秒），无法获知时为None
+            processing_seconds: 处理时间（秒）
+            stage: 阶段或队列名称
+        """
+        with self._lock:
+            samples = self._samples.get((stage, priority))
+            if samples is None:
+                samples = self._samples[(stage, priority)] = {
+                    "count": 0,
+                    "wait": deque(maxlen=self.window),
+                    "processing": deque(maxlen=self.window)
+                }
+            samples["count"] += 1
+            if wait_seconds is not None:
+                samples["wait"].append(wait_seconds)
+            if processing_seconds is not None:
+                samples["processing"].append(processing_seconds)
+
+    @staticmethod
+    def _summarize(values: Deque[float]) -> Dict[str, float]:
+        """计算样本的平均值、P95 和最大值（毫秒）"""
+        if not values:
+            return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(values)
+        return {
+            "avg_ms": sum(ordered) / len(ordered) * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+            "max_ms": ordered[-1] * 1000
+        }
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取统计
+
+        Returns:
+            阶段名称到各优先级统计的映射
+        """
+        with self._lock:
+            snapshot = {key: (s["count"], list(s["wait"]), list(s["processing"]))
+                        for key, s in self._samples.items()}
+        result: Dict[str, Dict[str, Any]] = {}
+        for (stage, priority), (count, wait, processing) in sorted(
+                snapshot.items(), key=lambda item: (str(item[0][0]), -item[0][1])):
+            result.setdefault(stage or "all", {})[get_priority_name(priority)] = {
+                "priority": priority,
+                "count": count,
+                "wait": self._summarize(wait),
+                "processing": self._summarize(processing)
+            }
+        return result
+
+
+def get_priority_metrics() -> PriorityLatencyMetrics:
+    """获取进程内共享的优先级耗时统计
+
+    Returns:
+        耗时统计
+    """
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = PriorityLatencyMetrics()
+        return _metrics
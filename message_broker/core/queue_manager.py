@@ -0,0 +1,303 @@
+import json
+import threading
+from typing import Any, Dict, List, Union
+from common.logger import get_logger
+from message_broker.core.connection import RabbitMQConnection
+from message_broker.core.priority import resolve_priority
+
+logger = get_logger(__name__)
+
+_sessions: Dict[str, "BrokerSession"] = {}
+_sessions_lock = threading.Lock()
+
+
+class BrokerSession:
+    """进程内共享的 RabbitMQ 会话
+
+    持有一条共享连接，并缓存已声明的交换机、队列和绑定：同一拓扑在进程
+    内只向服务器声明一次，之后的声明直接命中缓存，不再产生网络往返。
+    连接断开重连后清空缓存，按需重新声明。
+    """
+
+    def __init__(self, connection: RabbitMQConnection = None):
+        """初始化会话
+
+        Args:
+            connection: RabbitMQ 连接，默认按配置新建，首次使用时才建立
+        """
+        self.connection = connection or RabbitMQConnection()
+        self._declared = set()
+        self._generation = None
+        self._lock = threading.RLock()
+        self._stats = {"declarations": 0, "cache_hits": 0, "reconnects": 0}
+
+    def ensure_connected(self) -> bool:
+        """确保连接可用，断开时重连并清空拓扑缓存
+
+        Returns:
+            连接是否可用
+        """
+        with self._lock:
+            if not self.connection.ensure_connected():
+                return False
+            if self._generation != self.connection.generation:
+                if self._generation is not None:
+                    self._stats["reconnects"] += 1
+                self._declared.clear()
+                self._generation = self.connection.generation
+            return True
+
+    def _declare(self, key: tuple, declare) -> bool:
+        """执行声明并记录到缓存
+
+        Args:
+            key: 拓扑缓存键
+            declare: 实际执行声明的函数
+
+        Returns:
+            是否成功声明
+        """
+        with self._lock:
+            # 连接可能已由其他调用方重建，代数变化时缓存的拓扑不再可信
+            if key in self._declared and self._generation == self.connection.generation:
+                self._stats["cache_hits"] += 1
+                return True
+            if not self.ensure_connected():
+                return False
+            if not declare():
+                return False
+            self._declared.add(key)
+            self._stats["declarations"] += 1
+            return True
+
+    def declare_exchange(self, exchange_name: str, exchange_type: str = "direct",
+                         durable: bool = True) -> bool:
+        """声明交换机，已声明过时直接返回
+
+        Args:
+            exchange_name: 交换机名称
+            exchange_type: 交换机类型
+            durable: 是否持久化
+
+        Returns:
+            是否成功声明
+        """
+        return self._declare(
+            ("exchange", exchange_name, exchange_type, durable),
+            lambda: self.connection.declare_exchange(exchange_name, exchange_type, durable)
+        )
+
+    def declare_queue(self, queue_name: str, durable: bool = True,
+                      arguments: Dict[str, Any] = None) -> bool:
+        """声明队列，已声明过时直接返回
+
+        Args:
+            queue_name: 队列名称
+            durable: 是否持久化
+            arguments: 队列参数
+
+        Returns:
+            是否成功声明
+        """
+        return self._declare(
+            ("queue", queue_name, durable, json.dumps(arguments or {}, sort_keys=True, default=str)),
+            lambda: self.connection.declare_queue(queue_name, durable, arguments)
+        )
+
+    def bind_queue(self, queue_name: str, exchange_name: str, routing_key: str) -> bool:
+        """绑定队列到交换机，已绑定过时直接返回
+
+        Args:
+            queue_name: 队列名称
+            exchange_name: 交换机名称
+            routing_key: 路由键
+
+        Returns:
+            是否成功绑定
+        """
+        return self._declare(
+            ("binding", queue_name, exchange_name, routing_key),
+            lambda: self.connection.bind_queue(queue_name, exchange_name, routing_key)
+        )
+
+    def publish_message(self, exchange_name: str, routing_key: str, message: str,
+                        properties=None, priority: int = None) -> bool:
+        """通过共享连接发布消息
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            message: 消息内容
+            properties: 消息属性
+            priority: 消息优先级
+
+        Returns:
+            是否成功发布
+        """
+        with self._lock:
+            if not self.ensure_connected():
+                return False
+            return self.connection.publish_message(exchange_name, routing_key, message, properties, priority)
+
+    def publish_batch(self, exchange_name: str, routing_key: str, messages: List[Union[str, bytes]],
+                      properties=None, timeout: float = 30, priority: int = None) -> Dict[str, Any]:
+        """通过共享连接批量发布消息并等待发布确认
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            messages: 消息内容列表
+            properties: 消息属性
+            timeout: 等待确认的最长时间（秒）
+            priority: 整批消息的优先级
+
+        Returns:
+            发布结果，见 RabbitMQConnection.publish_batch
+        """
+        with self._lock:
+            if not self.ensure_connected():
+                return {"published": 0, "acked": 0, "nacked": [], "unconfirmed": list(range(len(messages)))}
+            return self.connection.publish_batch(exchange_name, routing_key, messages, properties, timeout,
+                                                 priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取会话统计
+
+        Returns:
+            统计信息
+        """
+        with self._lock:
+            return {**self._stats, "declared": len(self._declared)}
+
+    def close(self):
+        """关闭共享连接"""
+        with self._lock:
+            self.connection.close()
+            self._declared.clear()
+
+
+def get_broker_session(name: str = "default") -> BrokerSession:
+    """获取进程内共享的 RabbitMQ 会话
+
+    Args:
+        name: 会话名称，不同名称使用不同连接
+
+    Returns:
+        会话
+    """
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = BrokerSession()
+        return session
+
+
+class QueueManager:
+    """队列管理器
+
+    各错误处理器和代理使用的轻量门面，所有实例共享同一个 BrokerSession，
+    创建实例不会新建连接或重复声明拓扑。
+    """
+
+    def __init__(self, session: BrokerSession = None):
+        """初始化队列管理器
+
+        Args:
+            session: RabbitMQ 会话，默认使用进程内共享会话
+        """
+        self.session = session or get_broker_session()
+
+    def declare_exchange(self, exchange_name: str, exchange_type: str = "direct",
+                         durable: bool = True) -> bool:
+        """声明交换机
+
+        Args:
+            exchange_name: 交换机名称
+            exchange_type: 交换机类型
+            durable: 是否持久化
+
+        Returns:
+            是否成功声明
+        """
+        return self.session.declare_exchange(exchange_name, exchange_type, durable)
+
+    def declare_queue(self, queue_name: str, durable: bool = True,
+                      arguments: Dict[str, Any] = None) -> bool:
+        """声明队列
+
+        Args:
+            queue_name: 队列名称
+            durable: 是否持久化
+            arguments: 队列参数
+
+        Returns:
+            是否成功声明
+        """
+        return self.session.declare_queue(queue_name, durable, arguments)
+
+    def bind_queue(self, queue_name: str, exchange_name: str, routing_key: str) -> bool:
+        """绑定队列到交换机
+
+        Args:
+            queue_name: 队列名称
+            exchange_name: 交换机名称
+            routing_key: 路由键
+
+        Returns:
+            是否成功绑定
+        """
+        return self.session.bind_queue(queue_name, exchange_name, routing_key)
+
+    def publish_message(self, exchange_name: str, routing_key: str,
+                        message: Union[Dict[str, Any], str], properties=None,
+                        priority: Union[int, str] = None) -> bool:
+        """发布消息
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            message: 消息内容，字典会序列化为JSON
+            properties: 消息属性
+            priority: 消息优先级或级别名，未指定时使用字典消息 metadata.priority，
+                使任务在各阶段之间保持上传时选择的优先级
+
+        Returns:
+            是否成功发布
+        """
+        if priority is None and isinstance(message, dict) and "priority" in message.get("metadata", {}):
+            priority = message["metadata"]["priority"]
+        if not isinstance(message, (str, bytes)):
+            message = json.dumps(message, ensure_ascii=False, default=str)
+        return self.session.publish_message(exchange_name, routing_key, message, properties,
+                                            None if priority is None else resolve_priority(priority))
+
+    def publish_batch(self, exchange_name: str, routing_key: str,
+                      messages: List[Union[Dict[str, Any], str]], properties=None,
+                      timeout: float = 30, priority: Union[int, str] = None) -> Dict[str, Any]:
+        """批量发布消息并等待发布确认
+
+        Args:
+            exchange_name: 交换机名称
+            routing_key: 路由键
+            messages: 消息内容列表，字典会序列化为JSON
+            properties: 消息属性
+            timeout: 等待确认的最长时间（秒）
+            priority: 整批消息的优先级或级别名
+
+        Returns:
+            发布结果，nacked 和 unconfirmed 为需要重试的消息下标
+        """
+        bodies = [
+            message if isinstance(message, (str, bytes)) else json.dumps(message, ensure_ascii=False, default=str)
+            for message in messages
+        ]
+        return self.session.publish_batch(exchange_name, routing_key, bodies, properties, timeout,
+                                          None if priority is None else resolve_priority(priority))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取共享会话统计
+
+        Returns:
+            统计信息
+        """
+        return self.session.get_stats()
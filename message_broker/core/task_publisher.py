@@ -0,0 +1,87 @@
+import os
+from typing import Any, Dict
+from common.logger import get_logger
+from common.config import get_config, get_pipeline_config
+from common.utils import ensure_dir, format_timestamp, generate_uuid
+from core_services.contract_processor.text_extractor import extract_text
+from message_broker.core.priority import resolve_priority
+from message_broker.core.queue_manager import QueueManager
+from agents.error_handling.dead_letter_handler import setup_dead_letter_queue
+
+logger = get_logger(__name__)
+config = get_config()
+
+
+def submit_contract(file_name: str, content: bytes, priority: str = None, notify: bool = False,
+                    stage: str = "contract_analysis", queue_manager: QueueManager = None) -> Dict[str, Any]:
+    """保存上传的合同，提取文本后把处理任务发布到管道第一阶段的队列
+
+    任务的优先级写入 metadata.priority，后续阶段的输入沿用同一份元数据，
+    各阶段发布消息和代理池排队时都按该优先级处理。
+
+    Args:
+        file_name: 原始文件名
+        content: 文件内容
+        priority: 上传页面的优先级选项（普通/加急/特急）、级别名或整数优先级
+        notify: 处理完成后是否通知
+        stage: 接收任务的阶段，对应管道配置 routing 中的键
+        queue_manager: 队列管理器，默认使用共享会话
+
+    Returns:
+        提交结果，包含任务ID和消息优先级
+    """
+    pipeline_config = get_pipeline_config()
+    route = pipeline_config.get("routing", {}).get(stage)
+    if not route:
+        return {"error": True, "message": f"管道配置中没有阶段{stage}的路由"}
+
+    try:
+        contract_text = extract_text(file_name, content)
+    except Exception as e:
+        logger.error(f"提取合同{file_name}的文本失败: {str(e)}")
+        return {"error": True, "message": f"无法读取合同内容: {str(e)}"}
+    if not contract_text.strip():
+        return {"error": True, "message": "合同内容为空"}
+
+    task_id = generate_uuid()
+    upload_dir = os.path.join(config.get("file_storage", {}).get("base_path", "data/files"), "uploads")
+    file_path = os.path.join(upload_dir, f"{task_id}_{os.path.basename(file_name)}")
+    try:
+        ensure_dir(upload_dir)
+        with open(file_path, "wb") as f:
+            f.write(content)
+    except Exception as e:
+        logger.error(f"保存上传文件{file_name}失败: {str(e)}")
+        return {"error": True, "message": f"保存上传文件失败: {str(e)}"}
+
+    message_priority = resolve_priority(priority)
+    message = {
+        "task_id": task_id,
+        "file_name": file_name,
+        "file_path": file_path,
+        "contract_text": contract_text,
+        "metadata": {
+            "task_id": task_id,
+            "priority": message_priority,
+            "priority_label": priority,
+            "notify": notify,
+            "submitted_at": format_timestamp()
+        }
+    }
+
+    queue_manager = queue_manager or QueueManager()
+    exchange_config = next((e for e in pipeline_config.get("exchanges", {}).values()
+                            if e.get("name") == route["exchange"]), {})
+    queue_config = next((q for q in pipeline_config.get("queues", {}).values()
+                         if q.get("name") == route["queue"]), {})
+    # 阶段队列的死信转入死信交换机，需先于阶段队列声明
+    if not (setup_dead_letter_queue(queue_manager)
+            and queue_manager.declare_exchange(route["exchange"], exchange_config.get("type", "direct"),
+                                               exchange_config.get("durable", True))
+            and queue_manager.declare_queue(route["queue"], queue_config.get("durable", True))
+            and queue_manager.bind_queue(route["queue"], route["exchange"], route["key"])
+            and queue_manager.publish_message(route["exchange"], route["key"], message)):
+        return {"error": True, "message": "提交处理任务失败，请稍后重试"}
+
+    logger.info(f"已提交合同{file_name}，任务ID: {task_id}，优先级: {priority}({message_priority})")
+    return {"error": False, "task_id": task_id, "priority": message_priority}
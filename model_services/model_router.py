@@ -1,6 +1,9 @@
 from typing import Dict, Any, List, Optional
+import asyncio
 import importlib
 import json
+from agents.error_handling.retry_strategy import RetryStrategy
+from agents.error_handling.circuit_breaker import CircuitOpenError, get_circuit_breaker
 from common.logger import get_logger
 from common.config import get_config
 
@@ -14,6 +17,7 @@ class ModelRouter:
         """初始化模型路由器"""
         self.models = {}
         self.default_model = config.get("model_services", {}).get("default_model", "legal_small_model")
+        self.retry_strategy = RetryStrategy()
         self._load_models()
     
     def _load_models(self):
@@ -60,9 +64,49 @@ class ModelRouter:
             model_name = self.default_model
         
         try:
-            # 获取模型实例并处理请求
+            # 获取模型实例并处理请求，模型熔断时直接失败
             model = self.models[model_name]
-            response = model.process(request)
+            response = get_circuit_breaker(f"model:{model_name}").call(model.process, request)
+            
+            logger.info(f"模型{model_name}成功处理请求")
+            return response
+        except Exception as e:
+            logger.error(f"模型{model_name}处理请求失败: {str(e)}")
+            return {
+                "error": True,
+                "message": f"模型处理失败: {str(e)}",
+                "data": None
+            }
+    
+    async def route_request_async(self, request: Dict[str, Any], model_name: str = None,
+                                  deadline: float = None) -> Dict[str, Any]:
+        """异步路由请求到指定模型，失败时按重试策略退避重试
+        
+        模型提供 process_async 时直接等待，否则在线程池中执行 process，
+        大量并发请求在等待重试时不占用线程。
+        
+        Args:
+            request: 请求数据
+            model_name: 模型名称，如果为None则使用默认模型
+            deadline: 请求（含重试）的时限秒数，为None时不限制
+            
+        Returns:
+            模型响应
+        """
+        # 如果没有指定模型，使用默认模型
+        if not model_name:
+            model_name = self.default_model
+        
+        # 检查模型是否可用
+        if model_name not in self.models:
+            logger.error(f"模型{model_name}不可用，使用默认模型{self.default_model}")
+            model_name = self.default_model
+        
+        try:
+            # 获取模型实例并处理请求
+            response = await self.retry_strategy.execute_with_retry_async(
+                self._process_async, model_name, request, deadline=deadline
+            )
             
             logger.info(f"模型{model_name}成功处理请求")
             return response
@@ -74,6 +118,38 @@ class ModelRouter:
                 "data": None
             }
     
+    async def _process_async(self, model_name: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """在熔断器保护下异步调用一次模型
+        
+        Args:
+            model_name: 模型名称
+            request: 请求数据
+            
+        Returns:
+            模型响应
+        
+        Raises:
+            CircuitOpenError: 模型已熔断
+        """
+        breaker = get_circuit_breaker(f"model:{model_name}")
+        if not breaker.allow_request():
+            raise CircuitOpenError(breaker.name, breaker.retry_after())
+        
+        model = self.models[model_name]
+        try:
+            if hasattr(model, "process_async"):
+                response = await model.process_async(request)
+            else:
+                response = await asyncio.to_thread(model.process, request)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return response
+    
     def get_model_info(self, model_name: str) -> Dict[str, Any]:
         """获取模型信息
         
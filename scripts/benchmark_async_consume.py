@@ -0,0 +1,79 @@
+"""异步消费并发基准测试
+
+在单个事件循环中为 --agents 个代理各声明一个队列并注册消费者，每个队列
+发布 --messages 条消息，处理函数以 asyncio.sleep 模拟 --work-ms 毫秒的
+I/O 等待，输出总吞吐量和同时处理中的最大消息数。
+
+默认使用进程内的 InMemoryBroker；指定 --host 时通过 aio_pika 连接真实的
+RabbitMQ。
+
+用法:
+    python scripts/benchmark_async_consume.py [--agents 200] [--messages 20] [--work-ms 50] [--prefetch 5]
+    python scripts/benchmark_async_consume.py --host localhost
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from message_broker.core.async_connection import AsyncRabbitMQConnection
+from message_broker.core.in_memory_broker import InMemoryBroker
+
+
+async def main(args):
+    client = None if args.host else InMemoryBroker()
+    connection = AsyncRabbitMQConnection(host=args.host or "localhost", client=client)
+    if not await connection.connect():
+        print("无法连接到RabbitMQ")
+        return
+
+    total = args.agents * args.messages
+    done = asyncio.Event()
+    state = {"processed": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def make_handler(agent_id: str):
+        async def handle(message):
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            try:
+                json.loads(message.body)
+                await asyncio.sleep(args.work_ms / 1000)
+            finally:
+                state["in_flight"] -= 1
+            await connection.acknowledge(message)
+            state["processed"] += 1
+            if state["processed"] == total:
+                done.set()
+        return handle
+
+    queues = [f"benchmark_async_agent_{i}" for i in range(args.agents)]
+    for queue_name in queues:
+        await connection.declare_queue(queue_name, durable=False)
+        await connection.consume(queue_name, make_handler(queue_name), prefetch_count=args.prefetch)
+
+    started = time.perf_counter()
+    for i in range(args.messages):
+        for queue_name in queues:
+            await connection.publish_message("", queue_name, json.dumps({"task_id": f"{queue_name}-{i}"}))
+    await asyncio.wait_for(done.wait(), timeout=args.timeout)
+    elapsed = time.perf_counter() - started
+
+    serial = total * args.work_ms / 1000
+    print(f"代理数 {args.agents}，消息 {total} 条，耗时 {elapsed:.2f} 秒，{total / elapsed:.0f} 条/秒")
+    print(f"最大同时处理 {state['max_in_flight']} 条，串行处理预计 {serial:.1f} 秒")
+    await connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="异步消费并发基准测试")
+    parser.add_argument("--agents", type=int, default=200, help="代理（队列）数")
+    parser.add_argument("--messages", type=int, default=20, help="每个队列发布的消息数")
+    parser.add_argument("--work-ms", type=float, default=50, help="每条消息模拟的处理耗时（毫秒）")
+    parser.add_argument("--prefetch", type=int, default=5, help="每个消费者的未确认消息上限")
+    parser.add_argument("--timeout", type=float, default=120, help="等待全部消息处理完毕的最长时间（秒）")
+    parser.add_argument("--host", default=None, help="RabbitMQ 地址，不指定时使用内存代理")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,70 @@
+"""批量条款解析吞吐量基准测试
+
+使用 ClauseParser.parse_many 在不同工作进程数下解析同一批合成合同，
+输出每秒处理的合同数量。
+
+用法:
+    python scripts/benchmark_parse_many.py [--documents 2000] [--clauses 60] [--workers 1 2 4 8]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core_services.contract_processor.clause_parser import ClauseParser
+
+CLAUSE_BODIES = [
+    "合同总价为人民币{amount}万元，甲方应在验收合格后三十日内付款。",
+    "乙方应于合同签订后{days}日内完成交货，并承担运输费用。",
+    "任何一方违约的，应向守约方支付合同总价百分之{rate}的违约金。",
+    "双方对在履行本合同过程中知悉的商业秘密负有保密义务。",
+    "本合同有效期为{years}年，期满前三十日双方可协商续约。",
+    "本合同未尽事宜，由双方另行协商并签订补充协议。"
+]
+
+
+def build_documents(count: int, clauses: int, rng: random.Random) -> List[str]:
+    """构造合成合同文本"""
+    documents = []
+    for _ in range(count):
+        parts = ["采购合同\n甲方：某某有限公司 乙方：某某科技有限公司\n"]
+        for number in range(1, clauses + 1):
+            body = rng.choice(CLAUSE_BODIES).format(
+                amount=rng.randint(1, 999),
+                days=rng.randint(5, 90),
+                rate=rng.randint(1, 30),
+                years=rng.randint(1, 5)
+            )
+            parts.append(f"第{number}条 {body}\n")
+        documents.append("".join(parts))
+    return documents
+
+
+def run(document_count: int, clause_count: int, worker_counts: List[int], chunksize: int):
+    parser = ClauseParser()
+    documents = build_documents(document_count, clause_count, random.Random(42))
+    print(f"CPU核数: {os.cpu_count()}，合同数: {document_count}，每份条款数: {clause_count}")
+    print(f"{'进程数':>6} {'耗时(s)':>10} {'合同/秒':>10} {'失败数':>8}")
+    for workers in worker_counts:
+        start = time.perf_counter()
+        failed = 0
+        for expected_index, result in enumerate(parser.parse_many(documents, workers=workers,
+                                                                  chunksize=chunksize)):
+            assert result["index"] == expected_index, "结果顺序与输入不一致"
+            failed += 1 if result.get("error") else 0
+        elapsed = time.perf_counter() - start
+        print(f"{workers:>6} {elapsed:>10.2f} {document_count / elapsed:>10.1f} {failed:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量条款解析吞吐量基准测试")
+    parser.add_argument("--documents", type=int, default=2000, help="合同数量")
+    parser.add_argument("--clauses", type=int, default=60, help="每份合同的条款数量")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="工作进程数列表")
+    parser.add_argument("--chunksize", type=int, default=8, help="每个任务包含的合同数量")
+    args = parser.parse_args()
+    run(args.documents, args.clauses, args.workers, args.chunksize)
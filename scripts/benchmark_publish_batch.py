@@ -0,0 +1,204 @@
+"""批量发布吞吐量基准测试
+
+比较三种发布方式的吞吐量：
+    1. publish_message 逐条发布，不确认
+    2. publish_message 逐条发布，通道开启发布确认（每条等待一次往返）
+    3. publish_batch 批量发布，整批等待一个确认窗口
+
+默认在进程内启动一个最小的 AMQP 0-9-1 服务端：客户端使用真实的 pika 连接，
+服务端按 --rtt-ms 延迟后以 multiple 确认已收到的消息，模拟网络往返；
+指定 --host 时连接真实的 RabbitMQ。有消息被拒绝或未确认时以非零状态退出。
+
+用法:
+    python scripts/benchmark_publish_batch.py [--messages 5000] [--batch-size 500] [--rtt-ms 0.5]
+    python scripts/benchmark_publish_batch.py --host localhost --queue benchmark_publish_queue
+"""
+import os
+import sys
+import json
+import time
+import select
+import socket
+import argparse
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from pika import frame, spec
+from message_broker.core.connection import RabbitMQConnection
+
+
+class _StandInBroker:
+    """进程内的最小 AMQP 0-9-1 服务端
+
+    只实现基准测试用到的方法：握手、打开和关闭通道、声明队列、发布确认
+    和 Basic.Publish。消息不做路由，开启确认的通道在收到消息 rtt 秒后以
+    multiple 确认截至当时到期的全部投递标签。
+    """
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.server.accept()
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(client,), daemon=True).start()
+
+    @staticmethod
+    def _send(client, channel_number, method):
+        client.sendall(frame.Method(channel_number, method).marshal())
+
+    def _serve(self, client):
+        buffer = b""
+        # 通道号 -> {"confirming": 是否开启确认, "tag": 最新投递标签, "due": [(到期时间, 投递标签)], "body": 剩余内容长度}
+        channels = {}
+        while True:
+            now = time.monotonic()
+            for number, state in channels.items():
+                due = [tag for deadline, tag in state["due"] if deadline <= now]
+                if due:
+                    state["due"] = [(deadline, tag) for deadline, tag in state["due"] if deadline > now]
+                    self._send(client, number, spec.Basic.Ack(delivery_tag=max(due), multiple=True))
+            waits = [deadline - now for state in channels.values() for deadline, _ in state["due"][:1]]
+            readable, _, _ = select.select([client], [], [], max(0.0, min(waits)) if waits else None)
+            if not readable:
+                continue
+            data = client.recv(1 << 16)
+            if not data:
+                client.close()
+                return
+            buffer += data
+            while True:
+                consumed, received = frame.decode_frame(buffer)
+                if received is None:
+                    break
+                buffer = buffer[consumed:]
+                if not self._handle(client, channels, received):
+                    client.close()
+                    return
+
+    def _handle(self, client, channels, received) -> bool:
+        """处理一个客户端帧，连接关闭时返回False"""
+        if isinstance(received, frame.ProtocolHeader):
+            self._send(client, 0, spec.Connection.Start(
+                server_properties={"capabilities": {"publisher_confirms": True, "basic.nack": True}},
+                mechanisms="PLAIN", locales="en_US"))
+            return True
+
+        number = received.channel_number
+        if isinstance(received, frame.Header):
+            channels[number]["body"] = received.body_size
+            self._complete_publish(channels[number])
+            return True
+        if isinstance(received, frame.Body):
+            channels[number]["body"] -= len(received.fragment)
+            self._complete_publish(channels[number])
+            return True
+        if not isinstance(received, frame.Method):
+            return True
+
+        method = received.method
+        if isinstance(method, spec.Connection.StartOk):
+            self._send(client, 0, spec.Connection.Tune(channel_max=2047, frame_max=131072, heartbeat=0))
+        elif isinstance(method, spec.Connection.Open):
+            self._send(client, 0, spec.Connection.OpenOk())
+        elif isinstance(method, spec.Connection.Close):
+            self._send(client, 0, spec.Connection.CloseOk())
+            return False
+        elif isinstance(method, spec.Channel.Open):
+            channels[number] = {"confirming": False, "tag": 0, "due": [], "body": None}
+            self._send(client, number, spec.Channel.OpenOk())
+        elif isinstance(method, spec.Channel.Close):
+            channels.pop(number, None)
+            self._send(client, number, spec.Channel.CloseOk())
+        elif isinstance(method, spec.Confirm.Select):
+            channels[number]["confirming"] = True
+            self._send(client, number, spec.Confirm.SelectOk())
+        elif isinstance(method, spec.Queue.Declare):
+            self._send(client, number, spec.Queue.DeclareOk(queue=method.queue, message_count=0,
+                                                              consumer_count=0))
+        return True
+
+    def _complete_publish(self, state):
+        """内容体接收完整后登记待确认的投递标签"""
+        if state["body"] == 0:
+            state["body"] = None
+            if state["confirming"]:
+                state["tag"] += 1
+                state["due"].append((time.monotonic() + self.rtt, state["tag"]))
+
+
+def make_connection(args, port: int = None) -> RabbitMQConnection:
+    """创建并连接 RabbitMQConnection，未指定 --host 时连接进程内服务端"""
+    connection = RabbitMQConnection(host=args.host or "127.0.0.1", port=port)
+    if not connection.connect():
+        sys.exit(f"无法连接到 {connection.host}:{connection.port}")
+    connection.declare_queue(args.queue, durable=False)
+    return connection
+
+
+def run(label: str, count: int, publish) -> float:
+    """执行一轮发布并输出吞吐量"""
+    started = time.perf_counter()
+    publish()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {count:>8} 条  {elapsed:>8.3f} 秒  {count / elapsed:>10.0f} 条/秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量发布吞吐量基准测试")
+    parser.add_argument("--messages", type=int, default=5000, help="每轮发布的消息数")
+    parser.add_argument("--batch-size", type=int, default=500, help="publish_batch 每批消息数")
+    parser.add_argument("--rtt-ms", type=float, default=0.5, help="进程内服务端模拟的网络往返（毫秒）")
+    parser.add_argument("--host", default=None, help="RabbitMQ 地址，不指定时使用进程内服务端")
+    parser.add_argument("--queue", default="benchmark_publish_queue", help="发布的目标队列")
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps({"task_id": f"task-{i}", "clause_id": i, "content": "合同条款内容" * 20}, ensure_ascii=False)
+        for i in range(args.messages)
+    ]
+    port = None
+    if args.host:
+        print("发布目标: 真实 RabbitMQ\n")
+    else:
+        port = _StandInBroker(args.rtt_ms / 1000).port
+        print(f"发布目标: 进程内服务端（往返 {args.rtt_ms} 毫秒）\n")
+
+    failed = []
+    connection = make_connection(args, port)
+    run("publish_message（不确认）", len(bodies),
+        lambda: failed.extend(i for i, body in enumerate(bodies)
+                              if not connection.publish_message("", args.queue, body)))
+
+    confirming = make_connection(args, port)
+    confirming.channel.confirm_delivery()
+    per_message = run("publish_message（逐条确认）", len(bodies),
+                      lambda: failed.extend(i for i, body in enumerate(bodies)
+                                            if not confirming.publish_message("", args.queue, body)))
+
+    nacked = []
+
+    def _publish_batches():
+        for start in range(0, len(bodies), args.batch_size):
+            result = connection.publish_batch("", args.queue, bodies[start:start + args.batch_size])
+            nacked.extend(result["nacked"] + result["unconfirmed"])
+
+    batched = run(f"publish_batch（每批 {args.batch_size} 条）", len(bodies), _publish_batches)
+
+    connection.close()
+    confirming.close()
+
+    if nacked or failed:
+        print(f"\n批量发布有 {len(nacked)} 条被拒绝或未确认，逐条发布失败 {len(failed)} 条，结果无效")
+        sys.exit(1)
+    print(f"\n批量确认相对逐条确认加速 {per_message / batched:.1f} 倍，全部消息均已确认")
+
+
+if __name__ == "__main__":
+    main()
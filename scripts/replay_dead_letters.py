@@ -0,0 +1,57 @@
+"""死信批量重放
+
+按原始路由键、错误类型和时间范围过滤死信队列中的消息，限速重新发布到
+原始交换机。先用 --dry-run 确认命中数量再正式重放。
+
+用法:
+    python scripts/replay_dead_letters.py [--routing-key legal.review] [--error-type processing_error]
+        [--since "2024-01-01 00:00:00"] [--until "2024-01-02 00:00:00"]
+        [--rate 50] [--batch-size 100] [--max 1000] [--priority 2] [--dry-run]
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.error_handling.dead_letter_replayer import DeadLetterReplayer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="死信批量重放")
+    parser.add_argument("--queue", default=None, help="死信队列名称，默认读取配置")
+    parser.add_argument("--routing-key", default=None, help="只重放该原始路由键的消息")
+    parser.add_argument("--error-type", default=None, help="只重放该错误类型的消息")
+    parser.add_argument("--since", default=None, help="起始时间，格式 %%Y-%%m-%%d %%H:%%M:%%S")
+    parser.add_argument("--until", default=None, help="截止时间，格式 %%Y-%%m-%%d %%H:%%M:%%S")
+    parser.add_argument("--rate", type=float, default=None, help="每秒最多重新发布的消息数")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批拉取的消息数")
+    parser.add_argument("--max", type=int, default=None, help="最多重放的消息数")
+    parser.add_argument("--priority", type=int, default=None, help="重新发布的消息优先级，默认使用批量处理优先级")
+    parser.add_argument("--dry-run", action="store_true", help="只统计命中数量，不重新发布")
+    args = parser.parse_args()
+
+    replayer = DeadLetterReplayer(queue_name=args.queue, batch_size=args.batch_size, rate_limit=args.rate,
+                                  priority=args.priority)
+    stats = replayer.replay(
+        routing_key=args.routing_key,
+        error_type=args.error_type,
+        since=args.since,
+        until=args.until,
+        max_messages=args.max,
+        dry_run=args.dry_run,
+        progress_callback=lambda s: print(
+            f"\r扫描 {s['scanned']}  命中 {s['matched']}  重放 {s['replayed']}  "
+            f"失败 {s['failed']}  {s['throughput']:.1f} 条/秒", end="", flush=True
+        )
+    )
+    print()
+    if stats.get("error"):
+        print(stats["message"])
+        sys.exit(1)
+    print(f"完成: 扫描 {stats['scanned']} 条，命中 {stats['matched']} 条，重放 {stats['replayed']} 条，"
+          f"跳过 {stats['skipped']} 条，失败 {stats['failed']} 条，耗时 {stats['elapsed_seconds']:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
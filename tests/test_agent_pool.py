@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from agents.base import base_agent
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.human_intervention import HumanInterventionHandler
+from agents.orchestration.agent_pool import AgentPool
+from data_storage.intervention.intervention_store import InterventionStore
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+
+class _NoCache:
+    def make_key(self, stage, content_hash):
+        return None
+
+    def get(self, stage, cache_key):
+        return None
+
+    def set(self, stage, cache_key, result):
+        return True
+
+
+class _RecordingAgent(BaseAgent):
+    def __init__(self, agent_id, log, gate=None):
+        super().__init__(agent_id, "recording_agent")
+        self.log = log
+        self.gate = gate
+
+    def use_result_cache(self, input_data):
+        return False
+
+    def process(self, input_data):
+        name = input_data["name"]
+        self.log.append(name)
+        if name == "blocker":
+            self.gate["started"].set()
+            self.gate["release"].wait(5)
+        return {"name": name}
+
+
+@pytest.fixture(autouse=True)
+def intervention_handler(tmp_path, monkeypatch):
+    handler = HumanInterventionHandler(store=InterventionStore(str(tmp_path / "interventions.db")),
+                                       consumer_registry=ConsumerRegistry())
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+    return handler
+
+
+def _task(name, priority):
+    return {"name": name, "metadata": {"task_id": name, "priority": priority}}
+
+
+def _run_behind_blocker(aging_seconds, submit_waiting):
+    log = []
+    gate = {"started": threading.Event(), "release": threading.Event()}
+    pool = AgentPool("recording_agent", lambda agent_id: _RecordingAgent(agent_id, log, gate),
+                     size=1, result_cache=_NoCache(), aging_seconds=aging_seconds)
+    futures = [pool.submit(_task("blocker", 0))]
+    assert gate["started"].wait(5)
+    futures += submit_waiting(pool)
+    gate["release"].set()
+    for future in futures:
+        future.result(timeout=5)
+    pool.shutdown()
+    return log[1:]
+
+
+def test_waiting_tasks_run_by_priority():
+    order = _run_behind_blocker(60, lambda pool: [
+        pool.submit(_task("low", 0)),
+        pool.submit(_task("high", 5)),
+        pool.submit(_task("medium", 2))
+    ])
+    assert order == ["high", "medium", "low"]
+
+
+def test_aging_lets_long_waiting_task_overtake_newer_higher_priority():
+    def _submit(pool):
+        low = pool.submit(_task("low", 0))
+        # 等待超过两个老化周期，低优先级任务的有效优先级已高于新到的优先级2任务
+        time.sleep(0.35)
+        return [low, pool.submit(_task("high", 2))]
+
+    assert _run_behind_blocker(0.1, _submit) == ["low", "high"]
+
+
+def test_pool_never_exceeds_concurrent_tasks():
+    lock = threading.Lock()
+    active, peak = [0], [0]
+
+    class _SlowAgent(_RecordingAgent):
+        def process(self, input_data):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            return {"name": input_data["name"]}
+
+    pool = AgentPool("recording_agent", lambda agent_id: _SlowAgent(agent_id, []), size=2,
+                     result_cache=_NoCache())
+    futures = [pool.submit(_task(f"t{index}", 0)) for index in range(6)]
+    assert [future.result(timeout=5)["name"] for future in futures] == [f"t{index}" for index in range(6)]
+    status = pool.get_status()
+    pool.shutdown()
+
+    assert peak[0] == 2
+    assert (status["instances"], status["queue_depth"]) == (2, 0)
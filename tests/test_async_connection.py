@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+from message_broker.core.async_connection import AsyncRabbitMQConnection
+from message_broker.core.in_memory_broker import InMemoryBroker
+
+EXCHANGE = "contract_review_exchange"
+QUEUE = "legal_review_queue"
+ROUTING_KEY = "legal.review"
+
+
+async def _connect(broker):
+    connection = AsyncRabbitMQConnection(client=broker)
+    assert await connection.declare_exchange(EXCHANGE)
+    assert await connection.declare_exchange("dead_letter_exchange")
+    assert await connection.declare_queue("dead_letter_queue")
+    assert await connection.bind_queue("dead_letter_queue", "dead_letter_exchange", "dead_letter")
+    assert await connection.declare_queue(QUEUE)
+    assert await connection.bind_queue(QUEUE, EXCHANGE, ROUTING_KEY)
+    return connection
+
+
+async def _publish(connection, count, start=0):
+    for index in range(start, start + count):
+        assert await connection.publish_message(EXCHANGE, ROUTING_KEY, json.dumps({"n": index}))
+
+
+def test_prefetch_bounds_concurrent_callbacks():
+    async def scenario():
+        broker = InMemoryBroker()
+        connection = await _connect(broker)
+        release = asyncio.Event()
+        running, peak, done = [0], [0], []
+
+        async def callback(message):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await release.wait()
+            running[0] -= 1
+            done.append(json.loads(message.body)["n"])
+            await connection.acknowledge(message)
+
+        assert await connection.consume(QUEUE, callback, prefetch_count=3)
+        await _publish(connection, 10)
+        await asyncio.sleep(0)
+        assert (running[0], broker.queue_depth(QUEUE)) == (3, 7)
+
+        release.set()
+        await broker.drain()
+        return peak[0], sorted(done)
+
+    peak, done = asyncio.run(scenario())
+    assert peak == 3
+    assert done == list(range(10))
+
+
+def test_rejected_messages_are_requeued_or_dead_lettered():
+    async def scenario():
+        broker = InMemoryBroker()
+        connection = await _connect(broker)
+        seen = []
+
+        async def callback(message):
+            seen.append((json.loads(message.body)["n"], message.redelivered))
+            if not message.redelivered:
+                await connection.reject(message, requeue=True)
+            else:
+                await connection.reject(message, requeue=False)
+
+        await connection.consume(QUEUE, callback)
+        await _publish(connection, 1)
+        await broker.drain()
+
+        dead_letter = await (await connection.channel.get_queue("dead_letter_queue")).get()
+        await dead_letter.ack()
+        return seen, dead_letter
+
+    seen, dead_letter = asyncio.run(scenario())
+    assert seen == [(0, False), (0, True)]
+    (death,) = dead_letter.headers["x-death"]
+    assert (death["queue"], death["exchange"], death["routing-keys"]) == (QUEUE, EXCHANGE, [ROUTING_KEY])
+    assert json.loads(dead_letter.body) == {"n": 0}
+
+
+def test_paused_consumer_keeps_messages_until_resumed():
+    async def scenario():
+        broker = InMemoryBroker()
+        connection = await _connect(broker)
+        received = []
+
+        async def callback(message):
+            received.append(json.loads(message.body)["n"])
+            await connection.acknowledge(message)
+
+        await connection.consume(QUEUE, callback, prefetch_count=1)
+        await _publish(connection, 2)
+        await broker.drain()
+
+        assert await connection.pause_consumer(QUEUE)
+        assert not await connection.pause_consumer(QUEUE)
+        await _publish(connection, 3, start=2)
+        await broker.drain()
+        paused = (list(received), broker.queue_depth(QUEUE), connection.get_consumer_status()[QUEUE])
+
+        assert await connection.resume_consumer(QUEUE, prefetch_count=5)
+        await broker.drain()
+        return paused, received, connection.get_consumer_status()[QUEUE]
+
+    (received_while_paused, depth, paused_status), received, status = asyncio.run(scenario())
+    assert received_while_paused == [0, 1]
+    assert depth == 3
+    assert paused_status["paused"] and paused_status["consumer_tag"] is None
+    assert received == [0, 1, 2, 3, 4]
+    assert not status["paused"] and status["prefetch_count"] == 5
+
+
+def test_consumers_are_restored_after_broker_restart():
+    async def scenario():
+        broker = InMemoryBroker()
+        connection = await _connect(broker)
+        received = []
+
+        async def callback(message):
+            received.append((message.routing_key, json.loads(message.body)["n"]))
+            await connection.acknowledge(message)
+
+        await connection.consume(QUEUE, callback)
+        await connection.declare_queue("risk_analysis_queue")
+        await connection.bind_queue("risk_analysis_queue", EXCHANGE, "risk.analysis")
+        await connection.consume("risk_analysis_queue", callback)
+        await connection.pause_consumer("risk_analysis_queue")
+
+        broker.disconnect_all()
+        assert not connection.is_connected()
+
+        # 发布时透明重连，恢复未暂停的消费者，暂停的消费者保持暂停
+        await _publish(connection, 1)
+        assert await connection.publish_message(EXCHANGE, "risk.analysis", json.dumps({"n": 1}))
+        await broker.drain()
+        return connection, received, broker
+
+    connection, received, broker = asyncio.run(scenario())
+    assert connection.generation == 2
+    assert len(broker.connections) == 2
+    assert received == [(ROUTING_KEY, 0)]
+    assert broker.queue_depth("risk_analysis_queue") == 1
+    assert connection.get_consumer_status()["risk_analysis_queue"]["paused"]
+
+
+def test_publish_carries_properties_and_fails_for_unknown_exchange():
+    async def scenario():
+        broker = InMemoryBroker()
+        connection = await _connect(broker)
+        assert await connection.publish_message(EXCHANGE, ROUTING_KEY, "{}",
+                                                {"priority": 7, "headers": {"x-task-id": "t1"}})
+        message = await (await connection.channel.get_queue(QUEUE)).get(no_ack=True)
+        return message, await connection.publish_message("missing_exchange", ROUTING_KEY, "{}")
+
+    message, published = asyncio.run(scenario())
+    assert (message.priority, message.delivery_mode, message.content_type) == (7, 2, "application/json")
+    assert message.headers == {"x-task-id": "t1"}
+    assert not published
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from message_broker.core.channel_pool import ChannelPool
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.connection = None
+        self.channel = None
+        self.open = False
+        self.connects = 0
+        self.closed = False
+        self.in_use = 0
+        self.overlaps = 0
+        self.fail_publishes = 0
+        self.published = []
+
+    def is_connected(self):
+        return self.open
+
+    def ensure_connected(self):
+        if not self.open:
+            self.connects += 1
+            self.open = True
+            self.connection = self.channel = object()
+        return True
+
+    def close(self):
+        self.open = False
+        self.closed = True
+
+    def publish_message(self, exchange_name, routing_key, message, properties=None, priority=None):
+        self.in_use += 1
+        if self.in_use > 1:
+            self.overlaps += 1
+        time.sleep(0.005)
+        self.in_use -= 1
+        if self.fail_publishes:
+            self.fail_publishes -= 1
+            return False
+        self.published.append(message)
+        return True
+
+    def publish_batch(self, exchange_name, routing_key, messages, properties=None, timeout=30, priority=None):
+        if self.fail_publishes:
+            self.fail_publishes -= 1
+            return {"published": 0, "acked": 0, "nacked": [], "unconfirmed": list(range(len(messages)))}
+        self.published.extend(messages)
+        return {"published": len(messages), "acked": len(messages), "nacked": [], "unconfirmed": []}
+
+
+def _pool(size=2, lease_timeout=5):
+    connections = []
+
+    def factory():
+        connections.append(_FakeConnection())
+        return connections[-1]
+
+    return ChannelPool(size=size, connection_factory=factory, lease_timeout=lease_timeout), connections
+
+
+def test_threads_never_share_a_leased_connection():
+    pool, connections = _pool(size=2)
+
+    threads = [
+        threading.Thread(target=lambda n=n: [pool.publish_message("ex", "rk", f"{n}-{i}") for i in range(10)])
+        for n in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(connections) == 2
+    assert sum(connection.overlaps for connection in connections) == 0
+    assert sum(len(connection.published) for connection in connections) == 80
+    stats = pool.get_stats()
+    assert (stats["leases"], stats["created"], stats["leased"]) == (80, 2, 0)
+    assert stats["waits"] > 0
+
+
+def test_dropped_connection_is_reconnected_before_lease():
+    pool, connections = _pool(size=1)
+    assert pool.publish_message("ex", "rk", "first")
+
+    # 模拟 RabbitMQ 重启后空闲连接失效
+    connections[0].open = False
+    with pool.lease() as connection:
+        assert connection is connections[0]
+        assert connection.is_connected()
+
+    assert connections[0].connects == 2
+    assert pool.get_stats()["reconnects"] == 1
+
+
+def test_failed_publish_is_retried_once_on_a_fresh_connection():
+    pool, connections = _pool(size=1)
+    assert pool.publish_message("ex", "rk", "warmup")
+    connections[0].fail_publishes = 1
+
+    assert pool.publish_message("ex", "rk", "retried")
+    assert connections[0].published == ["warmup", "retried"]
+    assert pool.get_stats()["replaced"] == 1
+
+    connections[0].fail_publishes = 2
+    assert not pool.publish_message("ex", "rk", "lost")
+
+    connections[0].fail_publishes = 1
+    assert pool.publish_batch("ex", "rk", ["a", "b"])["acked"] == 2
+    assert pool.get_stats()["replaced"] == 3
+
+
+def test_lease_times_out_when_every_slot_is_busy():
+    pool, connections = _pool(size=1, lease_timeout=0.05)
+
+    with pool.lease():
+        with pytest.raises(TimeoutError):
+            with pool.lease():
+                pass
+        assert not pool.publish_message("ex", "rk", "late")
+        result = pool.publish_batch("ex", "rk", ["a", "b"])
+        assert result["unconfirmed"] == [0, 1]
+
+    assert pool.get_stats()["timeouts"] == 3
+
+
+def test_close_shuts_idle_and_returned_connections():
+    pool, connections = _pool(size=2)
+    with pool.lease():
+        pass
+
+    with pool.lease() as leased:
+        with pool.lease():
+            pass
+        pool.close()
+        assert not leased.closed
+
+    assert all(connection.closed for connection in connections)
+    with pytest.raises(RuntimeError):
+        with pool.lease():
+            pass
@@ -0,0 +1,90 @@
+import pytest
+
+from agents.error_handling import circuit_breaker
+from agents.error_handling.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, get_circuit_breaker
+)
+from agents.error_handling.retry_strategy import RetryStrategy
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock.monotonic)
+    return clock
+
+
+def _fail():
+    raise ConnectionError("connection refused")
+
+
+def _breaker():
+    return CircuitBreaker("model:test", failure_rate_threshold=0.5, minimum_calls=4,
+                          window_seconds=60, open_seconds=30)
+
+
+def test_opens_at_failure_rate_and_rejects_calls(clock):
+    breaker = _breaker()
+    breaker.call(lambda: "ok")
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    # 未达到最少调用次数时不熔断
+    assert breaker.state == CLOSED
+
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(lambda: "ok")
+    assert excinfo.value.retry_after == 30
+    assert breaker.get_stats()["rejected"] == 1
+    assert not RetryStrategy().should_retry(excinfo.value, 1)
+
+
+def test_half_open_probe_closes_or_reopens(clock):
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # 半开状态只放行一个探测请求
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 30
+
+    clock.now += 30
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["opened"] == 2
+
+
+def test_failures_outside_the_window_are_forgotten(clock):
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 61
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.get_stats()["window_calls"] == 2
+
+
+def test_shared_breaker_uses_dependency_overrides():
+    breaker = get_circuit_breaker("rabbitmq")
+    assert get_circuit_breaker("rabbitmq") is breaker
+    assert (breaker.minimum_calls, breaker.open_seconds) == (5, 15)
+    assert get_circuit_breaker("model:other").minimum_calls == 10
@@ -0,0 +1,73 @@
+import random
+import re
+import time
+
+from core_services.contract_processor.clause_classifier import (
+    DEFAULT_CLAUSE_PATTERNS, DEFAULT_CLAUSE_TYPE, ClauseClassifier
+)
+
+
+def _legacy_classify(clause_patterns, clause_text, flags=re.IGNORECASE):
+    for clause_type, pattern in clause_patterns.items():
+        if re.search(pattern, clause_text, flags):
+            return clause_type
+    return DEFAULT_CLAUSE_TYPE
+
+
+PATTERNS = {
+    "a": r"usd|sum",
+    "b": r"İstanbul|Kelvin",
+    "c": r"USDX|ss\d+",
+    "d": r"[0-9]+元|straße",
+    **DEFAULT_CLAUSE_PATTERNS,
+    "e": r"Σ|σ+a",
+}
+
+TEXTS = [
+    "ſum", "SUM", "İstanbul", "istanbul", "ISTANBUL", "Kelvin", "kelvin",
+    "usdx", "UsDx", "ss12", "ſſ3", "100元", "STRASSE", "straße", "ς", "σσa",
+    "本合同价格为USD 100", "违约方应赔偿", "",
+]
+
+
+def test_matches_legacy_on_case_folding_edge_cases():
+    classifier = ClauseClassifier(PATTERNS)
+    for text in TEXTS:
+        assert classifier.classify(text) == _legacy_classify(PATTERNS, text), text
+
+
+def test_matches_legacy_on_random_texts():
+    classifier = ClauseClassifier(PATTERNS)
+    alphabet = "usdmſSUMİiIıKkKelvnstrabßσςΣxX0123元价格违约 "
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert classifier.classify(text) == _legacy_classify(PATTERNS, text), text
+
+
+def test_case_sensitive_flags_match_legacy():
+    classifier = ClauseClassifier(PATTERNS, flags=0)
+    for text in TEXTS:
+        assert classifier.classify(text) == _legacy_classify(PATTERNS, text, 0), text
+
+
+def test_case_variants_fold_to_one_representative():
+    classifier = ClauseClassifier({"a": "x"})
+    for variants in ("Iiİı", "Ssſ", "KkK", "σςΣ", "ΐΐ", "ﬅﬆ"):
+        assert len({classifier._fold(char) for char in variants}) == 1, variants
+    assert classifier._fold("价") != classifier._fold("格")
+
+
+def test_large_alphabet_compiles_in_linear_time():
+    patterns = {f"t{i}": chr(0x4E00 + i) + chr(0x4E00 + (i * 7) % 3000) for i in range(3000)}
+    started = time.perf_counter()
+    classifier = ClauseClassifier(patterns)
+    assert time.perf_counter() - started < 5
+    assert classifier.classify("合同" + chr(0x4E00 + 5) + chr(0x4E00 + 35)) == "t5"
+
+
+def test_conditional_group_pattern_matches_standalone():
+    patterns = {"x": r"(a)?b|c(?(1)d|e)", "y": r"ce|cd"}
+    classifier = ClauseClassifier(patterns)
+    for text in ("ce", "cd", "ab", "b", "zz"):
+        assert classifier.classify(text) == _legacy_classify(patterns, text), text
@@ -0,0 +1,47 @@
+import pytest
+
+from core_services.contract_processor.clause_parser import ClauseParser
+
+CONTRACTS = [
+    "第一条 付款 甲方应支付人民币100元。\n第二条 违约 违约方应赔偿。\n",
+    "第一条 保密 双方应对合同内容保密。\n",
+    "第一条 交付 乙方应于三十日内交货。\n第二条 期限 本合同有效期一年。\n",
+]
+
+
+@pytest.mark.parametrize("workers, chunksize", [(1, 8), (2, 1), (2, 2)])
+def test_parse_many_keeps_input_order_and_isolates_failures(workers, chunksize):
+    parser = ClauseParser()
+    texts = CONTRACTS[:2] + [None] + CONTRACTS[2:]
+
+    results = list(parser.parse_many(texts, workers=workers, chunksize=chunksize))
+
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[2]["error"]
+    for result, text in zip(results[:2] + results[3:], CONTRACTS):
+        assert result["clauses"] == parser.extract_clauses(text)
+        assert "error" not in result
+
+
+def test_price_amounts_are_normalized_with_contract_offsets():
+    parser = ClauseParser()
+    text = "第一条 违约 违约方应赔偿。\n第二条 价格 合同总价为人民币1,200.5万元，另付$300美元。\n"
+    price_clauses = [c for c in parser.extract_clauses(text) if c["type"] == "价格条款"]
+
+    table = parser.extract_price_amounts(price_clauses)
+
+    assert list(table["original"]) == ["人民币1200.5万元", "$300美元"]
+    assert list(table["value"]) == [12005000.0, 300.0]
+    assert list(table["clause_id"]) == [2, 2]
+    assert [text[offset:offset + 3] for offset in table["offset"]] == ["人民币", "$30"]
+
+
+def test_unparseable_amounts_are_dropped():
+    parser = ClauseParser()
+    clause = {"id": 1, "type": "价格条款", "content": "价款人民币,,元或人民币50元", "position": {"start": 10}}
+
+    table = parser.extract_price_amounts([clause])
+
+    assert list(table["value"]) == [50.0]
+    assert list(table["offset"]) == [10 + clause["content"].index("人民币50")]
+    assert parser.extract_price_amounts([]).empty
@@ -0,0 +1,138 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from message_broker.core import consumer_group
+from message_broker.core.connection import RabbitMQConnection
+from message_broker.core.consumer_group import AdaptivePrefetch, ConsumerGroup
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+class _FakeChannel:
+    def __init__(self):
+        self.acked = []
+        self.rejected = []
+
+    def basic_ack(self, delivery_tag):
+        self.acked.append(delivery_tag)
+
+    def basic_reject(self, delivery_tag, requeue):
+        self.rejected.append((delivery_tag, requeue))
+
+
+class _FakeConnection(RabbitMQConnection):
+    """沿用真实的队列 prefetch 配置，消费时阻塞到 stop_consuming"""
+
+    def __init__(self):
+        super().__init__(host="localhost", port=5672, username="guest", password="guest")
+        self.prefetch_updates = []
+        self.consumed = []
+        self.closed = False
+        self._stop = threading.Event()
+
+    def set_prefetch(self, queue_name, prefetch_count):
+        self.prefetch_updates.append(prefetch_count)
+        return True
+
+    def consume(self, queue_name, callback, auto_ack=False, prefetch_count=None, agent_id=None):
+        self.consumed.append(prefetch_count)
+        self._stop.wait(5)
+
+    def stop_consuming(self):
+        self._stop.set()
+
+    def close(self):
+        self.closed = True
+
+
+class _NoRetry:
+    def complete(self, task_key):
+        pass
+
+    def requeue_via_broker(self, *args):
+        return False
+
+
+def test_average_is_an_exponentially_weighted_moving_average():
+    tuner = AdaptivePrefetch(1, smoothing=0.5, adjust_every=100)
+
+    for seconds in (1.0, 0.5, 0.25):
+        assert tuner.observe(seconds) is None
+
+    # 首条耗时作为初值，之后每条按平滑系数向新值靠拢
+    assert tuner.avg_seconds == pytest.approx(0.5)
+
+
+def test_prefetch_is_reevaluated_every_n_messages_within_bounds():
+    tuner = AdaptivePrefetch(1, target_buffer_seconds=2, minimum=1, maximum=50, adjust_every=3)
+
+    assert [tuner.observe(0.125) for _ in range(3)] == [None, None, 16]
+    assert [tuner.observe(0.125) for _ in range(3)] == [None, None, None]
+
+    # 很快的阶段受上限约束，很慢的阶段回落到下限
+    for _ in range(12):
+        tuner.observe(0.0)
+    assert tuner.prefetch_count == 50
+    slow = AdaptivePrefetch(10, smoothing=1, adjust_every=1)
+    assert slow.observe(30.0) == 1
+
+
+def test_workers_start_with_the_queue_prefetch():
+    connections = []
+
+    def factory():
+        connections.append(_FakeConnection())
+        return connections[-1]
+
+    group = ConsumerGroup("contract_analysis_queue", lambda message: None, threads=2,
+                          connection_factory=factory, reconnect_delay=0.01, retry_scheduler=_NoRetry())
+    group.start()
+    stats = group.get_stats()
+    group.stop()
+
+    assert [worker["prefetch_count"] for worker in stats["workers"]] == [10, 10]
+    assert [connection.consumed[0] for connection in connections] == [10, 10]
+    assert all(connection.closed for connection in connections)
+
+    other = ConsumerGroup("legal_review_queue", lambda message: None, threads=1,
+                          connection_factory=factory, retry_scheduler=_NoRetry())
+    other.start()
+    assert other.get_stats()["workers"][0]["prefetch_count"] == 1
+    other.stop()
+
+
+def test_measured_processing_time_adjusts_the_worker_prefetch(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(consumer_group.time, "monotonic", clock.monotonic)
+
+    def handler(message):
+        # 法律审查单条耗时约1秒
+        clock.now += 1.0
+
+    group = ConsumerGroup("legal_review_queue", handler, threads=1, prefetch_count=10, adaptive=True,
+                          connection_factory=_FakeConnection, retry_scheduler=_NoRetry())
+    group.adaptive_config = {"target_buffer_seconds": 2, "adjust_every": 5, "smoothing": 0.5}
+    connection = _FakeConnection()
+    worker = {"index": 0, "connection": connection, "prefetch_count": 10,
+              "tuner": group._new_tuner(10),
+              "stats": {"processed": 0, "failed": 0, "total_seconds": 0.0, "reconnects": 0}}
+    callback = group._make_callback(worker)
+    channel = _FakeChannel()
+
+    for tag in range(1, 6):
+        method = SimpleNamespace(delivery_tag=tag, exchange="contract_review_exchange", routing_key="legal.review")
+        callback(channel, method, SimpleNamespace(headers={}, priority=5), json.dumps({"n": tag}).encode())
+
+    assert channel.acked == [1, 2, 3, 4, 5]
+    assert worker["tuner"].avg_seconds == pytest.approx(1.0)
+    assert worker["prefetch_count"] == 2
+    assert connection.prefetch_updates == [2]
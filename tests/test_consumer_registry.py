@@ -0,0 +1,86 @@
+from message_broker.core import connection as connection_module
+from message_broker.core.connection import RabbitMQConnection
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+
+class _FakeChannel:
+    def __init__(self):
+        self.calls = []
+        self._tags = 0
+
+    def basic_qos(self, prefetch_count):
+        self.calls.append(("qos", prefetch_count))
+
+    def basic_consume(self, queue, on_message_callback, auto_ack):
+        self._tags += 1
+        self.calls.append(("consume", queue))
+        return f"ctag-{self._tags}"
+
+    def basic_cancel(self, consumer_tag):
+        self.calls.append(("cancel", consumer_tag))
+
+    def start_consuming(self):
+        pass
+
+
+class _FakeConnection:
+    is_open = True
+
+    def __init__(self):
+        self.callbacks = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+
+def _consuming_connection(monkeypatch, registry, agent_id="legal_counsel"):
+    monkeypatch.setattr(connection_module, "get_consumer_registry", lambda: registry)
+    connection = RabbitMQConnection()
+    connection.ensure_connected = lambda: True
+    connection.channel = _FakeChannel()
+    connection.consume("legal_review_queue", lambda *args: None, agent_id=agent_id)
+    return connection
+
+
+def test_pause_cancels_consumer_and_resume_reapplies_qos(monkeypatch):
+    registry = ConsumerRegistry()
+    connection = _consuming_connection(monkeypatch, registry)
+    channel = connection.channel
+    # 使用管道配置中 legal_review 队列的 prefetch_count
+    assert channel.calls[:2] == [("qos", connection.get_queue_prefetch("legal_review_queue")),
+                                 ("consume", "legal_review_queue")]
+
+    assert registry.pause("legal_counsel") == 1
+    assert channel.calls[-1] == ("cancel", "ctag-1")
+    assert registry.is_paused("legal_counsel")
+    assert registry.pause("legal_counsel") == 0
+
+    assert registry.resume("legal_counsel", prefetch_count=3) == 1
+    assert channel.calls[-2:] == [("qos", 3), ("consume", "legal_review_queue")]
+    status = registry.get_status()["legal_counsel"]
+    assert status["paused"] is False
+    assert status["queues"]["legal_review_queue"]["prefetch_count"] == 3
+
+
+def test_pause_runs_on_connection_thread_while_consuming(monkeypatch):
+    registry = ConsumerRegistry()
+    connection = _consuming_connection(monkeypatch, registry)
+    connection.connection = _FakeConnection()
+    connection._consuming = True
+
+    registry.pause("legal_counsel")
+    # 消费循环运行时取消操作交给连接线程执行
+    assert ("cancel", "ctag-1") not in connection.channel.calls
+    callback, = connection.connection.callbacks
+    callback()
+    assert connection.channel.calls[-1] == ("cancel", "ctag-1")
+
+
+def test_consumer_registered_while_paused_stays_paused(monkeypatch):
+    registry = ConsumerRegistry()
+    registry.pause("legal_counsel")
+
+    connection = _consuming_connection(monkeypatch, registry)
+
+    assert connection.channel.calls[-1] == ("cancel", "ctag-1")
+    assert connection.get_consumer_status()["legal_review_queue"]["paused"] is True
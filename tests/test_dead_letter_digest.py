@@ -0,0 +1,59 @@
+import threading
+
+from agents.error_handling.dead_letter_digest import DeadLetterDigest
+
+
+def test_dead_letters_in_one_window_coalesce_into_one_digest():
+    sent = []
+    digest = DeadLetterDigest(sent.append, window_seconds=60, max_ids_per_group=2)
+    for index in range(3):
+        digest.add(f"m{index}", 100, "legal_counsel", "processing_error")
+    digest.add("m3", 50, "risk_analyst", "system_error")
+
+    summary = digest.flush()
+
+    assert sent == [summary]
+    assert summary["total"] == 4
+    legal, risk = summary["groups"]
+    assert (legal["agent_id"], legal["count"], legal["total_size"]) == ("legal_counsel", 3, 300)
+    assert legal["message_ids"] == ["m0", "m1"]
+    assert (risk["error_type"], risk["count"]) == ("system_error", 1)
+    # 窗口内没有新的死信时不发送通知
+    assert digest.flush() is None
+    assert digest.get_stats()["digests_sent"] == 1
+    digest.stop()
+
+
+def test_overflow_is_counted_and_notifier_failures_do_not_raise():
+    def _failing_notifier(summary):
+        raise ConnectionError("smtp unavailable")
+
+    digest = DeadLetterDigest(_failing_notifier, window_seconds=60, max_pending=2)
+    for index in range(5):
+        digest.add(f"m{index}", 10, "legal_counsel", "processing_error")
+
+    summary = digest.flush()
+
+    assert (summary["total"], summary["dropped_details"]) == (5, 3)
+    assert summary["groups"][0]["count"] == 2
+    stats = digest.get_stats()
+    assert (stats["received"], stats["notify_failures"], stats["digests_sent"]) == (5, 1, 0)
+    digest.stop()
+
+
+def test_background_thread_sends_one_digest_per_window():
+    sent = []
+    delivered = threading.Event()
+
+    def _notifier(summary):
+        sent.append(summary)
+        delivered.set()
+
+    digest = DeadLetterDigest(_notifier, window_seconds=0.2)
+    for index in range(10):
+        digest.add(f"m{index}", 10, "report_generator", "processing_error")
+
+    assert delivered.wait(5)
+    digest.stop()
+    assert len(sent) == 1
+    assert sent[0]["groups"][0]["count"] == 10
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pika
+import pytest
+
+from agents.error_handling.dead_letter_replayer import DeadLetterReplayer
+from message_broker.core.async_connection import AsyncRabbitMQConnection
+from message_broker.core.in_memory_broker import InMemoryBroker
+
+EXCHANGE = "contract_review_exchange"
+STAGE_QUEUES = {"legal.review": "legal_review_queue", "risk.analysis": "risk_analysis_queue"}
+
+
+async def _declare(broker):
+    connection = AsyncRabbitMQConnection(client=broker)
+    await connection.declare_exchange(EXCHANGE)
+    await connection.declare_exchange("dead_letter_exchange")
+    await connection.declare_queue("dead_letter_queue")
+    await connection.bind_queue("dead_letter_queue", "dead_letter_exchange", "dead_letter")
+    for routing_key, queue_name in STAGE_QUEUES.items():
+        # 阶段队列带 x-dead-letter-exchange，被拒绝的消息由代理转入死信队列
+        await connection.declare_queue(queue_name)
+        await connection.bind_queue(queue_name, EXCHANGE, routing_key)
+
+
+@pytest.fixture
+def broker():
+    broker = InMemoryBroker()
+    asyncio.run(_declare(broker))
+    return broker
+
+
+def _reject(channel, routing_key, contract_id):
+    channel.basic_publish(EXCHANGE, routing_key, json.dumps({"contract_id": contract_id}),
+                          pika.BasicProperties(headers={"x-error-type": "processing_error"}))
+    method, _, _ = channel.basic_get(STAGE_QUEUES[routing_key])
+    channel.basic_nack(method.delivery_tag, requeue=False)
+
+
+def _publish_wrapped(channel, routing_key, contract_id, error_type, timestamp):
+    # DeadLetterHandler 发布的包装格式
+    channel.basic_publish("dead_letter_exchange", "dead_letter", json.dumps({
+        "original_exchange": EXCHANGE,
+        "original_routing_key": routing_key,
+        "error_type": error_type,
+        "timestamp": timestamp,
+        "body": {"contract_id": contract_id}
+    }))
+
+
+def _drain(channel, queue_name):
+    bodies = []
+    while True:
+        method, _, body = channel.basic_get(queue_name, auto_ack=True)
+        if method is None:
+            return bodies
+        bodies.append(json.loads(body))
+
+
+def _replayer(broker, **kwargs):
+    connection = SimpleNamespace(channel=broker.blocking_channel(), connect=lambda: True)
+    return DeadLetterReplayer(connection, batch_size=2, rate_limit=0, **kwargs)
+
+
+def test_rejected_stage_messages_are_replayed_to_their_queue(broker):
+    channel = broker.blocking_channel()
+    _reject(channel, "legal.review", "c1")
+    _reject(channel, "risk.analysis", "c2")
+    _reject(channel, "legal.review", "c3")
+    assert broker.queue_depth("dead_letter_queue") == 3
+
+    stats = _replayer(broker).replay(routing_key="legal.review")
+
+    assert (stats["scanned"], stats["replayed"], stats["skipped"]) == (3, 2, 1)
+    assert sorted(body["contract_id"] for body in _drain(channel, "legal_review_queue")) == ["c1", "c3"]
+    # 未命中过滤条件的消息放回死信队列，原始路由信息仍在 x-death 中
+    method, properties, body = channel.basic_get("dead_letter_queue", auto_ack=True)
+    assert json.loads(body) == {"contract_id": "c2"}
+    assert properties.headers["x-death"][0]["routing-keys"] == ["risk.analysis"]
+    assert broker.queue_depth("dead_letter_queue") == 0
+
+
+def test_filters_by_error_type_and_time_and_respects_max_messages(broker):
+    channel = broker.blocking_channel()
+    now = time.time()
+    _publish_wrapped(channel, "legal.review", "old", "validation_error", now - 7200)
+    _publish_wrapped(channel, "legal.review", "new-1", "validation_error", now - 60)
+    _publish_wrapped(channel, "legal.review", "new-2", "validation_error", now - 30)
+    _publish_wrapped(channel, "legal.review", "other", "system_error", now - 30)
+
+    stats = _replayer(broker).replay(error_type="validation_error", since=now - 3600, max_messages=1)
+
+    assert (stats["matched"], stats["replayed"]) == (1, 1)
+    assert _drain(channel, "legal_review_queue") == [{"contract_id": "new-1"}]
+    assert broker.queue_depth("dead_letter_queue") == 3
+
+
+def test_dry_run_and_unroutable_messages_stay_in_dead_letter_queue(broker):
+    channel = broker.blocking_channel()
+    _publish_wrapped(channel, "legal.review", "c1", "validation_error", time.time())
+    _publish_wrapped(channel, "missing.route", "c2", "validation_error", time.time())
+
+    stats = _replayer(broker).replay(dry_run=True)
+    assert (stats["matched"], stats["replayed"]) == (2, 0)
+    assert broker.queue_depth("dead_letter_queue") == 2
+
+    stats = _replayer(broker).replay()
+    assert (stats["replayed"], stats["failed"]) == (1, 1)
+    assert _drain(channel, "legal_review_queue") == [{"contract_id": "c1"}]
+    assert [body["body"] for body in _drain(channel, "dead_letter_queue")] == [{"contract_id": "c2"}]
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+from pika.exceptions import AMQPConnectionError, StreamLostError
+
+from agents.error_handling import error_policy
+from agents.error_handling.error_policy import ErrorPolicyTable
+from common.config import Config, get_error_handling_config
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "agents", "config", "error_handling.yaml")
+
+
+def _caught(operation):
+    try:
+        operation()
+    except Exception as e:
+        return e
+    raise AssertionError("操作未抛出异常")
+
+
+def _raise(error):
+    raise error
+
+
+CASES = [
+    (lambda: int("壹佰元"), "validation_error"),
+    (lambda: "合同".encode("ascii"), "validation_error"),
+    (lambda: _raise(RuntimeError("模型返回空结果")), "processing_error"),
+    (lambda: open(os.path.join(os.path.dirname(__file__), "missing", "contract.txt")), "system_error"),
+    (lambda: _raise(ConnectionRefusedError(111, "Connection refused")), "connection_error"),
+    (lambda: _raise(TimeoutError("模型服务超时")), "connection_error"),
+    (lambda: _raise(AMQPConnectionError("refused")), "connection_error"),
+    (lambda: _raise(StreamLostError("stream lost")), "connection_error"),
+    (lambda: {}["clause"], None),
+]
+
+
+@pytest.fixture
+def policy_table():
+    return ErrorPolicyTable(get_error_handling_config(CONFIG_PATH)["error_types"])
+
+
+@pytest.mark.parametrize("operation, error_type", CASES)
+def test_real_exceptions_resolve_to_configured_policy(policy_table, operation, error_type):
+    rule = policy_table.lookup(_caught(operation))
+    assert rule.get("error_type") == error_type
+
+
+def test_every_configured_policy_is_resolved(policy_table):
+    configured = set(get_error_handling_config(CONFIG_PATH)["error_types"])
+    assert {error_type for _, error_type in CASES if error_type} == configured
+
+
+def test_lookup_is_memoized_and_rebuilt_after_config_reload(monkeypatch):
+    error_types = {"validation_error": {"retry": False, "exceptions": ["ValueError"]}}
+    monkeypatch.setattr(error_policy, "get_error_handling_config", lambda: {"error_types": error_types})
+    table = ErrorPolicyTable()
+
+    assert table.lookup(ValueError)["retry"] is False
+    assert table.lookup(UnicodeDecodeError)["error_type"] == "validation_error"
+    assert table.get_stats()["memoized_types"] == 2
+
+    error_types["validation_error"] = {"retry": True, "exceptions": ["ValueError"]}
+    assert table.lookup(ValueError)["retry"] is False
+    monkeypatch.setattr(Config, "version", Config.version + 1)
+    assert table.lookup(ValueError)["retry"] is True
+    assert table.get_stats()["memoized_types"] == 1
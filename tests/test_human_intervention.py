@@ -0,0 +1,76 @@
+from agents.base import base_agent
+from agents.base.base_agent import BaseAgent
+from agents.error_handling import human_intervention
+from agents.error_handling.human_intervention import ErrorRateWindow, HumanInterventionHandler
+from data_storage.intervention.intervention_store import InterventionStore
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+
+class _Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def test_window_buckets_roll_over(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(human_intervention.time, "time", clock.time)
+    window = ErrorRateWindow(window_seconds=10, buckets=10)
+
+    window.record_failure(RuntimeError("boom"))
+    clock.now += 5
+    window.record_success()
+    assert window.snapshot()["error_rate"] == 0.5
+
+    # 第一条失败所在的桶过期，成功仍在窗口内
+    clock.now += 6
+    stats = window.snapshot()
+    assert (stats["error_count"], stats["success_count"]) == (0, 1)
+
+    clock.now += 100
+    assert window.snapshot()["total_requests"] == 0
+
+
+class _FlakyAgent(BaseAgent):
+    def __init__(self, agent_id):
+        super().__init__(agent_id, "flaky_agent")
+        self.fail = True
+
+    def process(self, input_data):
+        if self.fail:
+            error_result = self.handle_error(RuntimeError("model timeout"))
+            return {"error": True, "message": "model timeout", "error_details": error_result}
+        return {"ok": True}
+
+
+def _handler(tmp_path):
+    return HumanInterventionHandler(store=InterventionStore(str(tmp_path / "interventions.db")),
+                                    consumer_registry=ConsumerRegistry())
+
+
+def test_failures_are_recorded_per_agent_type(tmp_path, monkeypatch):
+    handler = _handler(tmp_path)
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+
+    first, second = _FlakyAgent("flaky_agent-1"), _FlakyAgent("flaky_agent-2")
+    second.fail = False
+    first.run({})
+    second.run({})
+
+    stats = handler.get_error_stats("flaky_agent")
+    assert (stats["error_count"], stats["success_count"]) == (1, 1)
+    assert stats["error_rate"] == 0.5
+    assert set(handler.error_stats) == {"flaky_agent"}
+
+
+def test_repeated_failures_pause_the_agent_type(tmp_path, monkeypatch):
+    handler = _handler(tmp_path)
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+
+    for index in range(handler.error_threshold):
+        _FlakyAgent(f"flaky_agent-{index}").run({})
+
+    assert handler.is_agent_paused("flaky_agent")
+    assert handler.list_interventions(agent_id="flaky_agent")["total"] == 1
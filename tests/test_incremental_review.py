@@ -0,0 +1,67 @@
+import os
+import threading
+
+from core_services.contract_processor.clause_parser import ClauseParser
+from core_services.contract_processor.incremental_review import (
+    ClauseReviewStore, IncrementalReviewer, group_clause_results
+)
+
+V1 = "第一条 付款 甲方应支付100元。\n第二条 违约 违约方应赔偿。\n"
+V2 = "第一条 付款 甲方应支付200元。\n第二条 违约 违约方应赔偿。\n"
+
+
+def _reviewer(tmp_path, calls, model_version="m:1"):
+    def _review(clause):
+        calls.append(clause["id"])
+        return {"risk_scores": clause["id"]}
+
+    return IncrementalReviewer({"risk": _review}, clause_parser=ClauseParser(),
+                               store=ClauseReviewStore(str(tmp_path), namespace="risk_analyst"),
+                               model_version=lambda: model_version)
+
+
+def test_recorded_first_version_is_reviewed_once_on_revision(tmp_path):
+    calls = []
+    reviewer = _reviewer(tmp_path, calls)
+    assert reviewer.record("c1", V1) == 1
+    assert calls == []
+
+    result = reviewer.review("c1", V2)
+    assert result["summary"]["modified"] == 1
+    assert result["summary"]["pending"] == 1
+    assert sorted(calls) == [1, 2]
+
+    calls.clear()
+    result = reviewer.review("c1", V2)
+    assert result["summary"]["reviewed"] == 0
+    assert calls == []
+    grouped = group_clause_results(result, "risk")
+    assert [item["clause_id"] for item in grouped["risk_scores"]] == [1, 2]
+    assert grouped["failed_clauses"] == []
+
+
+def test_model_change_makes_reviews_stale(tmp_path):
+    calls = []
+    _reviewer(tmp_path, calls).review("c1", V1)
+    calls.clear()
+    result = _reviewer(tmp_path, calls, model_version="m:2").review("c1", V1)
+    assert result["summary"]["stale"] == 2
+    assert sorted(calls) == [1, 2]
+
+
+def test_concurrent_revisions_do_not_lose_versions(tmp_path):
+    store_path = str(tmp_path)
+    reviewers = [_reviewer(tmp_path, []) for _ in range(8)]
+    threads = [
+        threading.Thread(target=reviewer.review, args=("c1", V1 if index % 2 else V2))
+        for index, reviewer in enumerate(reviewers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    record = ClauseReviewStore(store_path, namespace="risk_analyst").load("c1")
+    assert record["version"] == len(reviewers)
+    assert not [name for name in os.listdir(os.path.join(store_path, "risk_analyst"))
+                if name.endswith(".tmp")]
@@ -0,0 +1,132 @@
+from agents.base import base_agent
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.human_intervention import HumanInterventionHandler
+from agents.orchestration.pipeline_orchestrator import PipelineOrchestrator
+from data_storage.intervention import intervention_store
+from data_storage.intervention.intervention_store import InterventionStore
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+PIPELINE_CONFIG = {
+    "pipelines": {"review": {"agents": ["analyst", "reporter"], "timeout": 10}},
+    "agents": {
+        "analyst": {"dependencies": []},
+        "reporter": {"dependencies": ["analyst"]}
+    }
+}
+
+
+class _NoCache:
+    def make_key(self, stage, content_hash):
+        return None
+
+    def get(self, stage, cache_key):
+        return None
+
+    def set(self, stage, cache_key, result):
+        return True
+
+
+class _EchoAgent(BaseAgent):
+    def __init__(self, agent_type):
+        super().__init__(f"{agent_type}-1", agent_type)
+        self.calls = 0
+
+    def use_result_cache(self, input_data):
+        return False
+
+    def process(self, input_data):
+        self.calls += 1
+        return {"ok": self.agent_type}
+
+
+def _record(intervention_id="i1", status="pending", agent_id="analyst"):
+    return {"intervention_id": intervention_id, "agent_id": agent_id, "status": status,
+            "error_count": 3, "error_rate": 0.5, "last_error": "boom"}
+
+
+def test_save_keeps_original_created_at(tmp_path):
+    store = InterventionStore(str(tmp_path / "interventions.db"))
+    store.save(_record())
+    created_at = store._conn.execute(
+        "SELECT created_at FROM interventions WHERE intervention_id = 'i1'").fetchone()[0]
+
+    store.save(_record(status="escalated"))
+
+    row = store._conn.execute(
+        "SELECT status, created_at FROM interventions WHERE intervention_id = 'i1'").fetchone()
+    assert row == ("escalated", created_at)
+
+
+def test_interventions_survive_reopen_and_page_newest_first(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "interventions.db")
+    now = [1000.0]
+    monkeypatch.setattr(intervention_store.time, "time", lambda: now[0])
+    store = InterventionStore(db_path)
+    for index in range(5):
+        now[0] += 1
+        store.save(_record(f"i{index}", agent_id="analyst" if index % 2 else "reporter"))
+    assert store.resolve("i1", {"action": "restart"}, "ops") == "analyst"
+    assert store.resolve("i1", {"action": "restart"}, "ops") is None
+    store.close()
+
+    store = InterventionStore(db_path)
+    page = store.list(status="pending", page=1, page_size=2)
+    assert page["total"] == 4
+    assert [item["intervention_id"] for item in page["items"]] == ["i4", "i3"]
+    assert [item["intervention_id"] for item in store.list(agent_id="analyst")["items"]] == ["i3", "i1"]
+    assert store.count_pending("analyst") == 1
+
+    resolved = store.get("i1")
+    assert (resolved["status"], resolved["resolved_by"]) == ("resolved", "ops")
+    # 重新保存未带解决方案的记录不会清空已有的解决方案
+    store.save(_record("i1", status="resolved"))
+    assert store.get("i1")["resolution"] == {"action": "restart"}
+
+
+def test_backlog_is_only_accepted_while_paused(tmp_path):
+    store = InterventionStore(str(tmp_path / "interventions.db"))
+    assert not store.enqueue_backlog("analyst", {"n": 0})
+
+    store.pause_agent("analyst", "i1")
+    assert store.enqueue_backlog("analyst", {"n": 1})
+
+    released = []
+
+    def _handler(task):
+        # 释放期间到达的任务同样被释放，而不是在解除暂停后被遗留
+        if task["n"] == 1:
+            store.enqueue_backlog("analyst", {"n": 2})
+        released.append(task["n"])
+        return True
+
+    assert [task["n"] for task in store.release_agent("analyst", _handler)] == [1, 2]
+    assert released == [1, 2]
+    assert not store.is_paused("analyst")
+    assert store.get_stats()["backlog"] == 0
+
+
+def test_orchestrator_defers_stage_of_paused_agent(tmp_path, monkeypatch):
+    republished = []
+    handler = HumanInterventionHandler(
+        store=InterventionStore(str(tmp_path / "interventions.db")),
+        consumer_registry=ConsumerRegistry(),
+        backlog_handler=lambda agent_id, task: republished.append((agent_id, task)) or True
+    )
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+    agents = {"analyst": _EchoAgent("analyst"), "reporter": _EchoAgent("reporter")}
+    orchestrator = PipelineOrchestrator("review", agents=agents, result_cache=_NoCache(),
+                                        pipeline_config=PIPELINE_CONFIG,
+                                        intervention_handler=handler)
+    handler.pause_agent("reporter")
+
+    result = orchestrator.run({"contract_text": "第一条 付款"})
+
+    assert result["status"] == "deferred"
+    assert result["timings"]["analyst"]["status"] == "completed"
+    assert result["timings"]["reporter"]["status"] == "deferred"
+    assert agents["reporter"].calls == 0
+
+    handler.resume_agent("reporter")
+    (agent_id, task), = republished
+    assert agent_id == "reporter"
+    assert task["analyst"] == {"ok": "analyst"}
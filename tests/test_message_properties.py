@@ -0,0 +1,19 @@
+from pika import frame
+
+from message_broker.core.connection import RabbitMQConnection
+
+
+def _marshal(properties):
+    return frame.Header(1, 0, properties).marshal()
+
+
+def test_default_properties_marshal():
+    properties = RabbitMQConnection._build_properties(None, None)
+    assert isinstance(properties.headers["published_at"], int)
+    assert _marshal(properties)
+
+
+def test_default_properties_with_priority_marshal():
+    properties = RabbitMQConnection._build_properties(None, 8)
+    assert properties.priority == 8
+    assert _marshal(properties)
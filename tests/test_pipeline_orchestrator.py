@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from agents.base import base_agent
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.human_intervention import HumanInterventionHandler
+from agents.orchestration.pipeline_orchestrator import PipelineOrchestrator
+from common.config import get_pipeline_config
+from data_storage.intervention.intervention_store import InterventionStore
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+STAGES = ["contract_analyst", "legal_counsel", "risk_analyst", "report_generator"]
+
+
+class _NoCache:
+    def make_key(self, stage, content_hash):
+        return None
+
+    def get(self, stage, cache_key):
+        return None
+
+    def set(self, stage, cache_key, result):
+        return True
+
+
+class _StageAgent(BaseAgent):
+    def __init__(self, agent_type, action=None):
+        super().__init__(f"{agent_type}-1", agent_type)
+        self.action = action
+        self.inputs = []
+
+    def use_result_cache(self, input_data):
+        return False
+
+    def process(self, input_data):
+        self.inputs.append(input_data)
+        if self.action:
+            self.action()
+        return {"stage": self.agent_type}
+
+
+@pytest.fixture
+def intervention_handler(tmp_path, monkeypatch):
+    handler = HumanInterventionHandler(store=InterventionStore(str(tmp_path / "interventions.db")),
+                                       consumer_registry=ConsumerRegistry())
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+    return handler
+
+
+def test_independent_stages_run_in_parallel(intervention_handler):
+    # 两个阶段都到达屏障才能继续，串行执行时屏障超时导致阶段失败
+    barrier = threading.Barrier(2, timeout=5)
+    agents = {stage: _StageAgent(stage) for stage in STAGES}
+    agents["legal_counsel"].action = agents["risk_analyst"].action = barrier.wait
+    orchestrator = PipelineOrchestrator(agents=agents, result_cache=_NoCache(),
+                                        pipeline_config=get_pipeline_config(),
+                                        intervention_handler=intervention_handler)
+
+    result = orchestrator.run({"contract_text": "第一条 付款"})
+
+    assert result["status"] == "completed"
+    assert all(result["timings"][stage]["status"] == "completed" for stage in STAGES)
+    report_input, = agents["report_generator"].inputs
+    assert report_input["legal_assessment"] == {"stage": "legal_counsel"}
+    assert report_input["risk_analysis"] == {"stage": "risk_analyst"}
+    assert report_input["contract_analysis"] == {"stage": "contract_analyst"}
+    assert result["critical_path"][0] == "contract_analyst"
+    assert result["critical_path"][-1] == "report_generator"
+
+
+def test_stage_timeout_skips_downstream_stages(intervention_handler):
+    pipeline_config = {
+        "pipelines": {"review": {"agents": ["slow", "after"], "timeout": 10}},
+        "agents": {
+            "slow": {"dependencies": [], "timeout": 0.2},
+            "after": {"dependencies": ["slow"]}
+        }
+    }
+    release = threading.Event()
+    agents = {"slow": _StageAgent("slow", lambda: release.wait(5)), "after": _StageAgent("after")}
+    orchestrator = PipelineOrchestrator("review", agents=agents, result_cache=_NoCache(),
+                                        pipeline_config=pipeline_config,
+                                        intervention_handler=intervention_handler)
+
+    started = time.monotonic()
+    result = orchestrator.run({})
+
+    assert time.monotonic() - started < 1
+    assert result["status"] == "timeout"
+    assert result["timings"]["slow"]["status"] == "timeout"
+    assert result["timings"]["after"] == {"status": "skipped"}
+    assert agents["after"].inputs == []
+
+    # 超时阶段的线程无法终止，放行并等待它结束，避免在测试之外继续运行
+    release.set()
+    deadline = time.monotonic() + 5
+    while intervention_handler.get_error_stats("slow")["success_count"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_dependency_cycle_is_rejected(intervention_handler):
+    pipeline_config = {
+        "pipelines": {"review": {"agents": ["a", "b"]}},
+        "agents": {"a": {"dependencies": ["b"]}, "b": {"dependencies": ["a"]}}
+    }
+    with pytest.raises(ValueError):
+        PipelineOrchestrator("review", agents={}, result_cache=_NoCache(),
+                             pipeline_config=pipeline_config,
+                             intervention_handler=intervention_handler)
@@ -0,0 +1,36 @@
+import pytest
+
+from message_broker.core.priority import (
+    PriorityLatencyMetrics, get_bulk_priority, get_priority_name, resolve_priority
+)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("特急", 10), ("加急", 8), ("普通", 5), ("high", 8), ("low", 2),
+    (None, 5), ("", 5), ("7", 7), (3, 3), (-1, 0), ("unknown", 5)
+])
+def test_upload_options_and_level_names_resolve_to_amqp_priority(value, expected):
+    assert resolve_priority(value) == expected
+
+
+def test_bulk_reprocessing_runs_below_new_uploads():
+    assert get_bulk_priority() == 2
+    assert get_bulk_priority() < resolve_priority("普通")
+    assert (get_priority_name(8), get_priority_name(7)) == ("high", "7")
+
+
+def test_latency_is_reported_per_stage_and_priority():
+    metrics = PriorityLatencyMetrics(window=3)
+    for wait in (0.1, 0.2, 0.3, 0.4):
+        metrics.record(8, wait, 1.0, "legal_review_queue")
+    metrics.record(2, None, 2.0, "legal_review_queue")
+
+    stats = metrics.get_stats()["legal_review_queue"]
+
+    # 高优先级排在前面，样本只保留最近 window 条，次数仍累计
+    assert list(stats) == ["high", "low"]
+    assert stats["high"]["count"] == 4
+    assert stats["high"]["wait"]["avg_ms"] == pytest.approx(300)
+    assert stats["high"]["wait"]["max_ms"] == pytest.approx(400)
+    assert stats["low"]["wait"] == {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+    assert stats["low"]["processing"]["avg_ms"] == pytest.approx(2000)
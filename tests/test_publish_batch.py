@@ -0,0 +1,183 @@
+from collections import deque
+from types import SimpleNamespace
+
+import pika
+
+from agents.error_handling.circuit_breaker import CircuitBreaker
+from message_broker.core import connection as connection_module
+from message_broker.core.connection import RabbitMQConnection
+from message_broker.core.priority import resolve_priority
+from message_broker.core.queue_manager import BrokerSession, QueueManager
+
+
+class _FakeIOLoop:
+    def __init__(self):
+        self.callbacks = deque()
+        self.timeouts = []
+        self.stopped = False
+        self.closed = False
+
+    def call_soon(self, callback, *args):
+        self.callbacks.append(lambda: callback(*args))
+
+    def call_later(self, delay, callback):
+        self.timeouts.append(callback)
+        return callback
+
+    def remove_timeout(self, handle):
+        self.timeouts.remove(handle)
+
+    def start(self):
+        self.stopped = False
+        while not self.stopped:
+            if self.callbacks:
+                self.callbacks.popleft()()
+            else:
+                # 没有待处理事件时时间直接推进到超时
+                self.timeouts[0]()
+
+    def stop(self):
+        self.stopped = True
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.published = []
+        self.on_confirm = None
+
+    def add_on_close_callback(self, callback):
+        pass
+
+    def confirm_delivery(self, ack_nack_callback, callback):
+        self.on_confirm = ack_nack_callback
+        self.connection.ioloop.call_soon(callback, None)
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.published.append((routing_key, body, properties.priority))
+        delivery_tag = len(self.published)
+        for method in self.connection.broker.respond(delivery_tag, body):
+            self.connection.ioloop.call_soon(self.on_confirm, SimpleNamespace(method=method))
+
+
+class _FakeBroker:
+    """按消息内容决定确认方式：ok 单条确认，bad 拒绝，lost 不确认，last 以 multiple 确认此前全部"""
+
+    def __init__(self):
+        self.connections = []
+
+    def respond(self, delivery_tag, body):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if body == b"ok":
+            return [pika.spec.Basic.Ack(delivery_tag=delivery_tag)]
+        if body == b"bad":
+            return [pika.spec.Basic.Nack(delivery_tag=delivery_tag)]
+        if body == b"last":
+            return [pika.spec.Basic.Ack(delivery_tag=delivery_tag, multiple=True)]
+        if body == b"boom":
+            raise ConnectionError("connection reset")
+        return []
+
+    def connect(self, parameters, on_open_callback, on_open_error_callback, on_close_callback):
+        connection = _FakeSelectConnection(self, on_open_callback, on_close_callback)
+        self.connections.append(connection)
+        return connection
+
+
+class _FakeSelectConnection:
+    def __init__(self, broker, on_open_callback, on_close_callback):
+        self.broker = broker
+        self.ioloop = _FakeIOLoop()
+        self.is_open = True
+        self.is_closed = False
+        self.channels = []
+        self.on_close_callback = on_close_callback
+        self.ioloop.call_soon(on_open_callback, self)
+
+    def channel(self, on_open_callback):
+        channel = _FakeChannel(self)
+        self.channels.append(channel)
+        self.ioloop.call_soon(on_open_callback, channel)
+
+    def close(self):
+        self.is_open, self.is_closed = False, True
+        self.ioloop.call_soon(self.on_close_callback, self, "closed by client")
+
+
+def _connection(monkeypatch):
+    broker = _FakeBroker()
+    monkeypatch.setattr(connection_module.pika, "SelectConnection", broker.connect)
+    rabbitmq = RabbitMQConnection(host="localhost", port=5672, username="guest", password="guest")
+    rabbitmq.circuit_breaker = CircuitBreaker("rabbitmq:test", minimum_calls=100)
+    return rabbitmq, broker
+
+
+def test_batch_is_confirmed_by_one_multiple_ack(monkeypatch):
+    rabbitmq, broker = _connection(monkeypatch)
+
+    result = rabbitmq.publish_batch("contract_review_exchange", "legal.review",
+                                    [b"a", b"b", b"c", b"last"], priority=7)
+
+    assert result == {"published": 4, "acked": 4, "nacked": [], "unconfirmed": []}
+    (fake,) = broker.connections
+    assert [item[1] for item in fake.channels[0].published] == [b"a", b"b", b"c", b"last"]
+    assert {item[2] for item in fake.channels[0].published} == {7}
+    assert rabbitmq.circuit_breaker.get_stats()["successes"] == 1
+
+
+def test_nacked_and_unconfirmed_indices_are_reported_for_retry(monkeypatch):
+    rabbitmq, broker = _connection(monkeypatch)
+
+    result = rabbitmq.publish_batch("contract_review_exchange", "legal.review",
+                                    [b"ok", b"bad", b"lost", b"ok"], timeout=1)
+
+    assert result == {"published": 4, "acked": 2, "nacked": [1], "unconfirmed": [2]}
+    assert rabbitmq.circuit_breaker.get_stats()["failures"] == 1
+
+    # 发布器连接在批次之间复用，投递标签继续递增
+    assert rabbitmq.publish_batch("contract_review_exchange", "legal.review", [b"last"])["acked"] == 1
+    assert len(broker.connections) == 1
+
+
+def test_failed_publish_reopens_the_publisher_connection(monkeypatch):
+    rabbitmq, broker = _connection(monkeypatch)
+
+    result = rabbitmq.publish_batch("contract_review_exchange", "legal.review", [b"ok", b"boom", b"ok"])
+
+    # 出错前已发出但尚未处理确认的消息同样视为未确认
+    assert result["published"] == 1
+    assert (result["acked"], result["unconfirmed"]) == (0, [0, 1, 2])
+    first = broker.connections[0]
+    assert first.is_closed and first.ioloop.closed
+
+    result = rabbitmq.publish_batch("contract_review_exchange", "legal.review", [b"ok", b"ok"])
+    assert result == {"published": 2, "acked": 2, "nacked": [], "unconfirmed": []}
+    assert len(broker.connections) == 2
+
+
+def test_open_circuit_rejects_the_whole_batch(monkeypatch):
+    rabbitmq, broker = _connection(monkeypatch)
+    monkeypatch.setattr(rabbitmq.circuit_breaker, "allow_request", lambda: False)
+
+    result = rabbitmq.publish_batch("contract_review_exchange", "legal.review", [b"ok", b"ok"])
+
+    assert result["nacked"] == [0, 1]
+    assert broker.connections == []
+
+
+def test_queue_manager_serializes_batch_and_resolves_priority(monkeypatch):
+    rabbitmq, broker = _connection(monkeypatch)
+    monkeypatch.setattr(rabbitmq, "ensure_connected", lambda: True)
+    queue_manager = QueueManager(BrokerSession(rabbitmq))
+
+    result = queue_manager.publish_batch("contract_review_exchange", "legal.review",
+                                         [{"task_id": "t1"}, "ok", "last"], priority="high")
+
+    assert result["acked"] == 3
+    published = broker.connections[0].channels[0].published
+    assert published[0][1] == '{"task_id": "t1"}'
+    assert {item[2] for item in published} == {resolve_priority("high")}
@@ -0,0 +1,78 @@
+import json
+
+from message_broker.core.queue_manager import BrokerSession, QueueManager
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.generation = 1
+        self.calls = []
+        self.fail_declarations = False
+
+    def ensure_connected(self):
+        return True
+
+    def declare_exchange(self, exchange_name, exchange_type, durable):
+        self.calls.append(("exchange", exchange_name))
+        return not self.fail_declarations
+
+    def declare_queue(self, queue_name, durable, arguments):
+        self.calls.append(("queue", queue_name))
+        return not self.fail_declarations
+
+    def bind_queue(self, queue_name, exchange_name, routing_key):
+        self.calls.append(("binding", queue_name))
+        return not self.fail_declarations
+
+    def publish_message(self, exchange_name, routing_key, message, properties, priority):
+        self.calls.append(("publish", routing_key, message, priority))
+        return True
+
+
+def _declare_topology(queue_manager):
+    return all([
+        queue_manager.declare_exchange("contract_review_exchange"),
+        queue_manager.declare_queue("legal_review_queue"),
+        queue_manager.bind_queue("legal_review_queue", "contract_review_exchange", "legal.review")
+    ])
+
+
+def test_managers_share_one_session_and_declare_topology_once():
+    connection = _FakeConnection()
+    session = BrokerSession(connection)
+
+    assert _declare_topology(QueueManager(session))
+    assert _declare_topology(QueueManager(session))
+
+    assert len(connection.calls) == 3
+    stats = session.get_stats()
+    assert (stats["declarations"], stats["cache_hits"], stats["declared"]) == (3, 3, 3)
+
+
+def test_reconnect_and_failed_declarations_are_not_cached():
+    connection = _FakeConnection()
+    session = BrokerSession(connection)
+    queue_manager = QueueManager(session)
+
+    connection.fail_declarations = True
+    assert not queue_manager.declare_queue("legal_review_queue")
+    connection.fail_declarations = False
+    assert queue_manager.declare_queue("legal_review_queue")
+
+    # 连接重建后服务器上的拓扑需要重新确认
+    connection.generation += 1
+    assert queue_manager.declare_queue("legal_review_queue")
+    assert connection.calls == [("queue", "legal_review_queue")] * 3
+    assert session.get_stats()["reconnects"] == 1
+
+
+def test_publish_serializes_dict_and_keeps_task_priority():
+    connection = _FakeConnection()
+    queue_manager = QueueManager(BrokerSession(connection))
+
+    assert queue_manager.publish_message("contract_review_exchange", "legal.review",
+                                         {"contract_id": "c1", "metadata": {"priority": 7}})
+
+    _, routing_key, body, priority = connection.calls[-1]
+    assert (routing_key, priority) == ("legal.review", 7)
+    assert json.loads(body)["contract_id"] == "c1"
@@ -0,0 +1,47 @@
+import sqlite3
+
+from data_storage.cache.result_cache import ResultCache
+
+
+def _result(index):
+    return {"index": index, "text": "条款" * 20}
+
+
+def _sum_size(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+
+def test_hit_and_miss_per_stage(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.db"), ttl=0, max_size=1 << 20)
+    key = cache.make_key("risk_analyst", "hash-1")
+
+    assert cache.get("risk_analyst", key) is None
+    cache.set("risk_analyst", key, _result(1))
+    assert cache.get("risk_analyst", key) == _result(1)
+
+    stats = cache.get_stats()
+    assert stats["stages"]["risk_analyst"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_size_limit_holds_across_processes_sharing_the_file(tmp_path):
+    db_path = str(tmp_path / "results.db")
+    entry_size = ResultCache(db_path, ttl=0, max_size=1 << 20)
+    entry_size.set("stage", "probe", _result(0))
+    size = entry_size.get_stats()["size"]
+    entry_size.clear()
+
+    # 两个实例模拟共享同一数据库文件的两个进程
+    first = ResultCache(db_path, ttl=0, max_size=size * 5)
+    second = ResultCache(db_path, ttl=0, max_size=size * 5)
+    for index in range(20):
+        cache = first if index % 2 else second
+        cache.set("stage", f"key-{index}", _result(index % 10))
+
+    actual = _sum_size(db_path)
+    assert actual <= size * 5
+    assert first.get_stats()["size"] == second.get_stats()["size"] == actual
+
+    # 覆盖已有结果只计算一次大小
+    first.set("stage", "key-19", _result(9))
+    assert second.get_stats()["size"] == _sum_size(db_path)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from agents.base import base_agent
+from agents.base.base_agent import BaseAgent
+from agents.error_handling.human_intervention import HumanInterventionHandler
+from agents.error_handling.retry_scheduler import RetryScheduler
+from agents.error_handling.retry_strategy import RetryStrategy
+from agents.orchestration.agent_pool import AgentPool
+from data_storage.intervention.intervention_store import InterventionStore
+from message_broker.core.consumer_registry import ConsumerRegistry
+
+
+class _NoCache:
+    def make_key(self, stage, content_hash):
+        return None
+
+    def get(self, stage, cache_key):
+        return None
+
+    def set(self, stage, cache_key, result):
+        return True
+
+
+def _scheduler(initial_delay, retry_budget=3):
+    strategy = RetryStrategy()
+    strategy.initial_delay = initial_delay
+    return RetryScheduler(strategy, jitter=0, retry_budget=retry_budget)
+
+
+def test_callback_runs_after_backoff_and_budget_is_per_task():
+    scheduler = _scheduler(0.01, retry_budget=2)
+    fired = []
+    done = threading.Event()
+
+    assert scheduler.schedule("c1", lambda: fired.append(1))
+    assert scheduler.schedule("c1", lambda: (fired.append(2), done.set()))
+    assert not scheduler.schedule("c1", lambda: fired.append(3))
+    # 其他合同的预算不受影响
+    assert scheduler.schedule("c2", lambda: None)
+
+    assert done.wait(5)
+    assert fired == [1, 2]
+    stats = scheduler.get_stats()
+    assert (stats["scheduled"], stats["exhausted"]) == (3, 1)
+
+    scheduler.complete("c2")
+    assert scheduler.get_stats()["tracked_tasks"] == 0
+
+
+class _FlakyAgent(BaseAgent):
+    def __init__(self, agent_id, attempts, log):
+        super().__init__(agent_id, "flaky_agent")
+        self.attempts = attempts
+        self.log = log
+
+    def use_result_cache(self, input_data):
+        return False
+
+    def process(self, input_data):
+        name = input_data["name"]
+        self.log.append(name)
+        if name != "flaky":
+            return {"name": name}
+        self.attempts.append(self.error_count)
+        if self.error_count < 2:
+            return {"error": True, "error_details": self.handle_error(RuntimeError("model timeout"))}
+        return {"name": name}
+
+
+def test_pool_retry_carries_attempts_and_frees_the_worker(tmp_path, monkeypatch):
+    handler = HumanInterventionHandler(store=InterventionStore(str(tmp_path / "interventions.db")),
+                                       consumer_registry=ConsumerRegistry())
+    monkeypatch.setattr(base_agent, "get_intervention_handler", lambda: handler)
+    attempts, log = [], []
+    scheduler = _scheduler(0.2)
+    pool = AgentPool("flaky_agent", lambda agent_id: _FlakyAgent(agent_id, attempts, log), size=1,
+                     result_cache=_NoCache(), retry_scheduler=scheduler)
+
+    flaky = pool.submit({"name": "flaky", "metadata": {"task_id": "flaky"}})
+    time.sleep(0.05)
+    other = pool.submit({"name": "other", "metadata": {"task_id": "other"}})
+
+    assert other.result(timeout=5) == {"name": "other"}
+    assert flaky.result(timeout=5) == {"name": "flaky"}
+    pool.shutdown()
+
+    # 重试时的实例都写入了此前的失败次数，退避期间唯一的实例处理了另一份合同
+    assert attempts == [0, 1, 2]
+    assert log.index("other") == 1
+    assert scheduler.get_stats()["tracked_tasks"] == 0
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agents.error_handling.retry_strategy import RetryStrategy
+
+
+def _strategy(initial_delay=0.01):
+    strategy = RetryStrategy()
+    strategy.initial_delay = initial_delay
+    return strategy
+
+
+class _FailingCall:
+    def __init__(self, failures, error=RuntimeError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, value):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error("模型服务暂时不可用")
+        return value
+
+
+def test_async_retry_backs_off_without_threads():
+    strategy = _strategy(0.05)
+    calls = [_FailingCall(1) for _ in range(200)]
+
+    async def _main():
+        return await asyncio.gather(*(strategy.execute_with_retry_async(call, index)
+                                      for index, call in enumerate(calls)))
+
+    threads = threading.active_count()
+    started = time.monotonic()
+    assert asyncio.run(_main()) == list(range(200))
+    # 200个请求同时退避，总耗时约为一次退避而不是200次
+    assert time.monotonic() - started < 1
+    assert threading.active_count() == threads
+    assert all(call.calls == 2 for call in calls)
+
+
+def test_async_retry_follows_error_type_policy():
+    # processing_error 最多重试2次，第2次失败后停止
+    call = _FailingCall(5)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_strategy().execute_with_retry_async(call, "x"))
+    assert call.calls == 2
+
+    # 被调用方自身抛出的超时仍按 connection_error 策略重试
+    call = _FailingCall(1, TimeoutError)
+    assert asyncio.run(_strategy().execute_with_retry_async(call, "x")) == "x"
+
+
+def test_deadline_stops_retrying():
+    calls = []
+
+    async def _slow():
+        calls.append(1)
+        await asyncio.sleep(1)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(_strategy().execute_with_retry_async(_slow, deadline=0.1))
+    assert time.monotonic() - started < 0.5
+    assert calls == [1]
+
+    # 退避等待会越过时限时不再重试
+    call = _FailingCall(5)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_strategy(initial_delay=1).execute_with_retry_async(call, "x", deadline=0.5))
+    assert call.calls == 1
+
+
+def test_cancellation_is_not_retried():
+    call = _FailingCall(5)
+
+    async def _main():
+        task = asyncio.create_task(_strategy(initial_delay=10).execute_with_retry_async(call, "x"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(_main())
+    assert call.calls == 1
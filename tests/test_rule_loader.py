@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core_services.contract_processor import rule_loader
+from core_services.contract_processor.clause_classifier import DEFAULT_CLAUSE_PATTERNS
+from core_services.contract_processor.rule_loader import load_compiled_rules, parse_rule_patterns
+
+
+def _write_rules(path, rows):
+    pd.DataFrame(rows, columns=["clause_type", "pattern"]).to_csv(path, index=False)
+
+
+def test_parse_rule_patterns_rejects_missing_columns():
+    with pytest.raises(ValueError):
+        parse_rule_patterns(pd.DataFrame({"type": ["价格条款"], "regex": ["价格"]}))
+
+
+def test_parse_rule_patterns_skips_incomplete_rows_and_keeps_last_duplicate():
+    kb_data = pd.DataFrame({
+        "clause_type": ["知识产权", "争议解决", "知识产权", None],
+        "pattern": ["专利", None, "专利|商标", "仲裁"]
+    })
+    assert parse_rule_patterns(kb_data) == {"知识产权": "专利|商标"}
+
+
+def test_compiled_rules_cache_hits_until_content_changes(tmp_path, monkeypatch):
+    kb_path = str(tmp_path / "rules.csv")
+    cache_dir = str(tmp_path / "cache")
+    _write_rules(kb_path, [("知识产权", "专利|商标")])
+
+    patterns, classifier = load_compiled_rules(kb_path, DEFAULT_CLAUSE_PATTERNS, cache_dir)
+    assert patterns["知识产权"] == "专利|商标"
+    assert classifier.classify("乙方不得侵犯甲方商标") == "知识产权"
+    assert len(os.listdir(cache_dir)) == 1
+
+    # 内容未变时直接命中缓存，不再解析 CSV
+    def _fail_read_csv(*args, **kwargs):
+        raise AssertionError("缓存命中时不应解析CSV")
+
+    monkeypatch.setattr(rule_loader.pd, "read_csv", _fail_read_csv)
+    cached_patterns, cached_classifier = load_compiled_rules(kb_path, DEFAULT_CLAUSE_PATTERNS, cache_dir)
+    assert cached_patterns == patterns
+    assert cached_classifier.classify("乙方不得侵犯甲方商标") == "知识产权"
+
+    monkeypatch.undo()
+    _write_rules(kb_path, [("知识产权", "专利|著作权")])
+    patterns, classifier = load_compiled_rules(kb_path, DEFAULT_CLAUSE_PATTERNS, cache_dir)
+    assert classifier.classify("乙方不得侵犯甲方著作权") == "知识产权"
+    assert len(os.listdir(cache_dir)) == 2
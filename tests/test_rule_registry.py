@@ -0,0 +1,46 @@
+import pandas as pd
+
+from core_services.contract_processor.clause_parser import ClauseParser
+from core_services.contract_processor.rule_registry import ClauseRuleRegistry
+
+TEXT = "第一条 乙方不得侵犯甲方商标。"
+
+
+def _write_rules(path, rows):
+    pd.DataFrame(rows, columns=["clause_type", "pattern"]).to_csv(path, index=False)
+
+
+def test_changed_file_swaps_rules_and_content_hash(tmp_path):
+    kb_path = str(tmp_path / "rules.csv")
+    _write_rules(kb_path, [("知识产权", "专利")])
+    registry = ClauseRuleRegistry(kb_path, cache_dir=str(tmp_path / "cache"))
+    parser = ClauseParser(rule_registry=registry)
+    first = registry.current
+
+    assert parser.extract_clauses(TEXT)[0]["type"] == "其他条款"
+    assert not registry.check_for_update()
+
+    _write_rules(kb_path, [("知识产权", "专利|商标")])
+    assert registry.check_for_update()
+
+    assert registry.version == first.version + 1
+    assert registry.content_hash != first.content_hash
+    assert parser.extract_clauses(TEXT)[0]["type"] == "知识产权"
+    # 旧快照保持不变，正在使用它的读取方不受替换影响
+    assert first.classifier.classify(TEXT) == "其他条款"
+
+
+def test_broken_file_keeps_previous_rules(tmp_path):
+    kb_path = str(tmp_path / "rules.csv")
+    _write_rules(kb_path, [("知识产权", "商标")])
+    registry = ClauseRuleRegistry(kb_path, cache_dir=str(tmp_path / "cache"))
+    version, content_hash = registry.version, registry.content_hash
+
+    with open(kb_path, "w", encoding="utf-8") as f:
+        f.write("type,regex\n知识产权,专利\n")
+    assert not registry.check_for_update()
+    # 同一份有问题的文件不会反复编译
+    assert not registry.check_for_update()
+
+    assert (registry.version, registry.content_hash) == (version, content_hash)
+    assert registry.current.classifier.classify(TEXT) == "知识产权"
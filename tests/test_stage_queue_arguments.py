@@ -0,0 +1,20 @@
+from message_broker.core.connection import stage_queue_arguments
+
+
+def test_stage_queue_dead_letters_to_dead_letter_exchange():
+    arguments = stage_queue_arguments("legal_review_queue")
+    assert arguments["x-dead-letter-exchange"] == "dead_letter_exchange"
+    assert arguments["x-dead-letter-routing-key"] == "dead_letter"
+    assert arguments["x-max-priority"] == 10
+
+
+def test_explicit_arguments_take_precedence():
+    arguments = stage_queue_arguments("legal_review_queue", {"x-max-priority": 5})
+    assert arguments["x-max-priority"] == 5
+    assert arguments["x-dead-letter-exchange"] == "dead_letter_exchange"
+
+
+def test_other_queues_are_unchanged():
+    retry_arguments = {"x-dead-letter-exchange": "contract_review_exchange"}
+    assert stage_queue_arguments("legal_review_queue.retry.1", retry_arguments) == retry_arguments
+    assert stage_queue_arguments("dead_letter_queue") is None
@@ -0,0 +1,47 @@
+import json
+
+from message_broker.core import task_publisher
+from message_broker.core.task_publisher import submit_contract
+
+
+class _RecordingQueueManager:
+    def __init__(self):
+        self.published = []
+
+    def declare_exchange(self, *args, **kwargs):
+        return True
+
+    def declare_queue(self, *args, **kwargs):
+        return True
+
+    def bind_queue(self, *args, **kwargs):
+        return True
+
+    def publish_message(self, exchange_name, routing_key, message, properties=None, priority=None):
+        self.published.append((exchange_name, routing_key, message))
+        return True
+
+
+def test_submitted_task_carries_contract_text(tmp_path, monkeypatch):
+    monkeypatch.setitem(task_publisher.config, "file_storage", {"base_path": str(tmp_path)})
+    queue_manager = _RecordingQueueManager()
+    text = "第一条 付款 甲方应支付100元。"
+
+    result = submit_contract("合同.txt", text.encode("gb18030"), "加急", queue_manager=queue_manager)
+
+    assert not result["error"]
+    (exchange_name, routing_key, message), = queue_manager.published
+    assert (exchange_name, routing_key) == ("contract_review_exchange", "contract.analysis")
+    assert message["contract_text"] == text
+    assert message["metadata"]["priority"] == result["priority"]
+    json.dumps(message, ensure_ascii=False)
+
+
+def test_unsupported_file_is_rejected_before_publishing(tmp_path, monkeypatch):
+    monkeypatch.setitem(task_publisher.config, "file_storage", {"base_path": str(tmp_path)})
+    queue_manager = _RecordingQueueManager()
+
+    result = submit_contract("合同.xls", b"\x00\x01", queue_manager=queue_manager)
+
+    assert result["error"]
+    assert queue_manager.published == []